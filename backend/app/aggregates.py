@@ -0,0 +1,106 @@
+"""Dashboard aggregates: application count / acreage by status x program x
+season x farmer state/district (models.ApplicationStat).
+
+Writers keep the table in step inside their own transaction: remove() the
+affected applications' current contribution before changing them, add() it
+back after (both are one INSERT ... SELECT ... GROUP BY ... ON CONFLICT DO
+UPDATE, however many applications). The full rebuild recomputes everything
+from applications:
+
+    python -m app.aggregates
+"""
+from typing import Iterable
+import json
+import time
+
+from sqlalchemy import delete, func, literal, select, true
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+
+_stats = models.ApplicationStat.__table__
+_KEY = ("status", "program_id", "season", "state", "district")
+
+
+def _upsert(dialect_name: str):
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(_stats)
+
+
+def _grouped(where, sign: int = 1):
+    A, U = models.Application, models.User
+    status = func.coalesce(A.status, "pending")
+    state, district = func.coalesce(U.state, ""), func.coalesce(U.district, "")
+    return (
+        select(
+            status, A.program_id, A.season, state, district,
+            literal(sign) * func.count(),
+            literal(sign) * func.coalesce(func.sum(A.acreage), 0.0),
+        )
+        .join(U, U.id == A.user_id)
+        .where(where)  # also keeps SQLite's INSERT ... SELECT ... ON CONFLICT unambiguous
+        .group_by(status, A.program_id, A.season, state, district)
+    )
+
+
+def _delta_stmt(dialect_name: str, where, sign: int):
+    stmt = _upsert(dialect_name).from_select([*_KEY, "count", "acreage"], _grouped(where, sign))
+    return stmt.on_conflict_do_update(
+        index_elements=list(_KEY),
+        set_={
+            "count": _stats.c.count + stmt.excluded.count,
+            "acreage": _stats.c.acreage + stmt.excluded.acreage,
+        },
+    )
+
+
+def for_ids(app_ids: Iterable[int]):
+    return models.Application.id.in_(list(app_ids))
+
+
+def for_user(user_id: int):
+    return models.Application.user_id == user_id
+
+
+async def add(db: AsyncSession, where):
+    await db.execute(_delta_stmt(db.bind.dialect.name, where, +1))
+
+
+async def remove(db: AsyncSession, where):
+    await db.execute(_delta_stmt(db.bind.dialect.name, where, -1))
+
+
+def add_sync(conn: Connection, where):
+    conn.execute(_delta_stmt(conn.dialect.name, where, +1))
+
+
+def remove_sync(conn: Connection, where):
+    conn.execute(_delta_stmt(conn.dialect.name, where, -1))
+
+
+def rebuild(engine: Engine) -> int:
+    """Recompute the whole table from applications in one transaction."""
+    with engine.begin() as conn:
+        conn.execute(delete(_stats))
+        conn.execute(
+            _stats.insert().from_select([*_KEY, "count", "acreage"], _grouped(true()))
+        )
+        return conn.execute(select(func.count()).select_from(_stats)).scalar()
+
+
+def main():
+    from .database import engine
+    from .migrations import upgrade
+
+    upgrade(engine)
+    t0 = time.perf_counter()
+    groups = rebuild(engine)
+    print(json.dumps({"groups": groups, "seconds": round(time.perf_counter() - t0, 3)}))
+
+
+if __name__ == "__main__":
+    main()
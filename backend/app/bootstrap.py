@@ -0,0 +1,38 @@
+"""One-shot database bootstrap: schema upgrade plus reference/demo data.
+
+Run once per deploy (not per worker), before starting the API:
+    python -m app.bootstrap               # migrate + seed
+    python -m app.bootstrap --schema-only # migrate only
+
+Both steps are idempotent, so re-running is harmless. The API itself never
+writes at startup; it refuses to start against an empty database instead.
+"""
+import argparse
+import json
+import time
+
+from .database import engine
+from .migrations import upgrade
+from .seed import seed_data
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Create/upgrade the schema and seed reference data")
+    ap.add_argument("--schema-only", action="store_true", help="skip crops/programs/admin seeding")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    upgrade(engine)
+    t1 = time.perf_counter()
+    if not args.schema_only:
+        seed_data(engine)
+    t2 = time.perf_counter()
+    print(json.dumps({
+        "database": engine.url.render_as_string(hide_password=True),
+        "migrate_seconds": round(t1 - t0, 3),
+        "seed_seconds": round(t2 - t1, 3) if not args.schema_only else None,
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Bulk import of paper applications (CSV or NDJSON).
+
+Usage (from backend/):
+    python -m app.bulk_import applications.csv [--format csv|ndjson] [--chunk-size 5000]
+
+Each row needs one of user_id / email / aadhar to identify the farmer, plus
+program_id, crop_id, acreage and season (optional: submitted_at, remarks).
+Rows are validated and de-duplicated set-wise per chunk, then applications,
+their initial status history and linked ID documents are inserted with batched
+executemany, one transaction per chunk. Bad rows are reported, not fatal.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Literal, Optional, TextIO, Tuple
+import argparse
+import csv
+import io
+import itertools
+import json
+import sys
+
+from pydantic import BaseModel, ValidationError, model_validator
+from sqlalchemy import insert, select
+from sqlalchemy.engine import Engine
+
+from . import aggregates, models, previews, scoring, storage
+
+DEFAULT_CHUNK_SIZE = 5000
+IN_PROGRESS = ("pending", "under_review")
+
+_apps = models.Application.__table__
+_history = models.ApplicationStatusHistory.__table__
+_docs = models.Document.__table__
+_users = models.User.__table__
+
+
+class ImportRow(BaseModel):
+    user_id: Optional[int] = None
+    email: Optional[str] = None
+    aadhar: Optional[str] = None
+    program_id: int
+    crop_id: int
+    acreage: float
+    season: Literal["Kharif", "Rabi", "Zaid", "Any"]
+    submitted_at: Optional[datetime] = None
+    remarks: Optional[str] = None
+
+    @model_validator(mode="before")
+    @classmethod
+    def _blank_to_none(cls, data):
+        # CSV cells are "" when empty
+        if isinstance(data, dict):
+            return {k: (None if v == "" else v) for k, v in data.items()}
+        return data
+
+    @model_validator(mode="after")
+    def _needs_user_ref(self):
+        if self.user_id is None and not self.email and not self.aadhar:
+            raise ValueError("one of user_id, email or aadhar is required")
+        if self.acreage <= 0:
+            raise ValueError("acreage must be positive")
+        return self
+
+
+def read_rows(stream: TextIO, fmt: str) -> Iterator[Tuple[int, dict]]:
+    """Yield (row_number, raw dict). Row numbers are 1-based data rows."""
+    if fmt == "csv":
+        for n, row in enumerate(csv.DictReader(stream), start=1):
+            yield n, row
+    elif fmt == "ndjson":
+        n = 0
+        for line in stream:
+            if not line.strip():
+                continue
+            n += 1
+            try:
+                raw = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield n, {"__error__": f"invalid JSON: {e.msg}"}
+                continue
+            yield n, raw if isinstance(raw, dict) else {"__error__": "expected a JSON object"}
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def detect_format(filename: Optional[str]) -> str:
+    name = (filename or "").lower()
+    return "ndjson" if name.endswith((".ndjson", ".jsonl", ".json")) else "csv"
+
+
+def _chunks(it: Iterable, size: int) -> Iterator[list]:
+    it = iter(it)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _lookup(conn, column, values) -> Dict:
+    # value -> (user id, doc_path)
+    if not values:
+        return {}
+    rows = conn.execute(
+        select(column, _users.c.id, _users.c.doc_path).where(column.in_(list(values)))
+    ).all()
+    return {v: (uid, doc) for v, uid, doc in rows}
+
+
+def import_applications(
+    engine: Engine,
+    stream: TextIO,
+    fmt: str = "csv",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    admin_id: Optional[int] = None,
+) -> dict:
+    with engine.connect() as conn:
+        program_ids = set(conn.execute(select(models.Program.id)).scalars())
+        crop_ids = set(conn.execute(select(models.Crop.id)).scalars())
+
+    total = imported = 0
+    errors: List[dict] = []
+    seen = set()  # (user_id, program_id) accepted earlier in this file
+
+    for chunk in _chunks(read_rows(stream, fmt), chunk_size):
+        total += len(chunk)
+
+        # 1️⃣ Shape/type validation
+        valid: List[Tuple[int, ImportRow]] = []
+        for n, raw in chunk:
+            if "__error__" in raw:
+                errors.append({"row": n, "error": raw["__error__"]})
+                continue
+            try:
+                valid.append((n, ImportRow.model_validate(raw)))
+            except ValidationError as e:
+                errors.append({"row": n, "error": "; ".join(
+                    f"{'.'.join(map(str, err['loc'])) or 'row'}: {err['msg']}" for err in e.errors()
+                )})
+
+        with engine.begin() as conn:
+            # 2️⃣ Resolve farmers set-wise
+            by_id = _lookup(conn, _users.c.id, {r.user_id for _, r in valid if r.user_id is not None})
+            by_email = _lookup(conn, _users.c.email, {r.email for _, r in valid if r.user_id is None and r.email})
+            by_aadhar = _lookup(conn, _users.c.aadhar, {
+                r.aadhar for _, r in valid if r.user_id is None and not r.email and r.aadhar
+            })
+
+            resolved: List[Tuple[int, ImportRow, int, Optional[str]]] = []
+            for n, r in valid:
+                if r.user_id is not None:
+                    hit = by_id.get(r.user_id)
+                elif r.email:
+                    hit = by_email.get(r.email)
+                else:
+                    hit = by_aadhar.get(r.aadhar)
+                if hit is None:
+                    errors.append({"row": n, "error": "unknown user"})
+                elif r.program_id not in program_ids:
+                    errors.append({"row": n, "error": f"unknown program_id {r.program_id}"})
+                elif r.crop_id not in crop_ids:
+                    errors.append({"row": n, "error": f"unknown crop_id {r.crop_id}"})
+                else:
+                    resolved.append((n, r, hit[0], hit[1]))
+
+            # 3️⃣ Duplicate check: one query for the whole chunk
+            user_ids = {uid for _, _, uid, _ in resolved}
+            in_progress = set()
+            if user_ids:
+                in_progress = set(conn.execute(
+                    select(_apps.c.user_id, _apps.c.program_id).where(
+                        _apps.c.user_id.in_(list(user_ids)),
+                        _apps.c.status.in_(IN_PROGRESS),
+                    )
+                ).tuples())
+
+            now = datetime.utcnow()
+            to_insert = []
+            for n, r, uid, doc_path in resolved:
+                key = (uid, r.program_id)
+                if key in in_progress or key in seen:
+                    errors.append({"row": n, "error": "application already in progress for this program"})
+                    continue
+                seen.add(key)
+                to_insert.append((r, uid, doc_path))
+
+            if not to_insert:
+                continue
+
+            # 4️⃣ Batched inserts (multi-row VALUES ... RETURNING). (user_id, program_id)
+            # is unique within to_insert, so returned ids are matched by key rather
+            # than by row order (which SQLite does not guarantee).
+            returned = conn.execute(
+                insert(_apps).returning(_apps.c.id, _apps.c.user_id, _apps.c.program_id),
+                [
+                    {
+                        "user_id": uid, "program_id": r.program_id, "crop_id": r.crop_id,
+                        "acreage": r.acreage, "season": r.season, "status": "pending",
+                        "submitted_at": r.submitted_at or now, "remarks": r.remarks,
+                    }
+                    for r, uid, _ in to_insert
+                ],
+            ).tuples().all()
+            app_ids = {(uid, program_id): app_id for app_id, uid, program_id in returned}
+            aggregates.add_sync(conn, aggregates.for_ids(app_ids.values()))
+            scoring.rescore(conn, scoring.for_ids(app_ids.values()))
+
+            conn.execute(insert(_history), [
+                {"application_id": app_id, "status": "pending", "at": now,
+                 "by_admin_id": admin_id, "note": "Imported"}
+                for app_id in app_ids.values()
+            ])
+
+            doc_rows = []
+            for r, uid, doc_path in to_insert:
+                sha256 = storage.store.sha256_of(doc_path)
+                if sha256:  # stored blobs only
+                    doc_rows.append({
+                        "kind": "Govt ID", "file_path": doc_path, "uploaded_at": now, "sha256": sha256,
+                        "content_type": previews.sniff_type(sha256), "user_id": uid,
+                        "application_id": app_ids[(uid, r.program_id)]})
+            if doc_rows:
+                conn.execute(insert(_docs), doc_rows)
+
+            imported += len(returned)
+
+    errors.sort(key=lambda e: e["row"])
+    return {"total": total, "imported": imported, "failed": len(errors), "errors": errors}
+
+
+def main():
+    from .database import engine
+    from .migrations import upgrade
+
+    ap = argparse.ArgumentParser(description="Bulk import applications from CSV or NDJSON")
+    ap.add_argument("path", help="input file, or - for stdin")
+    ap.add_argument("--format", choices=["csv", "ndjson"], default=None)
+    ap.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = ap.parse_args()
+
+    upgrade(engine)
+    fmt = args.format or detect_format(args.path)
+    if args.path == "-":
+        stream = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig", newline="")
+        report = import_applications(engine, stream, fmt, args.chunk_size)
+    else:
+        with open(args.path, encoding="utf-8-sig", newline="") as stream:
+            report = import_applications(engine, stream, fmt, args.chunk_size)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+import itertools
+import threading
+
+from . import models
+
+# =========================================================
+# Program catalogue version
+# =========================================================
+# Programs and their crop links are near-static, so in-process caches built from
+# them (eligibility index, ...) are keyed by this version number. Any committed
+# ORM change to Program / ProgramCrop bumps it; caches compare versions and
+# rebuild lazily on the next read.
+
+_CATALOG_MODELS = (models.Program, models.ProgramCrop)
+
+_version = 0
+_version_lock = threading.Lock()
+
+
+def version() -> int:
+    return _version
+
+
+def bump() -> int:
+    global _version
+    with _version_lock:
+        _version += 1
+        return _version
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_catalog_change(session, flush_context):
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, _CATALOG_MODELS):
+            session.info["catalog_changed"] = True
+            return
+
+
+# Bump only once the change is committed, so a cache rebuilt in between never
+# snapshots pre-commit data under the new version.
+@event.listens_for(Session, "after_commit")
+def _bump_on_commit(session):
+    if session.info.pop("catalog_changed", False):
+        bump()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop("catalog_changed", None)
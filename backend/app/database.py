@@ -1,23 +1,114 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 import os
 
 # ✅ Get the database URL from environment variables
 # If not set, default to local SQLite for development
 DB_URL = os.getenv("DATABASE_URL", "sqlite:///./kissan.db")
 
+# ✅ Storage mode: "dev" (default) leaves SQLite as-is; "production" turns on WAL
+# and the pragmas below, sizes the pools, and adds a separate read engine so long
+# admin reads never hold up farmer submissions.
+DB_MODE = os.getenv("KK_DB_MODE", "dev")
+IS_SQLITE = DB_URL.startswith("sqlite")
+PRODUCTION_SQLITE = DB_MODE == "production" and IS_SQLITE and ":memory:" not in DB_URL
+
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("KK_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_MB = int(os.getenv("KK_SQLITE_CACHE_MB", "64"))    # per connection
+SQLITE_MMAP_MB = int(os.getenv("KK_SQLITE_MMAP_MB", "256"))
+WRITE_POOL_SIZE = int(os.getenv("KK_DB_WRITE_POOL", "5"))
+READ_POOL_SIZE = int(os.getenv("KK_DB_READ_POOL", "10"))
+POOL_TIMEOUT = float(os.getenv("KK_DB_POOL_TIMEOUT", "30"))
+
 # ✅ Handle connection arguments based on database type
-if DB_URL.startswith("sqlite"):
+if IS_SQLITE:
     connect_args = {"check_same_thread": False}
+    if PRODUCTION_SQLITE:
+        # Driver-level wait on a locked database, in seconds (matches busy_timeout)
+        connect_args["timeout"] = SQLITE_BUSY_TIMEOUT_MS / 1000
 else:
     connect_args = {}
 
+
+def _pool_args(size: int) -> dict:
+    if not PRODUCTION_SQLITE:
+        return {}
+    return {"pool_size": size, "max_overflow": size, "pool_timeout": POOL_TIMEOUT}
+
+
+def _apply_sqlite_pragmas(engine, read_only: bool = False):
+    """Set per-connection pragmas each time the pool opens a connection."""
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        # WAL: readers don't block the writer and vice versa. Persistent in the
+        # file, but cheap to re-assert.
+        cur.execute("PRAGMA journal_mode=WAL")
+        # NORMAL is durable across app crashes in WAL mode; only an OS crash /
+        # power loss can drop the last transactions.
+        cur.execute("PRAGMA synchronous=NORMAL")
+        cur.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cur.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_MB * 1024}")  # negative = KiB
+        cur.execute(f"PRAGMA mmap_size={SQLITE_MMAP_MB * 1024 * 1024}")
+        cur.execute("PRAGMA temp_store=MEMORY")
+        if read_only:
+            cur.execute("PRAGMA query_only=ON")
+        cur.close()
+
+
 # ✅ Create the SQLAlchemy engine
-engine = create_engine(DB_URL, connect_args=connect_args)
+engine = create_engine(DB_URL, connect_args=connect_args, **_pool_args(WRITE_POOL_SIZE))
 
 # ✅ Create a configured "Session" class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+# ✅ Async engine for async route handlers (runs alongside the sync one)
+# Derived from DATABASE_URL by swapping in an async driver:
+#   sqlite://...      -> sqlite+aiosqlite://...
+#   postgresql://...  -> postgresql+asyncpg://...
+# Set ASYNC_DATABASE_URL to override.
+def _async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    driver = scheme.split("+", 1)[0]
+    if driver == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    if driver in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    return url
+
+
+ASYNC_DB_URL = os.getenv("ASYNC_DATABASE_URL", _async_url(DB_URL))
+
+async_engine = create_async_engine(ASYNC_DB_URL, connect_args=connect_args, **_pool_args(WRITE_POOL_SIZE))
+
+# ✅ Read engine for read-only endpoints. Production SQLite gets its own pool of
+# query_only connections; READ_DATABASE_URL can point at a replica instead.
+# Otherwise reads share the primary async engine.
+READ_DB_URL = os.getenv("READ_DATABASE_URL")
+if READ_DB_URL:
+    read_async_engine = create_async_engine(_async_url(READ_DB_URL))
+elif PRODUCTION_SQLITE:
+    read_async_engine = create_async_engine(ASYNC_DB_URL, connect_args=connect_args, **_pool_args(READ_POOL_SIZE))
+else:
+    read_async_engine = async_engine
+
+if PRODUCTION_SQLITE:
+    _apply_sqlite_pragmas(engine)
+    _apply_sqlite_pragmas(async_engine.sync_engine)
+    if read_async_engine is not async_engine and not READ_DB_URL:
+        _apply_sqlite_pragmas(read_async_engine.sync_engine, read_only=True)
+
+# expire_on_commit=False: objects stay readable after commit without an implicit
+# (and, under asyncio, illegal) lazy refresh.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+ReadAsyncSessionLocal = async_sessionmaker(
+    bind=read_async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 # ✅ Base class for all database models
 Base = declarative_base()
 
@@ -30,3 +121,21 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ✅ Dependency: async database session for `async def` routes
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# ✅ Dependency: async session on the read engine (read-only endpoints only)
+async def get_read_db():
+    async with ReadAsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_async_engines():
+    await async_engine.dispose()
+    if read_async_engine is not async_engine:
+        await read_async_engine.dispose()
@@ -1,8 +1,10 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
-from .database import get_db
+from cachetools import TTLCache
+import os
+import threading
+from .database import ReadAsyncSessionLocal
 from . import models
 
 # Must match the ones used when creating the tokens
@@ -12,26 +14,87 @@ ALGORITHM = "HS256"
 # Tell FastAPI where tokens come from
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> models.User:
-    credentials_exception = HTTPException(
+# ----------------------------------------------------------
+# ✅ Principal cache
+# ----------------------------------------------------------
+# Resolved users are cached per (user id, token iat) so an authenticated request
+# does not need a SELECT on users. Entries are dropped explicitly when a user is
+# modified (invalidate_principal) and expire after the TTL otherwise, which bounds
+# staleness for changes made by other worker processes.
+PRINCIPAL_CACHE_SIZE = int(os.getenv("KK_PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL = float(os.getenv("KK_PRINCIPAL_CACHE_TTL", "60"))
+
+_principals = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+_principals_lock = threading.Lock()
+
+
+class Principal:
+    """Read-only snapshot of an authenticated user, safe to share across requests."""
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+    @classmethod
+    def from_user(cls, user: models.User) -> "Principal":
+        return cls(**{
+            c.key: getattr(user, c.key)
+            for c in models.User.__table__.columns
+            if c.key != "password_hash"
+        })
+
+
+def invalidate_principal(user_id: int):
+    with _principals_lock:
+        for key in [k for k in _principals.keys() if k[0] == user_id]:
+            _principals.pop(key, None)
+
+
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _decode(token: str) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
-            raise credentials_exception
+            raise _credentials_exception()
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    return payload
+
 
-    user = db.query(models.User).filter(models.User.id == int(user_id)).first()
+async def _resolve(payload: dict) -> Principal:
+    key = (int(payload["sub"]), payload.get("iat", 0))
+    with _principals_lock:
+        principal = _principals.get(key)
+    if principal is not None:
+        return principal
+
+    # Short-lived session on the read engine: the connection goes back to the pool
+    # before the handler runs instead of being held for the whole request (which
+    # could deadlock a pool when the handler needs a second connection).
+    async with ReadAsyncSessionLocal() as db:
+        user = await db.get(models.User, key[0])
     if user is None:
-        raise credentials_exception
-    return user
+        raise _credentials_exception()
+    principal = Principal.from_user(user)
+    with _principals_lock:
+        _principals[key] = principal
+    return principal
+
+
+async def current_user(token: str = Depends(oauth2_scheme)) -> Principal:
+    return await _resolve(_decode(token))
 
-def require_admin(user: models.User = Depends(current_user)) -> models.User:
+async def require_admin(token: str = Depends(oauth2_scheme)) -> Principal:
+    # The role is checked on the cached user, not the token's claim, so a demoted
+    # or deleted admin is refused once their principal is invalidated or expires
+    user = await _resolve(_decode(token))
     if user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin only")
     return user
@@ -0,0 +1,136 @@
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional
+import asyncio
+import os
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import models, schemas, catalog
+
+# Max age of the index before it is rebuilt even without a local catalogue change
+# (picks up edits made by other worker processes / scripts).
+INDEX_TTL_SECONDS = float(os.getenv("KK_CATALOG_TTL", "60"))
+
+
+# =========================================================
+# Eligibility index
+# =========================================================
+# Every active program gets a bit position (ordered by id). Each filter is
+# precomputed as a Python int bitset, so a match is a handful of ANDs:
+#   - crop      -> bitset of programs linked to that crop
+#   - season    -> bitset per season, plus a wildcard bitset (season None / "Any")
+#   - land size -> programs sorted by min/max bound with cumulative bitsets, so
+#                  "min <= x" and "max >= x" are one bisect + one lookup each.
+# Semantics mirror the original match_for_me loop exactly.
+
+class EligibilityIndex:
+    def __init__(self, programs: List[models.Program], links: List[tuple], version: int):
+        programs = sorted(programs, key=lambda p: p.id)
+        self.version = version
+        self.built_at = time.monotonic()
+        self._programs = [schemas.ProgramOut.model_validate(p) for p in programs]
+        self._all = (1 << len(programs)) - 1
+
+        pos = {p.id: i for i, p in enumerate(programs)}
+
+        self._by_crop: Dict[int, int] = {}
+        for program_id, crop_id in links:
+            i = pos.get(program_id)
+            if i is not None:
+                self._by_crop[crop_id] = self._by_crop.get(crop_id, 0) | (1 << i)
+
+        self._any_season = 0
+        self._by_season: Dict[str, int] = {}
+        for i, p in enumerate(programs):
+            if not p.season or p.season == "Any":
+                self._any_season |= 1 << i
+            else:
+                self._by_season[p.season] = self._by_season.get(p.season, 0) | (1 << i)
+
+        # min_land_size: _min_prefix[k] = unbounded | first k programs by ascending min
+        unbounded_min = 0
+        mins = []
+        for i, p in enumerate(programs):
+            if p.min_land_size is None:
+                unbounded_min |= 1 << i
+            else:
+                mins.append((p.min_land_size, i))
+        mins.sort()
+        self._min_keys = [m for m, _ in mins]
+        self._min_prefix = [unbounded_min]
+        for _, i in mins:
+            self._min_prefix.append(self._min_prefix[-1] | (1 << i))
+
+        # max_land_size: _max_suffix[k] = unbounded | programs k.. by ascending max
+        unbounded_max = 0
+        maxs = []
+        for i, p in enumerate(programs):
+            if p.max_land_size is None:
+                unbounded_max |= 1 << i
+            else:
+                maxs.append((p.max_land_size, i))
+        maxs.sort()
+        self._max_keys = [m for m, _ in maxs]
+        self._max_suffix = [unbounded_max] * (len(maxs) + 1)
+        for k in range(len(maxs) - 1, -1, -1):
+            self._max_suffix[k] = self._max_suffix[k + 1] | (1 << maxs[k][1])
+
+    def __len__(self):
+        return len(self._programs)
+
+    def match_bits(self, crop_id: Optional[int] = None, land_size: Optional[float] = None,
+                   season: Optional[str] = None) -> int:
+        bits = self._all
+        if crop_id:
+            bits &= self._by_crop.get(crop_id, 0)
+        if season:
+            bits &= self._any_season | self._by_season.get(season, 0)
+        if land_size is not None:
+            bits &= self._min_prefix[bisect_right(self._min_keys, land_size)]
+            bits &= self._max_suffix[bisect_left(self._max_keys, land_size)]
+        return bits
+
+    def match(self, crop_id: Optional[int] = None, land_size: Optional[float] = None,
+              season: Optional[str] = None) -> List[schemas.ProgramOut]:
+        # bin() walks the bitset once; bit i of the int is char i of the reversed string
+        flags = bin(self.match_bits(crop_id, land_size, season))[:1:-1]
+        res = []
+        i = flags.find("1")
+        while i != -1:
+            res.append(self._programs[i])
+            i = flags.find("1", i + 1)
+        return res
+
+
+def build_index(db: Session) -> EligibilityIndex:
+    # Read the version first: a change committed while we load bumps it again,
+    # so the next request rebuilds instead of trusting a half-stale snapshot.
+    version = catalog.version()
+    programs = db.query(models.Program).filter(models.Program.is_active == True).all()
+    links = db.query(models.ProgramCrop.program_id, models.ProgramCrop.crop_id).all()
+    return EligibilityIndex(programs, links, version)
+
+
+_index: Optional[EligibilityIndex] = None
+_index_lock = asyncio.Lock()
+
+
+def _is_fresh(idx: Optional[EligibilityIndex]) -> bool:
+    return (
+        idx is not None
+        and idx.version == catalog.version()
+        and time.monotonic() - idx.built_at < INDEX_TTL_SECONDS
+    )
+
+
+async def get_index(db: AsyncSession) -> EligibilityIndex:
+    global _index
+    idx = _index
+    if _is_fresh(idx):
+        return idx
+    async with _index_lock:
+        if not _is_fresh(_index):
+            _index = await db.run_sync(build_index)
+        return _index
@@ -0,0 +1,159 @@
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Optional
+import logging
+import os
+import re
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from . import metrics
+
+# =========================================================
+# Request / SQL instrumentation
+# =========================================================
+# A pure ASGI middleware times every request and labels it with the matched
+# route template (/applications/admin/{app_id}/details, not the raw path, so
+# label cardinality stays bounded). SQLAlchemy cursor events count statements
+# and DB time into a per-request object held in a ContextVar; that works for the
+# async engine (events run in the request's task) and for sync handlers
+# (Starlette's threadpool copies the context). Statements slower than
+# KK_SLOW_QUERY_MS are logged with their route; bound parameters are never
+# logged since they carry Aadhaar numbers and phone numbers.
+
+ENABLED = os.getenv("KK_METRICS", "1") != "0"
+SLOW_QUERY_MS = float(os.getenv("KK_SLOW_QUERY_MS", "200"))  # <= 0 disables the log
+SLOW_QUERY_MAX_CHARS = 1000
+
+slow_log = logging.getLogger("kissan.slow_query")
+
+HTTP_LATENCY = metrics.Histogram(
+    "kk_http_request_seconds", "Request latency by route", ("method", "route"),
+)
+HTTP_REQUESTS = metrics.Counter(
+    "kk_http_requests_total", "Requests by route and status", ("method", "route", "status"),
+)
+REQUEST_STATEMENTS = metrics.Histogram(
+    "kk_request_db_statements", "SQL statements issued per request", ("method", "route"),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100, 250),
+)
+REQUEST_DB_SECONDS = metrics.Histogram(
+    "kk_request_db_seconds", "Time spent in the database per request", ("method", "route"),
+)
+DB_STATEMENTS = metrics.Counter("kk_db_statements_total", "SQL statements executed", ("route",))
+DB_SECONDS = metrics.Counter("kk_db_seconds_total", "Seconds spent executing SQL", ("route",))
+SLOW_QUERIES = metrics.Counter("kk_db_slow_queries_total", "Statements over KK_SLOW_QUERY_MS", ("route",))
+
+# Label used for SQL issued outside a request (startup, CLI, background work)
+NO_ROUTE = "-"
+UNMATCHED = "unmatched"
+
+
+class RequestStats:
+    __slots__ = ("scope", "statements", "db_seconds")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.statements = 0
+        self.db_seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        # Starlette's router writes the matched route into the shared scope dict,
+        # so this is accurate for any SQL issued by the handler or its deps.
+        return _route_of(self.scope)
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("kk_request_stats", default=None)
+
+
+def _route_of(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = _current.set(stats)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = perf_counter() - started
+            _current.reset(token)
+            route = stats.route
+            method = scope["method"]
+            HTTP_LATENCY.observe(elapsed, method=method, route=route)
+            HTTP_REQUESTS.inc(method=method, route=route, status=status)
+            REQUEST_STATEMENTS.observe(stats.statements, method=method, route=route)
+            REQUEST_DB_SECONDS.observe(stats.db_seconds, method=method, route=route)
+
+
+# ---------------------------------------------------------
+# SQLAlchemy hooks
+# ---------------------------------------------------------
+_WS = re.compile(r"\s+")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("kk_query_start", []).append(perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("kk_query_start")
+    if not starts:
+        return
+    elapsed = perf_counter() - starts.pop()
+    if not ENABLED:
+        return
+
+    stats = _current.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+        route = stats.route
+    else:
+        route = NO_ROUTE
+    DB_STATEMENTS.inc(route=route)
+    DB_SECONDS.inc(elapsed, route=route)
+
+    if SLOW_QUERY_MS > 0 and elapsed * 1000 >= SLOW_QUERY_MS:
+        SLOW_QUERIES.inc(route=route)
+        sql = _WS.sub(" ", statement).strip()[:SLOW_QUERY_MAX_CHARS]
+        slow_log.warning(
+            "slow query %.1f ms route=%s %s%s", elapsed * 1000, route, sql,
+            " (executemany)" if executemany else "",
+        )
+
+
+def _handle_error(context):
+    # Failed statements never reach after_cursor_execute; drop their start time
+    starts = context.connection.info.get("kk_query_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine: Engine):
+    if getattr(engine, "_kk_instrumented", False):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    engine._kk_instrumented = True
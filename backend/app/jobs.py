@@ -0,0 +1,372 @@
+"""Persistent job queue for work that does not need to happen inside a request.
+
+Requests enqueue() a job in the same transaction as the change it follows up
+(so a job exists exactly when the change was committed); workers pick jobs up
+afterwards:
+
+    application.submitted        link the farmer's ID document, notify
+    application.status_changed   notify the farmer of the new status
+    notification.deliver         hand a notification to SMS / email (app.notify)
+    applications.rescore         recompute review scores after inputs changed
+    documents.preview            render a document's thumbnail / first-page preview
+
+A worker claims a batch with one UPDATE ... RETURNING (status running, lease
+held by the worker), runs the handlers and deletes the jobs in one transaction,
+so a handler's database effects happen once even if the worker dies halfway
+(its lease expires and the job is retried). When a handler fails, the batch is
+re-run one job per transaction to isolate it. Failures are retried with exponential backoff up to MAX_ATTEMPTS, then the job is left
+as 'failed' with its last error. Outbound sends are at-least-once.
+
+The API runs one worker in-process unless KK_JOB_INPROCESS=0; production runs
+dedicated worker processes instead:
+
+    python -m app.jobs --workers 4
+"""
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Set
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import threading
+
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import models, notify, previews, scoring, storage
+
+INPROCESS = os.getenv("KK_JOB_INPROCESS", "1") == "1"
+POLL_SECONDS = float(os.getenv("KK_JOB_POLL_SECONDS", "0.5"))
+BATCH_SIZE = int(os.getenv("KK_JOB_BATCH", "20"))
+MAX_ATTEMPTS = int(os.getenv("KK_JOB_MAX_ATTEMPTS", "5"))
+RETRY_BASE_SECONDS = float(os.getenv("KK_JOB_RETRY_BASE_SECONDS", "5"))
+LEASE_SECONDS = float(os.getenv("KK_JOB_LEASE_SECONDS", "300"))
+
+log = logging.getLogger("kissan.jobs")
+
+Job = models.Job
+
+HANDLERS: Dict[str, Callable] = {}
+# Kinds whose handler does slow work and no database writes (rendering). They run
+# outside any transaction, after the batch has committed, and take no session,
+# so they never hold SQLite's write lock.
+UNTRANSACTED: Set[str] = set()
+
+
+def handler(kind: str, transaction: bool = True):
+    def register(fn):
+        HANDLERS[kind] = fn
+        if not transaction:
+            UNTRANSACTED.add(kind)
+        return fn
+    return register
+
+
+# ---------------------------------------------------------
+# Enqueueing (caller commits)
+# ---------------------------------------------------------
+def _row(kind: str, payload: dict) -> dict:
+    return {"kind": kind, "payload": json.dumps(payload), "run_after": datetime.utcnow()}
+
+
+async def enqueue(db: AsyncSession, kind: str, **payload):
+    await enqueue_many(db, kind, [payload])
+
+
+async def enqueue_many(db: AsyncSession, kind: str, payloads: Iterable[dict]):
+    rows = [_row(kind, p) for p in payloads]
+    if rows:
+        await db.execute(insert(Job), rows)
+
+
+def enqueue_sync(session: Session, kind: str, **payload):
+    session.execute(insert(Job), [_row(kind, payload)])
+
+
+# ---------------------------------------------------------
+# Handlers: fn(session, **payload); the job runner commits
+# ---------------------------------------------------------
+STATUS_MESSAGES = {
+    "pending": ("Application back in the queue", "Your application for {program} is pending review again."),
+    "under_review": ("Application under review", "An officer has started reviewing your application for {program}."),
+    "approved": ("Application approved", "Your application for {program} has been approved."),
+    "rejected": ("Application rejected", "Your application for {program} was not approved."),
+}
+
+
+def _notify(session: Session, app: models.Application, type_: str, title: str, body: str):
+    n = models.Notification(user_id=app.user_id, application_id=app.id, type=type_, title=title, body=body)
+    session.add(n)
+    session.flush()
+    enqueue_sync(session, "notification.deliver", notification_id=n.id)
+
+
+def _program_title(session: Session, program_id: int) -> str:
+    program = session.get(models.Program, program_id)
+    return program.title if program else f"program #{program_id}"
+
+
+@handler("application.submitted")
+def _application_submitted(session: Session, application_id: int):
+    app = session.get(models.Application, application_id)
+    if app is None:
+        return
+    user = session.get(models.User, app.user_id)
+
+    # Link the user's uploaded ID document (if they have one); only a stored
+    # blob, never some other file a doc_path might name
+    sha256 = storage.store.sha256_of(getattr(user, "doc_path", None))
+    if sha256:
+        existing_doc = session.execute(select(models.Document.id).where(
+            models.Document.user_id == user.id,
+            models.Document.application_id == app.id
+        ).limit(1)).first()
+        if not existing_doc:
+            session.add(models.Document(kind="Govt ID", file_path=user.doc_path, sha256=sha256,
+                                        content_type=previews.sniff_type(sha256),
+                                        user_id=user.id, application_id=app.id))
+            enqueue_sync(session, "documents.preview", sha256=sha256)
+
+    _notify(session, app, "application_submitted", "Application submitted",
+            f"Your application for {_program_title(session, app.program_id)} was received and is pending review.")
+    scoring.rescore(session.connection(), scoring.for_ids([app.id]))
+
+
+@handler("application.status_changed")
+def _application_status_changed(session: Session, application_id: int, status: str, remarks: str = None):
+    app = session.get(models.Application, application_id)
+    if app is None or status not in STATUS_MESSAGES:
+        return
+    title, body = STATUS_MESSAGES[status]
+    body = body.format(program=_program_title(session, app.program_id))
+    if remarks:
+        body += f" Remarks: {remarks}"
+    _notify(session, app, "status_changed", title, body)
+
+
+@handler("applications.rescore")
+def _applications_rescore(session: Session, application_ids=None, user_id: int = None):
+    if application_ids:
+        scoring.rescore(session.connection(), scoring.for_ids(application_ids))
+    if user_id is not None:
+        scoring.rescore(session.connection(), scoring.for_user(user_id))
+
+
+@handler("documents.preview", transaction=False)
+def _documents_preview(sha256: str):
+    previews.generate_sync(sha256)  # blocks this worker thread, not the API
+
+
+@handler("notification.deliver")
+def _notification_deliver(session: Session, notification_id: int):
+    n = session.get(models.Notification, notification_id)
+    if n is None or n.sent_at is not None:
+        return
+    user = session.get(models.User, n.user_id)
+    if user is not None:
+        if user.phone:
+            notify.send_sms(user.phone, f"{n.title}: {n.body}")
+        if user.email:
+            notify.send_email(user.email, n.title, n.body)
+    n.sent_at = datetime.utcnow()
+
+
+# ---------------------------------------------------------
+# Running jobs
+# ---------------------------------------------------------
+def claim(engine: Engine, worker: str, limit: int = BATCH_SIZE):
+    """Lease up to `limit` due jobs to this worker. One statement, so two workers
+    never get the same job."""
+    now = datetime.utcnow()
+    due = (
+        select(Job.id).where(Job.status == "queued", Job.run_after <= now)
+        .order_by(Job.run_after, Job.id).limit(limit)
+        .with_for_update(skip_locked=True)  # PostgreSQL; SQLite serialises writers anyway
+    )
+    with engine.begin() as conn:
+        return conn.execute(
+            update(Job).where(Job.id.in_(due.scalar_subquery()), Job.status == "queued")
+            .values(status="running", locked_by=worker, locked_at=now, attempts=Job.attempts + 1)
+            .returning(Job.id, Job.kind, Job.payload, Job.attempts)
+        ).all()
+
+
+def _fail(engine: Engine, worker: str, job, error: str):
+    if job.attempts >= MAX_ATTEMPTS:
+        values = {"status": "failed"}
+        log.error("job %s (%s) failed permanently: %s", job.id, job.kind, error)
+    else:
+        delay = RETRY_BASE_SECONDS * 2 ** (job.attempts - 1) * random.uniform(0.8, 1.2)
+        values = {"status": "queued", "run_after": datetime.utcnow() + timedelta(seconds=delay)}
+        log.warning("job %s (%s) attempt %s failed, retrying in %.0fs: %s",
+                    job.id, job.kind, job.attempts, delay, error)
+    with engine.begin() as conn:
+        conn.execute(update(Job).where(Job.id == job.id, Job.locked_by == worker)
+                     .values(locked_by=None, locked_at=None, last_error=error[:2000], **values))
+
+
+def _handler(job) -> Callable:
+    fn = HANDLERS.get(job.kind)
+    if fn is None:
+        raise LookupError(f"no handler for job kind {job.kind!r}")
+    return fn
+
+
+def _complete(session: Session, worker: str, batch) -> bool:
+    """Delete the finished jobs in the handlers' transaction and commit. If a
+    lease was lost meanwhile (another worker owns the job now), nothing commits."""
+    ids = [job.id for job in batch]
+    if session.execute(delete(Job).where(Job.id.in_(ids), Job.locked_by == worker)).rowcount == len(ids):
+        session.commit()
+        return True
+    session.rollback()
+    log.warning("jobs %s: lease lost, discarding this run", ids)
+    return False
+
+
+def run_job(engine: Engine, worker: str, job) -> bool:
+    if job.kind in UNTRANSACTED:
+        try:
+            _handler(job)(**json.loads(job.payload))
+        except Exception as e:
+            _fail(engine, worker, job, f"{type(e).__name__}: {e}")
+            return False
+        with Session(engine) as session:
+            return _complete(session, worker, [job])
+
+    with Session(engine) as session:
+        try:
+            _handler(job)(session, **json.loads(job.payload))
+        except Exception as e:
+            session.rollback()
+            _fail(engine, worker, job, f"{type(e).__name__}: {e}")
+            return False
+        return _complete(session, worker, [job])
+
+
+def run_batch(engine: Engine, worker: str, batch) -> None:
+    """Run a claimed batch in one transaction (one commit instead of one per job).
+    If any handler fails the batch is rolled back and its jobs re-run one
+    transaction each, so only the failing job is retried. UNTRANSACTED jobs
+    run one by one once that transaction is over."""
+    outside = [job for job in batch if job.kind in UNTRANSACTED]
+    batch = [job for job in batch if job.kind not in UNTRANSACTED]
+    if batch:
+        with Session(engine) as session:
+            try:
+                for job in batch:
+                    _handler(job)(session, **json.loads(job.payload))
+            except Exception:
+                session.rollback()
+                for job in batch:
+                    run_job(engine, worker, job)
+            else:
+                _complete(session, worker, batch)
+    for job in outside:
+        run_job(engine, worker, job)
+
+
+def requeue_stale(engine: Engine) -> int:
+    """Give back jobs whose worker died (lease older than LEASE_SECONDS)."""
+    cutoff = datetime.utcnow() - timedelta(seconds=LEASE_SECONDS)
+    with engine.begin() as conn:
+        return conn.execute(
+            update(Job).where(Job.status == "running", or_(Job.locked_at == None, Job.locked_at < cutoff))
+            .values(status="queued", locked_by=None, locked_at=None)
+        ).rowcount
+
+
+def run_pending(engine: Engine, worker: str, limit: int = BATCH_SIZE) -> int:
+    """Claim and run one batch. Returns the number of jobs claimed."""
+    batch = claim(engine, worker, limit)
+    if batch:
+        run_batch(engine, worker, batch)
+    return len(batch)
+
+
+def worker_name(index: int = 0) -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+async def worker_loop(engine: Engine):
+    """In-process worker for the API (one per API process)."""
+    from fastapi.concurrency import run_in_threadpool
+
+    worker = worker_name()
+    while True:
+        try:
+            if await run_in_threadpool(run_pending, engine, worker) == 0:
+                await run_in_threadpool(requeue_stale, engine)
+                await asyncio.sleep(POLL_SECONDS)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            log.exception("job worker error")
+            await asyncio.sleep(POLL_SECONDS)
+
+
+def work(index: int, stop: threading.Event = None, exit_when_idle: bool = False):
+    """Worker process body: poll until SIGTERM / SIGINT (or until the queue is
+    empty with exit_when_idle)."""
+    from .database import engine
+
+    _setup_logging()
+    stop = stop or threading.Event()
+    if threading.current_thread() is threading.main_thread():
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda *_: stop.set())
+
+    worker = worker_name(index)
+    log.info("job worker %s started", worker)
+    while not stop.is_set():
+        try:
+            if run_pending(engine, worker) == 0:
+                requeue_stale(engine)
+                if exit_when_idle:
+                    break
+                stop.wait(POLL_SECONDS)
+        except Exception:
+            log.exception("job worker error")
+            stop.wait(POLL_SECONDS)
+    engine.dispose()
+
+
+def _setup_logging():
+    # Also needed in spawned worker processes (no-op if logging is configured)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run background job workers")
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--drain", action="store_true", help="exit once the queue is empty")
+    args = ap.parse_args()
+    _setup_logging()
+
+    if args.workers <= 1:
+        work(0, exit_when_idle=args.drain)
+        return
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=work, args=(i, None, args.drain), daemon=False)
+             for i in range(args.workers)]
+    for p in procs:
+        p.start()
+    # Ctrl-C reaches the whole process group; pass a SIGTERM on to the workers
+    signal.signal(signal.SIGTERM, lambda *_: [p.terminate() for p in procs])
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,55 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-import os
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy import inspect
+from contextlib import asynccontextmanager
+import asyncio
+import math
 
-from .database import Base, engine
-from .routers import auth, programs, applications
-from .seed import seed
-from .routers import auth, programs, applications, upload, users
+from .database import Base, engine, async_engine, read_async_engine, dispose_async_engines
+from . import instrumentation, jobs, metrics, models, previews, ratelimit, scoring, security, tokens
+from .routers import auth, programs, applications, documents, notifications, search, upload, users
 
-# Run seed to create tables and demo data if not already present
-seed()
 
-app = FastAPI(title="Kissan Konnect API", version="1.0.0")
+def _check_schema():
+    # Read-only: schema and seed data come from `python -m app.bootstrap`
+    if not inspect(engine).has_table(models.User.__tablename__):
+        raise RuntimeError("Database is not initialised; run `python -m app.bootstrap` first")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # No DB writes here: every worker runs this, concurrently
+    await run_in_threadpool(_check_schema)
+    # Expired refresh/reset token sweep (first run one interval after startup)
+    compactor = None
+    if tokens.COMPACT_INTERVAL_SECONDS > 0:
+        compactor = asyncio.create_task(tokens.compaction_loop(engine))
+    # Job queue worker (production runs `python -m app.jobs` instead)
+    job_worker = None
+    if jobs.INPROCESS:
+        job_worker = asyncio.create_task(jobs.worker_loop(engine))
+    # Periodic full rescore, ages the "days waiting" part of review scores
+    rescorer = None
+    if scoring.RESCORE_INTERVAL_SECONDS > 0:
+        rescorer = asyncio.create_task(scoring.rescore_loop(engine))
+    yield
+    for task in (compactor, job_worker, rescorer):
+        if task is not None:
+            task.cancel()
+    # Close pooled async connections (aiosqlite keeps a thread per connection)
+    await dispose_async_engines()
+    security.shutdown_hasher()
+    previews.shutdown()
+
+
+app = FastAPI(title="Kissan Konnect API", version="1.0.0", lifespan=lifespan)
+
+# Per-route latency + SQL statement counts / DB time, exported on /metrics
+instrumentation.instrument_engine(engine)
+instrumentation.instrument_engine(async_engine.sync_engine)
+instrumentation.instrument_engine(read_async_engine.sync_engine)
 
 # Allow frontend (default: localhost:5173) to talk to backend
 origins = [
@@ -24,17 +63,42 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # pagination (keyset cursor / search offset), document downloads
+    expose_headers=["X-Next-Cursor", "X-Next-Offset", "Content-Disposition", "Content-Range", "ETag"],
 )
+app.add_middleware(instrumentation.MetricsMiddleware)
 
 # Routers
 app.include_router(auth.router)
 app.include_router(programs.router)
 app.include_router(applications.router)
 app.include_router(upload.router)
+app.include_router(documents.router)
 app.include_router(users.router)
+app.include_router(search.router)
+app.include_router(notifications.router)
+
+
+# Password hashing pool saturated -> shed load instead of queueing forever
+@app.exception_handler(security.HasherBusy)
+async def hasher_busy_handler(request: Request, exc: security.HasherBusy):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
+# Auth endpoints over their rate / concurrency limits (app/ratelimit.py)
+@app.exception_handler(ratelimit.RateLimited)
+async def rate_limited_handler(request: Request, exc: ratelimit.RateLimited):
+    return JSONResponse(status_code=429, content={"detail": str(exc)},
+                        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))})
 
 
 # Health check endpoint
 @app.get("/health")
 def health():
     return {"ok": True}
+
+
+# Prometheus metrics
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+from sqlalchemy import DateTime, inspect, insert, text
+from .database import Base
+from . import models  # noqa: F401  (registers every table on Base.metadata)
+from . import aggregates, search, security
+
+
+# ✅ Lightweight, idempotent schema upgrade.
+# create_all() only creates *missing tables*; it never touches tables that already
+# exist. This brings an existing database up to date with models.py by adding any
+# missing (nullable) columns and any indexes declared on the models.
+def upgrade(engine):
+    _rebuild_token_tables(engine)
+    new_stats_table = not inspect(engine).has_table(models.ApplicationStat.__tablename__)
+    Base.metadata.create_all(bind=engine)
+
+    insp = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing_cols = {c["name"] for c in insp.get_columns(table.name)}
+            for col in table.columns:
+                if col.name in existing_cols:
+                    continue
+                col_type = col.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{col.name}" {col_type}'))
+
+        for table in Base.metadata.sorted_tables:
+            for idx in table.indexes:
+                idx.create(bind=conn, checkfirst=True)
+
+        # Refresh planner statistics for new/changed indexes (cheap: SQLite only
+        # re-analyzes tables whose stats are missing or stale)
+        if engine.dialect.name == "sqlite":
+            conn.execute(text("PRAGMA optimize"))
+
+    # Dashboard aggregates start out in step with existing applications
+    if new_stats_table:
+        aggregates.rebuild(engine)
+
+    # Admin search index (SQLite FTS5 tables + sync triggers)
+    search.install(engine)
+
+
+# Token tables used to store the raw token string (unique, unbounded) with
+# revoked/used flags. They are rebuilt in the hashed layout; still-live tokens are
+# carried over (hashed, with an expires_at derived from created_at), the rest
+# is dropped.
+def _rebuild_token_tables(engine):
+    insp = inspect(engine)
+    legacy = (
+        (models.RefreshToken, "revoked", timedelta(days=security.REFRESH_TOKEN_EXPIRE_DAYS)),
+        (models.PasswordResetToken, "used", timedelta(minutes=security.RESET_TOKEN_EXPIRE_MINUTES)),
+    )
+    with engine.begin() as conn:
+        for model, flag, ttl in legacy:
+            name = model.__tablename__
+            if not insp.has_table(name) or "token" not in {c["name"] for c in insp.get_columns(name)}:
+                continue
+            rows = conn.execute(
+                text(f"SELECT user_id, token, created_at FROM {name} "
+                     f"WHERE COALESCE({flag}, 0) = 0 AND created_at > :cutoff")
+                .columns(created_at=DateTime),
+                {"cutoff": datetime.utcnow() - ttl},
+            ).all()
+            conn.execute(text(f"DROP TABLE {name}"))
+            model.__table__.create(conn)
+            if rows:
+                conn.execute(insert(model.__table__), [
+                    {"user_id": user_id, "token_hash": security.hash_token(token),
+                     "created_at": created_at, "expires_at": created_at + ttl}
+                    for user_id, token, created_at in rows
+                ])
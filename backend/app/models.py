@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -98,6 +98,38 @@ class Application(Base):
     user = relationship("User", back_populates="applications")
     documents = relationship("Document", back_populates="application", cascade="all, delete")  # ✅ added
 
+    # ✅ Keyset pagination indexes: newest-first by (submitted_at, id)
+    __table_args__ = (
+        Index("ix_applications_submitted_id", "submitted_at", "id"),
+        Index("ix_applications_status_submitted_id", "status", "submitted_at", "id"),
+        Index("ix_applications_program_submitted_id", "program_id", "submitted_at", "id"),
+        Index("ix_applications_user_submitted_id", "user_id", "submitted_at", "id"),
+        # Duplicate-in-progress check: user_id = ? AND program_id = ? AND status IN (...)
+        Index("ix_applications_user_program_status", "user_id", "program_id", "status"),
+        # Bulk status by filter: status = ? ORDER BY id
+        Index("ix_applications_status_id", "status", "id"),
+        # Review by score: ORDER BY score DESC, id DESC (keyset)
+        Index("ix_applications_score_id", "score", "id"),
+    )
+
+
+# =========================================================
+# APPLICATION STATS (dashboard aggregates)
+# =========================================================
+# One row per status x program x season x farmer state/district, kept in step
+# with applications by app.aggregates inside the same transactions that change
+# them. Missing state/district are stored as "" so they can be part of the key.
+class ApplicationStat(Base):
+    __tablename__ = "application_stats"
+
+    status = Column(String, primary_key=True)
+    program_id = Column(Integer, primary_key=True)
+    season = Column(String, primary_key=True)
+    state = Column(String, primary_key=True, default="")
+    district = Column(String, primary_key=True, default="")
+    count = Column(Integer, nullable=False, default=0)
+    acreage = Column(Float, nullable=False, default=0.0)
+
 
 # =========================================================
 # APPLICATION STATUS HISTORY
@@ -123,6 +155,10 @@ class Document(Base):
     kind = Column(String, nullable=False)  # ID_PROOF | LAND_DOC | BANK | OTHER
     file_path = Column(String, nullable=False)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
+    size_bytes = Column(Integer, nullable=True)
+    sha256 = Column(String(64), nullable=True)  # content address in app.storage (blobs are shared)
+    original_name = Column(String, nullable=True)  # client's filename (the stored blob has none)
+    content_type = Column(String, nullable=True)
 
     # ✅ NEW FIELDS
     user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=True)
@@ -132,18 +168,29 @@ class Document(Base):
     user = relationship("User", back_populates="documents")
     application = relationship("Application", back_populates="documents")
 
+    # The admin details "application_id = ? OR user_id = ?" lookup is served by the
+    # two single-column indexes above (multi-index OR); this one covers the
+    # create_application "already linked?" check on both columns.
+    __table_args__ = (
+        Index("ix_documents_user_application", "user_id", "application_id"),
+        Index("ix_documents_sha256", "sha256"),  # blob reference counts (app.storage)
+    )
+
 
 # =========================================================
 # TOKENS
 # =========================================================
+# Only a SHA-256 of each token is stored (fixed 64 chars, useless if leaked).
+# Rotated, revoked and used tokens are deleted outright; expired ones are swept
+# in batches by app.tokens.compact_expired_tokens.
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
-    token = Column(String, unique=True, nullable=False)
+    token_hash = Column(String(64), unique=True, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
-    revoked = Column(Boolean, default=False)
+    expires_at = Column(DateTime, index=True, nullable=False)
 
 
 class PasswordResetToken(Base):
@@ -151,6 +198,55 @@ class PasswordResetToken(Base):
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
-    token = Column(String, unique=True, nullable=False)
+    token_hash = Column(String(64), unique=True, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, index=True, nullable=False)
+
+
+# =========================================================
+# NOTIFICATIONS
+# =========================================================
+class Notification(Base):
+    __tablename__ = "notifications"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    application_id = Column(Integer, ForeignKey("applications.id"), nullable=True)
+    type = Column(String, nullable=False)  # application_submitted | status_changed
+    title = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    read_at = Column(DateTime, nullable=True)
+    sent_at = Column(DateTime, nullable=True)  # handed to the SMS / email stub
+
+    # Farmer feed: user_id = ? ORDER BY id DESC (keyset pages)
+    __table_args__ = (
+        Index("ix_notifications_user_id_id", "user_id", "id"),
+    )
+
+
+# =========================================================
+# JOB QUEUE
+# =========================================================
+# Post-request work (see app/jobs.py). A job is claimed by a worker (status
+# running + lease), deleted in the same transaction as its effects when it
+# succeeds, retried with backoff when it fails, and left as 'failed' after
+# max_attempts for inspection.
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    payload = Column(Text, nullable=False, default="{}")  # JSON
+    status = Column(String, nullable=False, default="queued")  # queued | running | failed
+    attempts = Column(Integer, nullable=False, default=0)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = Column(String, nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
-    used = Column(Boolean, default=False)
+
+    __table_args__ = (
+        # Claim: status = 'queued' AND run_after <= now ORDER BY run_after, id
+        Index("ix_jobs_status_run_after_id", "status", "run_after", "id"),
+    )
@@ -0,0 +1,27 @@
+"""Outbound farmer messages (SMS / email).
+
+There is no gateway yet: the "log" backend just writes each message to the
+kissan.notify logger. A real provider plugs in as another backend here; it is
+only ever called from the job queue ("notification.deliver" jobs), so slow or
+failing sends are retried there and never hold up a request.
+"""
+import logging
+import os
+
+BACKEND = os.getenv("KK_NOTIFY_BACKEND", "log")
+
+log = logging.getLogger("kissan.notify")
+
+
+def send_sms(phone: str, text: str):
+    if BACKEND == "log":
+        log.info("SMS to %s: %s", phone, text)
+    else:
+        raise RuntimeError(f"Unknown KK_NOTIFY_BACKEND: {BACKEND}")
+
+
+def send_email(address: str, subject: str, text: str):
+    if BACKEND == "log":
+        log.info("Email to %s: %s -- %s", address, subject, text)
+    else:
+        raise RuntimeError(f"Unknown KK_NOTIFY_BACKEND: {BACKEND}")
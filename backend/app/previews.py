@@ -0,0 +1,307 @@
+"""Thumbnails and first-page previews of uploaded documents.
+
+Images and PDFs get two JPEG renditions, cached next to the blob they were made
+from (so identical uploads share them):
+
+    uploads/ab/cd/<sha256>.thumb256.jpg    KK_PREVIEW_THUMB_PX on the long side
+    uploads/ab/cd/<sha256>.page1280.jpg    KK_PREVIEW_PAGE_PX; a PDF's first page
+
+The documents.preview job makes them after each upload; otherwise they are made
+on first request (GET /documents/{id}/preview), so a wiped cache or a new size
+setting regenerates lazily. Decoding and resizing run in a process pool of
+KK_PREVIEW_WORKERS (0 = a thread, dev/tests) at lower CPU priority. A process
+has at most KK_PREVIEW_MAX_PENDING renders queued or running, from requests and
+jobs alike, and turns further ones away (PreviewBusy) instead of waiting. The
+type is sniffed from the file itself, not the client's content type. Files that
+do not decode as an image or PDF get a .nopreview marker and are not tried
+again; other failures (I/O errors, a worker killed mid-render) are retried.
+"""
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+from . import metrics
+from .storage import store
+
+PREVIEW_WORKERS = int(os.getenv("KK_PREVIEW_WORKERS", str(min(2, os.cpu_count() or 1))))
+MAX_PENDING = int(os.getenv("KK_PREVIEW_MAX_PENDING", "16"))
+TIMEOUT_SECONDS = float(os.getenv("KK_PREVIEW_TIMEOUT", "30"))
+NICE = int(os.getenv("KK_PREVIEW_NICE", "10"))
+QUALITY = int(os.getenv("KK_PREVIEW_QUALITY", "80"))
+SIZES = {
+    "thumb": int(os.getenv("KK_PREVIEW_THUMB_PX", "256")),
+    "page": int(os.getenv("KK_PREVIEW_PAGE_PX", "1280")),
+}
+
+# Declared types worth offering a preview URL for (the render sniffs anyway)
+PREVIEW_TYPES = {"application/pdf", "image/jpeg", "image/png", "image/gif", "image/webp",
+                 "image/bmp", "image/tiff"}
+
+log = logging.getLogger("kissan.previews")
+
+preview_renders = metrics.Counter(
+    "kk_preview_renders_total", "Document preview renders by outcome", labels=("result",)
+)
+preview_seconds = metrics.Histogram(
+    "kk_preview_render_seconds", "Preview render latency including queueing",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0),
+)
+
+
+class PreviewBusy(Exception):
+    pass
+
+
+def path(sha256: str, size: str) -> str:
+    return store.sidecar(sha256, f"{size}{SIZES[size]}.jpg")
+
+
+def _marker(sha256: str) -> str:
+    return store.sidecar(sha256, "nopreview")
+
+
+def _missing(sha256: str) -> List[Tuple[str, int]]:
+    return [(path(sha256, size), px) for size, px in SIZES.items() if not os.path.exists(path(sha256, size))]
+
+
+# Leading bytes of the formats in PREVIEW_TYPES
+_MAGIC = (
+    (b"%PDF-", "application/pdf"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF8", "image/gif"),
+    (b"BM", "image/bmp"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+)
+
+
+def sniff_type(sha256: str) -> Optional[str]:
+    """Media type of a blob from its first bytes, for documents created without
+    a declared one (a user's registration ID scan); None if not previewable."""
+    try:
+        with open(store.local_path(sha256), "rb") as f:
+            head = f.read(12)
+    except OSError:
+        return None
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return next((media_type for magic, media_type in _MAGIC if head.startswith(magic)), None)
+
+
+def urls(doc) -> dict:
+    """thumbnail_url / preview_url for a Document, None when it has no preview."""
+    media_type = doc.content_type or ""
+    if not doc.sha256 or media_type not in PREVIEW_TYPES:
+        return {"thumbnail_url": None, "preview_url": None}
+    return {"thumbnail_url": f"/documents/{doc.id}/preview?size=thumb",
+            "preview_url": f"/documents/{doc.id}/preview?size=page"}
+
+
+# ---------------------------------------------------------
+# Rendering (runs in the pool)
+# ---------------------------------------------------------
+def _undecodable(e: BaseException) -> bool:
+    """A decoder rejecting the file's contents, as opposed to an error reading
+    it (a system OSError carries an errno; Pillow's corrupt-data ones do not)."""
+    return not isinstance(e, OSError) or e.errno is None
+
+
+def _decode(src: str, is_pdf: bool, largest: int):
+    from PIL import Image, ImageOps
+
+    if is_pdf:
+        import pypdfium2 as pdfium
+
+        pdf = pdfium.PdfDocument(src)
+        try:
+            page = pdf[0]
+            width, height = page.get_size()
+            img = page.render(scale=largest / max(width, height, 1)).to_pil()
+        finally:
+            pdf.close()
+    else:
+        img = Image.open(src)
+        img.draft("RGB", (largest, largest))  # JPEG decodes straight at 1/2..1/8 scale
+        img = ImageOps.exif_transpose(img)
+
+    if img.mode in ("RGBA", "LA", "P"):
+        rgba = img.convert("RGBA")
+        img = Image.new("RGB", rgba.size, "white")
+        img.paste(rgba, mask=rgba.getchannel("A"))
+        return img
+    return img.convert("RGB")
+
+
+def render(src: str, outputs: List[Tuple[str, int]], quality: int = QUALITY) -> bool:
+    """Write every (dest, px) rendition of src; False if it is neither an image
+    nor a PDF that decodes. Anything else (I/O errors) is raised."""
+    from PIL import Image
+
+    largest = max(px for _, px in outputs)
+    with open(src, "rb") as f:
+        is_pdf = f.read(5) == b"%PDF-"
+    try:
+        img = _decode(src, is_pdf, largest)
+    except (OSError, ValueError, SyntaxError, RuntimeError, Image.DecompressionBombError) as e:
+        if not _undecodable(e):
+            raise
+        return False
+
+    for dest, px in sorted(outputs, key=lambda o: -o[1]):
+        img.thumbnail((px, px), Image.LANCZOS)  # in place: each size from the one above
+        tmp = f"{dest}.{os.getpid()}.tmp"
+        img.save(tmp, "JPEG", quality=quality, optimize=True)
+        os.replace(tmp, dest)
+    return True
+
+
+# ---------------------------------------------------------
+# Pool
+# ---------------------------------------------------------
+_pool: Optional[Executor] = None
+_pending = 0
+_pending_lock = threading.Lock()  # job worker threads and the event loop both render
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+def _lower_priority(increment: int):
+    if increment and hasattr(os, "nice"):
+        os.nice(increment)
+
+
+def _get_pool() -> Executor:
+    global _pool
+    if _pool is None:
+        if PREVIEW_WORKERS > 0:
+            _pool = ProcessPoolExecutor(
+                max_workers=PREVIEW_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_lower_priority, initargs=(NICE,),
+            )
+        else:
+            _pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preview")
+    return _pool
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _submit(sha256: str, outputs: List[Tuple[str, int]]) -> Future:
+    """Queue a render under the MAX_PENDING bound. The slot is held until the
+    render ends, not until the caller stops waiting, so timed-out renders
+    still count against the bound."""
+    global _pending
+    with _pending_lock:
+        if _pending >= MAX_PENDING:
+            preview_renders.inc(result="busy")
+            raise PreviewBusy("Preview queue is full")
+        _pending += 1
+    try:
+        future = _get_pool().submit(render, store.local_path(sha256), outputs)
+    except BaseException:
+        _free_slot()
+        raise
+    future.add_done_callback(_free_slot)
+    return future
+
+
+def _free_slot(_future=None):
+    global _pending
+    with _pending_lock:
+        _pending -= 1
+
+
+def _record(sha256: str, rendered: bool):
+    """Bookkeeping after a render; a file that does not decode is marked."""
+    if rendered:
+        preview_renders.inc(result="ok")
+        return
+    preview_renders.inc(result="failed")
+    log.info("No preview for %s: not a decodable image or PDF", sha256)
+    with open(_marker(sha256), "w"):
+        pass
+
+
+def generate_sync(sha256: str) -> bool:
+    """Make any missing renditions of a blob, blocking; for the job worker.
+    PreviewBusy fails the job, which is then retried later."""
+    if not store.exists(sha256) or os.path.exists(_marker(sha256)):
+        return False
+    outputs = _missing(sha256)
+    if not outputs:
+        return True
+    started = time.perf_counter()
+    future = _submit(sha256, outputs)
+    try:
+        rendered = future.result(TIMEOUT_SECONDS)
+    except FutureTimeout:
+        future.cancel()
+        preview_renders.inc(result="busy")
+        raise PreviewBusy("Preview render timed out")
+    except BrokenProcessPool:
+        preview_renders.inc(result="busy")
+        shutdown()  # the job is retried on a fresh pool
+        raise PreviewBusy("Preview workers restarted")
+    except Exception:
+        preview_renders.inc(result="error")
+        raise  # not marked: the job is retried
+    finally:
+        preview_seconds.observe(time.perf_counter() - started)
+    _record(sha256, rendered)
+    return rendered
+
+
+async def _generate(sha256: str, outputs: List[Tuple[str, int]]) -> bool:
+    started = time.perf_counter()
+    future = _submit(sha256, outputs)
+    try:
+        rendered = await asyncio.wait_for(asyncio.wrap_future(future), TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        future.cancel()
+        preview_renders.inc(result="busy")
+        raise PreviewBusy("Preview render timed out")
+    except BrokenProcessPool:
+        preview_renders.inc(result="busy")
+        shutdown()
+        raise PreviewBusy("Preview workers restarted")
+    except Exception as e:
+        # Not marked, so the next request tries again
+        preview_renders.inc(result="error")
+        log.warning("Preview of %s failed: %r", sha256, e)
+        return False
+    finally:
+        preview_seconds.observe(time.perf_counter() - started)
+    _record(sha256, rendered)
+    return rendered
+
+
+async def ensure(sha256: str, size: str) -> Optional[str]:
+    """Path of a blob's `size` rendition, rendering it first if needed; None if
+    the blob has no preview."""
+    dest = path(sha256, size)
+    if os.path.exists(dest):
+        return dest
+    if not store.exists(sha256) or os.path.exists(_marker(sha256)):
+        return None
+    # Concurrent requests for the same blob share one render
+    task = _inflight.get(sha256)
+    if task is None:
+        outputs = _missing(sha256)
+        if not outputs:
+            return dest
+        task = asyncio.ensure_future(_generate(sha256, outputs))
+        _inflight[sha256] = task
+        task.add_done_callback(lambda _: _inflight.pop(sha256, None))
+    rendered = await asyncio.shield(task)
+    return dest if rendered and os.path.exists(dest) else None
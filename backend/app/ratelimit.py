@@ -0,0 +1,188 @@
+"""Admission control for the password-hashing endpoints.
+
+/auth/register, /auth/login and /auth/reset-password each cost a bcrypt hash.
+A burst of them (a registration drive) would otherwise fill the hashing pool
+and take the CPU from every other route on the worker, so before any database
+or hashing work a request has to pass:
+
+    per-IP token bucket        KK_AUTH_IP_RATE per minute, bursts of KK_AUTH_IP_BURST
+    per-account token bucket   KK_AUTH_ACCOUNT_RATE / KK_AUTH_ACCOUNT_BURST (by email)
+    concurrency cap            KK_AUTH_MAX_CONCURRENT requests in flight per process
+
+Anything over is answered 429 with Retry-After right away. The hashing pool's
+own queue limit (HasherBusy -> 503) stays behind this as the last resort.
+
+Buckets are kept in memory by default, spread over KK_RATE_LIMIT_SHARDS
+separately locked LRU maps, so they are per process. With
+KK_RATE_LIMIT_BACKEND=sqlite they live in a small SQLite file
+(KK_RATE_LIMIT_DB) shared by all workers on the host instead; each check is a
+single UPSERT ... RETURNING. The client address is request.client, so behind a
+proxy run uvicorn with --proxy-headers.
+"""
+from contextlib import contextmanager
+from typing import NamedTuple, Optional
+import math
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from cachetools import LRUCache
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+
+from . import metrics, security
+
+ENABLED = os.getenv("KK_RATE_LIMIT", "1") == "1"
+BACKEND = os.getenv("KK_RATE_LIMIT_BACKEND", "memory")  # memory | sqlite
+DB_PATH = os.getenv("KK_RATE_LIMIT_DB", "ratelimit.db")
+SHARDS = int(os.getenv("KK_RATE_LIMIT_SHARDS", "16"))
+MAX_KEYS = int(os.getenv("KK_RATE_LIMIT_MAX_KEYS", "100000"))
+MAX_CONCURRENT = int(os.getenv("KK_AUTH_MAX_CONCURRENT", str(2 * max(1, security.HASH_WORKERS))))
+
+
+class Rule(NamedTuple):
+    name: str
+    rate: float   # tokens per second
+    burst: float  # bucket size
+
+
+IP_RULE = Rule("ip", float(os.getenv("KK_AUTH_IP_RATE", "60")) / 60, float(os.getenv("KK_AUTH_IP_BURST", "30")))
+ACCOUNT_RULE = Rule("account", float(os.getenv("KK_AUTH_ACCOUNT_RATE", "10")) / 60,
+                    float(os.getenv("KK_AUTH_ACCOUNT_BURST", "5")))
+
+rate_limited = metrics.Counter(
+    "kk_rate_limited_total", "Requests rejected by admission control", labels=("reason",)
+)
+auth_in_flight = metrics.Gauge("kk_auth_in_flight", "Password-hashing requests being handled")
+
+
+class RateLimited(Exception):
+    """Raised when a request is over a limit; retry_after is in seconds."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Too many requests ({reason}), retry in {math.ceil(retry_after)}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+# ---------------------------------------------------------
+# Token buckets: hit() takes one token, returns 0 or seconds until one is free
+# ---------------------------------------------------------
+class MemoryBuckets:
+    def __init__(self, shards: int = SHARDS, max_keys: int = MAX_KEYS):
+        # Least recently hit buckets are evicted first; those have long refilled
+        self._shards = [(threading.Lock(), LRUCache(maxsize=max(1, max_keys // shards)))
+                        for _ in range(shards)]
+
+    def hit(self, key: str, rule: Rule) -> float:
+        lock, buckets = self._shards[hash(key) % len(self._shards)]
+        now = time.monotonic()
+        with lock:
+            tokens, updated = buckets.get(key, (rule.burst, now))
+            tokens = min(rule.burst, tokens + (now - updated) * rule.rate)
+            allowed = tokens >= 1
+            buckets[key] = (tokens - 1 if allowed else tokens, now)
+        return 0.0 if allowed else (1 - tokens) / rule.rate
+
+
+class SqliteBuckets:
+    # Every SET expression sees the old row, so refill + take is one statement
+    _HIT = """
+        INSERT INTO buckets (key, tokens, updated, allowed) VALUES (:key, :burst - 1, :now, 1)
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = min(:burst, tokens + (:now - updated) * :rate)
+                     - (min(:burst, tokens + (:now - updated) * :rate) >= 1),
+            allowed = min(:burst, tokens + (:now - updated) * :rate) >= 1,
+            updated = :now
+        RETURNING tokens, allowed
+    """
+    SWEEP_EVERY = 1000  # hits, on average
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")  # losing the last few hits on a crash is fine
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets ("
+                         "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, "
+                         "allowed INTEGER NOT NULL) WITHOUT ROWID")
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key: str, rule: Rule) -> float:
+        conn = self._conn()
+        now = time.time()  # shared between processes, so wall clock
+        tokens, allowed = conn.execute(
+            self._HIT, {"key": key, "burst": rule.burst, "rate": rule.rate, "now": now}
+        ).fetchone()
+        if random.random() < 1 / self.SWEEP_EVERY:
+            # Buckets untouched for longer than the slowest refill are full again
+            idle = max(r.burst / r.rate for r in (IP_RULE, ACCOUNT_RULE))
+            conn.execute("DELETE FROM buckets WHERE updated < ?", (now - idle,))
+        return 0.0 if allowed else (1 - tokens) / rule.rate
+
+
+class ConcurrencyCap:
+    def __init__(self, limit: int = MAX_CONCURRENT):
+        self.limit = limit
+        self.active = 0
+
+    @contextmanager
+    def slot(self):
+        # Only taken from async handlers, i.e. on the event loop: no lock needed
+        if self.active >= self.limit:
+            rate_limited.inc(reason="concurrency")
+            raise RateLimited("concurrency", 1.0)
+        self.active += 1
+        auth_in_flight.set(self.active)
+        try:
+            yield
+        finally:
+            self.active -= 1
+            auth_in_flight.set(self.active)
+
+
+_buckets = SqliteBuckets() if BACKEND == "sqlite" else MemoryBuckets()
+_auth_cap = ConcurrencyCap()
+
+
+async def check(key: str, rule: Rule):
+    key = f"{rule.name}:{key}"
+    if isinstance(_buckets, SqliteBuckets):
+        wait = await run_in_threadpool(_buckets.hit, key, rule)  # may wait on another worker's write
+    else:
+        wait = _buckets.hit(key, rule)
+    if wait > 0:
+        rate_limited.inc(reason=rule.name)
+        raise RateLimited(rule.name, wait)
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def auth_admission(account_field: Optional[str] = "email"):
+    """Route dependency for the hashing endpoints: buckets by client IP and by
+    the body's `account_field`, then a slot under the concurrency cap for the
+    rest of the request."""
+    async def admit(request: Request):
+        if not ENABLED:
+            yield
+            return
+        await check(client_ip(request), IP_RULE)
+        if account_field:
+            # FastAPI has already read the body; request.json() reuses it
+            body = await request.json()
+            account = body.get(account_field) if isinstance(body, dict) else None
+            if isinstance(account, str) and account:
+                await check(account.strip().lower(), ACCOUNT_RULE)
+        with _auth_cap.slot():
+            yield
+    return admit
@@ -0,0 +1,103 @@
+from typing import Awaitable, Callable, Hashable, NamedTuple, Optional
+import asyncio
+import hashlib
+import os
+import threading
+import time
+
+from cachetools import LRUCache
+from fastapi import Request, Response
+
+from . import catalog
+
+# =========================================================
+# Versioned response cache for catalogue endpoints
+# =========================================================
+# Stores the final JSON bytes per (endpoint, normalised query params) together
+# with the catalogue version they were built from and a strong ETag (hash of the
+# bytes, so every worker derives the same tag for the same data). A request whose
+# If-None-Match matches a fresh entry gets 304 straight from memory: no session,
+# no query, no serialisation.
+
+# Same freshness rule as the eligibility index: rebuilt on a local catalogue
+# change, and at least every KK_CATALOG_TTL seconds to pick up other workers' edits.
+TTL_SECONDS = float(os.getenv("KK_CATALOG_TTL", "60"))
+MAX_AGE_SECONDS = int(os.getenv("KK_CATALOG_MAX_AGE", "60"))
+MAX_ENTRIES = int(os.getenv("KK_CATALOG_CACHE_SIZE", "1024"))
+
+CACHE_CONTROL = f"public, max-age={MAX_AGE_SECONDS}"
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+    status_code: int
+    version: int
+    built_at: float
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        # If-None-Match uses weak comparison (RFC 9110 13.1.2)
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    def __init__(self, maxsize: int = MAX_ENTRIES):
+        self._entries = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._build_lock = asyncio.Lock()
+
+    def _get_fresh(self, key: Hashable) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+        if (
+            entry is not None
+            and entry.version == catalog.version()
+            and time.monotonic() - entry.built_at < TTL_SECONDS
+        ):
+            return entry
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    async def respond(
+        self,
+        request: Request,
+        key: Hashable,
+        build: Callable[[], Awaitable[tuple]],
+    ) -> Response:
+        """Serve `key` from cache (or 304), calling build() -> (status, body) on a miss."""
+        entry = self._get_fresh(key)
+        if entry is None:
+            async with self._build_lock:
+                entry = self._get_fresh(key)
+                if entry is None:
+                    # Read the version before querying: a change committed mid-build
+                    # leaves this entry already stale instead of mislabelled.
+                    version = catalog.version()
+                    status_code, body = await build()
+                    entry = CachedResponse(body, _etag(body), status_code, version, time.monotonic())
+                    with self._lock:
+                        self._entries[key] = entry
+
+        if entry.status_code != 200:
+            return Response(content=entry.body, status_code=entry.status_code, media_type="application/json")
+        headers = {"ETag": entry.etag, "Cache-Control": CACHE_CONTROL}
+        if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+programs_cache = ResponseCache()
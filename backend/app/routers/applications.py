@@ -1,35 +1,103 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, insert, select, tuple_, union, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
 import os
+import io
+import base64
 from datetime import datetime
 
-from ..database import get_db
-from .. import models, schemas
+from ..database import get_async_db, get_read_db, engine
+from .. import aggregates, jobs, models, previews, schemas, serialization, bulk_import
 from ..deps import current_user, require_admin
+from ..storage import UPLOAD_DIR, save_upload, safe_filename
 
 router = APIRouter(prefix="/applications", tags=["Applications"])
 
-UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+PAGE_SIZE_DEFAULT = 50
+PAGE_SIZE_MAX = 200
+
+BULK_CHUNK_SIZE = 1000
+
+# =========================
+# Keyset pagination helpers
+# =========================
+# Lists are ordered newest-first by (submitted_at, id), or for reviewers by
+# (score, id) highest first ("review by score"; unscored rows are left out until
+# the scorer has seen them, within seconds). The cursor is the sort key of the
+# last row on the previous page, so every page is an index range scan no matter
+# how deep the client has paged. The next cursor is returned in X-Next-Cursor
+# (absent on the last page) so the response body stays a plain list.
+
+ListOrder = Literal["newest", "score"]
+
+# order -> (sort column, cursor value parser)
+_ORDERS = {
+    "newest": (models.Application.submitted_at, datetime.fromisoformat),
+    "score": (models.Application.score, float),
+}
+
+
+def _encode_cursor(app, order: str = "newest") -> str:  # ORM object or row with the sort key / id
+    value = getattr(app, _ORDERS[order][0].key)
+    raw = f"{value.isoformat() if isinstance(value, datetime) else value}|{app.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str, order: str = "newest"):
+    try:
+        value, app_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return _ORDERS[order][1](value), int(app_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def _keyset_page(db: AsyncSession, stmt, limit: int, cursor: Optional[str], response: Response,
+                       as_json: bool = False, order: str = "newest"):
+    """A page of Applications; with as_json, the finished ApplicationOut JSON
+    response (fast path, see app/serialization.py) instead of ORM objects."""
+    sort_col = _ORDERS[order][0]
+    if order == "score":
+        stmt = stmt.where(sort_col != None)
+    if cursor:
+        value, app_id = _decode_cursor(cursor, order)
+        stmt = stmt.where(tuple_(sort_col, models.Application.id) < tuple_(value, app_id))
+    stmt = stmt.order_by(sort_col.desc(), models.Application.id.desc()).limit(limit + 1)
+    if as_json:
+        # Plain ApplicationOut column tuples (+ the sort key for the cursor)
+        stmt = stmt.with_only_columns(*serialization.applications.columns, sort_col)
+        rows = (await db.execute(stmt)).all()
+    else:
+        rows = (await db.execute(stmt)).scalars().all()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(rows[-1], order)
+    if as_json:
+        return serialization.json_response(serialization.applications.dump_rows(rows), response)
+    return rows
+
+
 # =========================
 # Farmer-side endpoints
 # =========================
 
 @router.post("", response_model=schemas.ApplicationOut, status_code=201)
-def create_application(
+async def create_application(
     payload: schemas.ApplicationCreate,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(current_user)
 ):
     # 1️⃣ Prevent duplicate pending/under_review for same program
-    exists = db.query(models.Application).filter(
+    exists = (await db.execute(select(models.Application.id).where(
         models.Application.user_id == user.id,
         models.Application.program_id == payload.program_id,
         models.Application.status.in_(["pending", "under_review"])
-    ).first()
+    ).limit(1))).first()
     if exists:
         raise HTTPException(
             status_code=400,
@@ -46,8 +114,8 @@ def create_application(
         status="pending"
     )
     db.add(app)
-    db.commit()
-    db.refresh(app)
+    await db.flush()
+    await aggregates.add(db, aggregates.for_ids([app.id]))
 
     # 3️⃣ Record initial status history
     db.add(models.ApplicationStatusHistory(
@@ -55,79 +123,72 @@ def create_application(
         status="pending",
         note="Submitted"
     ))
-    db.commit()
-
-    # 4️⃣ ✅ Link the user's uploaded document (if they have one)
-    if getattr(user, "doc_path", None):
-        existing_doc = db.query(models.Document).filter(
-            models.Document.user_id == user.id,
-            models.Document.application_id == app.id
-        ).first()
-
-        if not existing_doc:
-            doc = models.Document(
-                kind="Govt ID",
-                file_path=user.doc_path,
-                user_id=user.id,
-                application_id=app.id
-            )
-            db.add(doc)
-            db.commit()
-            db.refresh(doc)
+
+    # 4️⃣ Document linking + the farmer's notification run in the job queue
+    await jobs.enqueue(db, "application.submitted", application_id=app.id)
+    await db.commit()
+    await db.refresh(app)
 
     # 5️⃣ Return the created application
     return app
 
 
 @router.get("", response_model=List[schemas.ApplicationOut])
-def my_applications(db: Session = Depends(get_db), user=Depends(current_user)):
-    apps = db.query(models.Application).filter(
-        models.Application.user_id == user.id
-    ).order_by(models.Application.submitted_at.desc()).all()
-    return apps
+async def my_applications(
+    response: Response,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    user=Depends(current_user)
+):
+    stmt = select(models.Application).where(models.Application.user_id == user.id)
+    return await _keyset_page(db, stmt, limit, cursor, response, as_json=serialization.FAST_JSON)
 
 
 @router.get("/{app_id}", response_model=schemas.ApplicationOut)
-def get_application(app_id: int, db: Session = Depends(get_db), user=Depends(current_user)):
-    app = db.query(models.Application).get(app_id)
+async def get_application(app_id: int, db: AsyncSession = Depends(get_read_db), user=Depends(current_user)):
+    app = await db.get(models.Application, app_id)
     if not app or app.user_id != user.id:
         raise HTTPException(status_code=404, detail="Not found")
     return app
 
 
 @router.post("/{app_id}/documents")
-def upload_document(
+async def upload_document(
     app_id: int,
     kind: str = Form(...),
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(current_user)
 ):
-    app = db.query(models.Application).get(app_id)
+    app = await db.get(models.Application, app_id)
     if not app or app.user_id != user.id:
         raise HTTPException(status_code=404, detail="Not found")
 
-    filename_safe = file.filename.replace(" ", "_")
-    fname = os.path.join(UPLOAD_DIR, f"app{app.id}_{kind}_{filename_safe}")
-
-    with open(fname, "wb") as f:
-        f.write(file.file.read())
+    # Content-addressed: re-uploading the same scan reuses the stored blob
+    stored = await save_upload(file)
 
-    doc = models.Document(application_id=app.id, kind=kind, file_path=fname)
+    doc = models.Document(
+        application_id=app.id, kind=kind, file_path=stored.path,
+        size_bytes=stored.size, sha256=stored.sha256,
+        original_name=safe_filename(file.filename), content_type=file.content_type
+    )
     db.add(doc)
-    db.commit()
-    return {"ok": True, "path": fname}
+    await jobs.enqueue(db, "applications.rescore", application_ids=[app.id])  # document count changed
+    if doc.content_type in previews.PREVIEW_TYPES:
+        await jobs.enqueue(db, "documents.preview", sha256=stored.sha256)
+    await db.commit()
+    return {"ok": True, "path": stored.path, "sha256": stored.sha256}
 
 
 # (Legacy) raw upload – leaving as-is if used elsewhere
 @router.post("/")
 async def upload_file(file: UploadFile = File(...)):
     try:
-        filename = f"{datetime.utcnow().timestamp()}_{file.filename}"
-        filepath = os.path.join(UPLOAD_DIR, filename)
-        with open(filepath, "wb") as buffer:
-            buffer.write(await file.read())
-        return {"msg": "File uploaded", "path": filepath}
+        stored = await save_upload(file)
+        return {"msg": "File uploaded", "path": stored.path}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
@@ -135,29 +196,217 @@ async def upload_file(file: UploadFile = File(...)):
 # Admin endpoints
 # =========================
 
+def _approval_problem(acreage, season, program, aadhar, doc_count) -> Optional[str]:
+    """Basic guardrails for approving; returns the reason it is blocked, or None."""
+    # 1) Land-size within program bounds (if configured)
+    if program:
+        if program.min_land_size is not None and acreage < program.min_land_size:
+            return f"Acreage {acreage} < program min {program.min_land_size}"
+        if program.max_land_size is not None and acreage > program.max_land_size:
+            return f"Acreage {acreage} > program max {program.max_land_size}"
+        # 2) Season match if program has a fixed season
+        if program.season and program.season != "Any" and season != program.season:
+            return f"Season must be {program.season} for this program."
+
+    # 3) Minimal identity/doc check
+    if not aadhar:
+        return "User Aadhar missing; cannot approve."
+    if doc_count == 0:
+        return "No supporting documents uploaded; cannot approve."
+    return None
+
+
 @router.get("/admin/list", response_model=List[schemas.ApplicationOut])
-def list_all(status: Optional[str] = None, db: Session = Depends(get_db), admin=Depends(require_admin)):
-    q = db.query(models.Application)
+async def list_all(
+    response: Response,
+    status: Optional[str] = None,
+    program_id: Optional[int] = None,
+    season: Optional[str] = None,
+    submitted_from: Optional[datetime] = None,
+    submitted_to: Optional[datetime] = None,
+    order: ListOrder = "newest",
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    admin=Depends(require_admin)
+):
+    stmt = select(models.Application)
     if status:
-        q = q.filter(models.Application.status == status)
-    return q.order_by(models.Application.submitted_at.desc()).all()
+        stmt = stmt.where(models.Application.status == status)
+    if program_id:
+        stmt = stmt.where(models.Application.program_id == program_id)
+    if season:
+        stmt = stmt.where(models.Application.season == season)
+    if submitted_from:
+        stmt = stmt.where(models.Application.submitted_at >= submitted_from)
+    if submitted_to:
+        stmt = stmt.where(models.Application.submitted_at < submitted_to)
+    return await _keyset_page(db, stmt, limit, cursor, response, as_json=serialization.FAST_JSON, order=order)
+
+
+SummaryDim = Literal["status", "program_id", "season", "state", "district"]
+
+
+@router.get("/admin/summary", response_model=schemas.SummaryOut)
+async def admin_summary(
+    group_by: List[SummaryDim] = Query(["status"]),
+    status: Optional[str] = None,
+    program_id: Optional[int] = None,
+    season: Optional[str] = None,
+    state: Optional[str] = None,
+    district: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    admin=Depends(require_admin)
+):
+    """
+    Dashboard counts / acreage grouped by any of status, program, season and the
+    farmer's state / district. Read from the application_stats aggregate table
+    (kept up to date by every writer, see app/aggregates.py), so the cost depends
+    on the number of groups, not applications.
+    """
+    S = models.ApplicationStat
+    dims = [getattr(S, d) for d in dict.fromkeys(group_by)]
+    stmt = select(*dims, func.sum(S.count), func.sum(S.acreage)).where(S.count > 0)
+    for col, value in ((S.status, status), (S.program_id, program_id), (S.season, season),
+                       (S.state, state), (S.district, district)):
+        if value is not None:
+            stmt = stmt.where(col == value)
+    stmt = stmt.group_by(*dims).order_by(*dims)
+
+    rows, total_count, total_acreage = [], 0, 0.0
+    for row in (await db.execute(stmt)).all():
+        *keys, count, acreage = row
+        rows.append({**{c.key: k for c, k in zip(dims, keys)}, "count": count, "acreage": acreage or 0.0})
+        total_count += count
+        total_acreage += acreage or 0.0
+    return {"total_count": total_count, "total_acreage": total_acreage, "rows": rows}
+
+
+@router.post("/admin/import")
+async def bulk_import_applications(
+    file: UploadFile = File(...),
+    fmt: Optional[Literal["csv", "ndjson"]] = Form(None, alias="format"),
+    admin=Depends(require_admin)
+):
+    """
+    Bulk-import paper applications from a CSV or NDJSON file (see app/bulk_import.py
+    for the columns). Returns counts and per-row errors; valid rows are imported
+    even when others fail.
+    """
+    fmt = fmt or bulk_import.detect_format(file.filename)
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return await run_in_threadpool(
+            bulk_import.import_applications, engine, stream, fmt, admin_id=admin.id
+        )
+    finally:
+        stream.detach()  # leave the UploadFile for Starlette to close
+
+
+def _document_out(doc: models.Document) -> dict:
+    """A document as AdminApplicationDetailOut lists it (with its preview URLs)."""
+    return {**schemas.DocumentOut.model_validate(doc).model_dump(), **previews.urls(doc)}
+
+
+async def _hydrate_details(db: AsyncSession, apps: List[models.Application]) -> List[dict]:
+    """
+    Build AdminApplicationDetailOut payloads for many applications with a fixed
+    number of queries (users, programs, crops, documents), however many apps.
+    """
+    if not apps:
+        return []
+
+    async def by_id(model, ids):
+        rows = (await db.execute(select(model).where(model.id.in_(ids)))).scalars().all()
+        return {r.id: r for r in rows}
+
+    app_ids = [a.id for a in apps]
+    user_ids = list({a.user_id for a in apps})
+    users = await by_id(models.User, user_ids)
+    programs = await by_id(models.Program, list({a.program_id for a in apps}))
+    crops = await by_id(models.Crop, list({a.crop_id for a in apps}))
+
+    # Same rule as the details endpoint: docs linked by either app_id or user_id.
+    # Written as id IN (UNION of two index lookups) rather than a plain OR, which
+    # SQLite's planner may turn into a full scan of documents for long IN lists.
+    doc_ids = union(
+        select(models.Document.id).where(models.Document.application_id.in_(app_ids)),
+        select(models.Document.id).where(models.Document.user_id.in_(user_ids)),
+    )
+    docs = (await db.execute(
+        select(models.Document).where(models.Document.id.in_(doc_ids)).order_by(models.Document.id)
+    )).scalars().all()
+    docs_by_app, docs_by_user = {}, {}
+    dumped = {d.id: _document_out(d) for d in docs}  # once per document, however many apps share it
+    for d in docs:
+        if d.application_id is not None:
+            docs_by_app.setdefault(d.application_id, []).append(d)
+        if d.user_id is not None:
+            docs_by_user.setdefault(d.user_id, []).append(d)
+
+    out = []
+    for a in apps:
+        user, program, crop = users.get(a.user_id), programs.get(a.program_id), crops.get(a.crop_id)
+        if not user or not program or not crop:
+            continue  # related data missing; the details endpoint reports these as 500
+        seen, documents = set(), []
+        for d in docs_by_app.get(a.id, []) + docs_by_user.get(a.user_id, []):
+            if d.id not in seen:
+                seen.add(d.id)
+                documents.append(dumped[d.id])
+        out.append({
+            "application": a,
+            "user": user,
+            "program": program,
+            "crop": crop,
+            "documents": documents
+        })
+    return out
+
+
+@router.get("/admin/review-queue", response_model=List[schemas.AdminApplicationDetailOut])
+async def review_queue(
+    response: Response,
+    status: Optional[List[str]] = Query(None),
+    program_id: Optional[int] = None,
+    season: Optional[str] = None,
+    order: ListOrder = "newest",
+    limit: int = Query(20, ge=1, le=PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    admin=Depends(require_admin)
+):
+    """
+    A page of fully hydrated applications for reviewers (default: pending and
+    under_review), newest first or by review score (order=score, see
+    app/scoring.py), keyset-paginated like /admin/list.
+    """
+    stmt = select(models.Application).where(
+        models.Application.status.in_(status or ["pending", "under_review"])
+    )
+    if program_id:
+        stmt = stmt.where(models.Application.program_id == program_id)
+    if season:
+        stmt = stmt.where(models.Application.season == season)
+    apps = await _keyset_page(db, stmt, limit, cursor, response, order=order)
+    return await _hydrate_details(db, apps)
 
 
 @router.get("/admin/{app_id}/details", response_model=schemas.AdminApplicationDetailOut)
-def admin_application_details(app_id: int, db: Session = Depends(get_db), admin=Depends(require_admin)):
-    app = db.query(models.Application).get(app_id)
+async def admin_application_details(app_id: int, db: AsyncSession = Depends(get_read_db), admin=Depends(require_admin)):
+    app = await db.get(models.Application, app_id)
     if not app:
         raise HTTPException(status_code=404, detail="Application not found")
 
-    user = db.query(models.User).get(app.user_id)
-    program = db.query(models.Program).get(app.program_id)
-    crop = db.query(models.Crop).get(app.crop_id)
+    user = await db.get(models.User, app.user_id)
+    program = await db.get(models.Program, app.program_id)
+    crop = await db.get(models.Crop, app.crop_id)
 
     # ✅ Slightly improved query: show docs linked by either app_id or user_id
-    documents = db.query(models.Document).filter(
+    documents = (await db.execute(select(models.Document).where(
         (models.Document.application_id == app.id) |
         (models.Document.user_id == app.user_id)
-    ).all()
+    ))).scalars().all()
 
     if not user or not program or not crop:
         raise HTTPException(status_code=500, detail="Related data missing")
@@ -167,15 +416,15 @@ def admin_application_details(app_id: int, db: Session = Depends(get_db), admin=
         "user": user,
         "program": program,
         "crop": crop,
-        "documents": documents
+        "documents": [_document_out(d) for d in documents]
     }
 
 
 @router.post("/admin/{app_id}/status", response_model=schemas.ApplicationOut)
-def update_status(
+async def update_status(
     app_id: int,
     payload: schemas.StatusUpdateIn,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     admin=Depends(require_admin)
 ):
     """
@@ -185,14 +434,16 @@ def update_status(
       - 'rejected'       -> requires remarks (visible to farmer)
     Remarks are saved on the Application and returned to the farmer via ApplicationOut.
     """
-    app = db.query(models.Application).get(app_id)
+    app = await db.get(models.Application, app_id)
     if not app:
         raise HTTPException(status_code=404, detail="Not found")
 
     # Quick lookups for validation
-    program = db.query(models.Program).get(app.program_id)
-    user = db.query(models.User).get(app.user_id)
-    docs = db.query(models.Document).filter(models.Document.application_id == app.id).all()
+    program = await db.get(models.Program, app.program_id)
+    user = await db.get(models.User, app.user_id)
+    docs = (await db.execute(
+        select(models.Document).where(models.Document.application_id == app.id)
+    )).scalars().all()
 
     new_status = payload.status
     remarks = payload.remarks or None
@@ -203,31 +454,130 @@ def update_status(
 
     # Basic guardrails when approving
     if new_status == "approved":
-        # 1) Land-size within program bounds (if configured)
-        if program:
-            if program.min_land_size is not None and app.acreage < program.min_land_size:
-                raise HTTPException(status_code=400, detail=f"Acreage {app.acreage} < program min {program.min_land_size}")
-            if program.max_land_size is not None and app.acreage > program.max_land_size:
-                raise HTTPException(status_code=400, detail=f"Acreage {app.acreage} > program max {program.max_land_size}")
-            # 2) Season match if program has a fixed season
-            if program.season and program.season != "Any" and app.season != program.season:
-                raise HTTPException(status_code=400, detail=f"Season must be {program.season} for this program.")
-
-        # 3) Minimal identity/doc check
-        if not user or not user.aadhar:
-            raise HTTPException(status_code=400, detail="User Aadhar missing; cannot approve.")
-        if len(docs) == 0:
-            raise HTTPException(status_code=400, detail="No supporting documents uploaded; cannot approve.")
-
-    # Apply update
+        problem = _approval_problem(app.acreage, app.season, program, user.aadhar if user else None, len(docs))
+        if problem:
+            raise HTTPException(status_code=400, detail=problem)
+
+    # Apply update (moving the app between dashboard aggregate groups)
+    await aggregates.remove(db, aggregates.for_ids([app.id]))
     app.status = new_status
     app.remarks = remarks  # ✅ visible to farmer via ApplicationOut
+    await db.flush()
+    await aggregates.add(db, aggregates.for_ids([app.id]))
     db.add(models.ApplicationStatusHistory(
         application_id=app.id,
         status=new_status,
         note=remarks,
         by_admin_id=admin.id
     ))
-    db.commit()
-    db.refresh(app)
+    await jobs.enqueue(db, "application.status_changed",
+                       application_id=app.id, status=new_status, remarks=remarks)
+    await db.commit()
+    await db.refresh(app)
     return app
+
+
+@router.post("/admin/bulk-status", response_model=schemas.BulkStatusResultOut)
+async def bulk_update_status(
+    payload: schemas.BulkStatusUpdateIn,
+    db: AsyncSession = Depends(get_async_db),
+    admin=Depends(require_admin)
+):
+    """
+    Move many applications to a new status at once (same rules as update_status).
+    Guardrail inputs for a whole chunk come from one joined/aggregated query, the
+    update is one UPDATE ... WHERE id IN (...) and history rows are one batched
+    insert. Each chunk of ids is its own transaction; per-id outcomes are returned.
+    """
+    new_status = payload.status
+    remarks = payload.remarks or None
+
+    if new_status == "rejected" and not remarks:
+        raise HTTPException(status_code=400, detail="Remarks are required when rejecting an application.")
+    if payload.ids is None and payload.filter is None:
+        raise HTTPException(status_code=400, detail="Provide either ids or a filter.")
+    if payload.ids is None and not payload.filter.model_dump(exclude_none=True):
+        # An empty filter would select every application
+        raise HTTPException(status_code=400, detail="The filter must set at least one field.")
+
+    if payload.ids is not None:
+        ids = list(dict.fromkeys(payload.ids))
+    else:
+        stmt = select(models.Application.id)
+        f = payload.filter
+        if f.status is not None:
+            stmt = stmt.where(models.Application.status == f.status)
+        if f.program_id is not None:
+            stmt = stmt.where(models.Application.program_id == f.program_id)
+        if f.season is not None:
+            stmt = stmt.where(models.Application.season == f.season)
+        ids = (await db.execute(stmt.order_by(models.Application.id))).scalars().all()
+
+    results = []
+    updated = 0
+    for start in range(0, len(ids), BULK_CHUNK_SIZE):
+        chunk = ids[start:start + BULK_CHUNK_SIZE]
+
+        # Count documents for this chunk only (an unfiltered GROUP BY would scan
+        # the whole documents table once per chunk)
+        doc_counts = (
+            select(models.Document.application_id, func.count().label("doc_count"))
+            .where(models.Document.application_id.in_(chunk))
+            .group_by(models.Document.application_id)
+            .subquery()
+        )
+
+        rows = (await db.execute(
+            select(
+                models.Application.id,
+                models.Application.acreage,
+                models.Application.season,
+                models.Program,
+                models.User.aadhar,
+                func.coalesce(doc_counts.c.doc_count, 0),
+            )
+            .outerjoin(models.Program, models.Program.id == models.Application.program_id)
+            .outerjoin(models.User, models.User.id == models.Application.user_id)
+            .outerjoin(doc_counts, doc_counts.c.application_id == models.Application.id)
+            .where(models.Application.id.in_(chunk))
+        )).all()
+        found = {r[0]: r for r in rows}
+
+        ok_ids = []
+        for app_id in chunk:
+            row = found.get(app_id)
+            if row is None:
+                results.append(schemas.BulkStatusOutcome(id=app_id, ok=False, error="Not found"))
+                continue
+            if new_status == "approved":
+                _, acreage, season, program, aadhar, doc_count = row
+                problem = _approval_problem(acreage, season, program, aadhar, doc_count)
+                if problem:
+                    results.append(schemas.BulkStatusOutcome(id=app_id, ok=False, error=problem))
+                    continue
+            ok_ids.append(app_id)
+            results.append(schemas.BulkStatusOutcome(id=app_id, ok=True, status=new_status))
+
+        if ok_ids:
+            await aggregates.remove(db, aggregates.for_ids(ok_ids))
+            await db.execute(
+                update(models.Application)
+                .where(models.Application.id.in_(ok_ids))
+                .values(status=new_status, remarks=remarks)
+                .execution_options(synchronize_session=False)
+            )
+            await aggregates.add(db, aggregates.for_ids(ok_ids))
+            now = datetime.utcnow()
+            await db.execute(insert(models.ApplicationStatusHistory), [
+                {"application_id": app_id, "status": new_status, "note": remarks,
+                 "by_admin_id": admin.id, "at": now}
+                for app_id in ok_ids
+            ])
+            await jobs.enqueue_many(db, "application.status_changed", (
+                {"application_id": app_id, "status": new_status, "remarks": remarks}
+                for app_id in ok_ids
+            ))
+            await db.commit()
+            updated += len(ok_ids)
+
+    return {"updated": updated, "failed": len(results) - updated, "results": results}
@@ -1,31 +1,43 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
-import uuid, traceback
+import traceback
 
-from ..database import get_db
-from .. import models, schemas, security
+from ..database import get_async_db
+from .. import models, ratelimit, schemas, security, storage, tokens
+from ..deps import invalidate_principal
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 # ----------------------------------------------------------
 # ✅ REGISTER FARMER (Public - No auth required)
 # ----------------------------------------------------------
-@router.post("/register", response_model=schemas.UserOut, status_code=201)
-def register(payload: schemas.RegisterIn, db: Session = Depends(get_db)):
+@router.post("/register", response_model=schemas.UserOut, status_code=201,
+             dependencies=[Depends(ratelimit.auth_admission("email"))])
+async def register(payload: schemas.RegisterIn, db: AsyncSession = Depends(get_async_db)):
     print("📩 Register payload received:", payload.dict())
 
     # Check if email already exists
-    existing_email = db.query(models.User).filter(models.User.email == payload.email).first()
+    existing_email = (await db.execute(
+        select(models.User.id).where(models.User.email == payload.email)
+    )).first()
     if existing_email:
         raise HTTPException(status_code=400, detail="Email already registered")
 
     # Check if Aadhaar already exists
     if payload.aadhar:
-        existing_aadhar = db.query(models.User).filter(models.User.aadhar == payload.aadhar).first()
+        existing_aadhar = (await db.execute(
+            select(models.User.id).where(models.User.aadhar == payload.aadhar)
+        )).first()
         if existing_aadhar:
             raise HTTPException(status_code=400, detail="Aadhaar already registered")
 
+    storage.scan_sha256(payload.doc_path)
+
+    # bcrypt is CPU-bound; it runs in the hashing process pool
+    password_hash = await security.hash_pw_async(payload.password)
+
     try:
         user = models.User(
             name=payload.name,
@@ -35,24 +47,24 @@ def register(payload: schemas.RegisterIn, db: Session = Depends(get_db)):
             dob=str(payload.dob) if payload.dob else None,   # ✅ Convert date to string if needed
             state=payload.state,
             district=payload.district,
-            password_hash=security.hash_pw(payload.password),
+            password_hash=password_hash,
             role="farmer",
             aadhar=payload.aadhar,
             doc_path=payload.doc_path
         )
 
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
         print(f"✅ User registered successfully: {user.email}")
         return user
 
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         print("❌ IntegrityError during registration:", e.orig)
         raise HTTPException(status_code=400, detail="Duplicate or invalid user data")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print("❌ Unexpected Error in register():", traceback.format_exc())
         raise HTTPException(status_code=400, detail=f"Registration failed: {str(e)}")
 
@@ -60,24 +72,30 @@ def register(payload: schemas.RegisterIn, db: Session = Depends(get_db)):
 # ----------------------------------------------------------
 # ✅ LOGIN (works for both admin and farmer)
 # ----------------------------------------------------------
-@router.post("/login", response_model=schemas.TokenOut)
-def login(payload: schemas.LoginIn, db: Session = Depends(get_db)):
+@router.post("/login", response_model=schemas.TokenOut,
+             dependencies=[Depends(ratelimit.auth_admission("email"))])
+async def login(payload: schemas.LoginIn, db: AsyncSession = Depends(get_async_db)):
     print("🔑 Login attempt:", payload.dict())
-    user = db.query(models.User).filter(models.User.email == payload.email).first()
+    user = (await db.execute(
+        select(models.User).where(models.User.email == payload.email)
+    )).scalars().first()
 
     if not user:
         print("❌ Login failed: User not found")
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
-    if not security.verify_pw(payload.password, user.password_hash):
+    ok, new_hash = await security.verify_and_update_pw_async(payload.password, user.password_hash)
+    if not ok:
         print("❌ Login failed: Incorrect password")
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
-    access_token = security.make_access_token(user.id, user.role)
-    refresh_token = security.make_refresh_token(user.id)
+    # Transparently upgrade hashes made with an older bcrypt cost
+    if new_hash:
+        user.password_hash = new_hash
 
-    db.add(models.RefreshToken(user_id=user.id, token=refresh_token))
-    db.commit()
+    access_token = security.make_access_token(user.id, user.role)
+    refresh_token = await tokens.issue_refresh_token(db, user.id)
+    await db.commit()
 
     print(f"✅ Login successful for: {user.email}")
     return {
@@ -91,27 +109,23 @@ def login(payload: schemas.LoginIn, db: Session = Depends(get_db)):
 # ✅ REFRESH TOKEN
 # ----------------------------------------------------------
 @router.post("/refresh", response_model=schemas.TokenOut)
-def refresh_token(payload: schemas.RefreshTokenIn, db: Session = Depends(get_db)):
+async def refresh_token(payload: schemas.RefreshTokenIn, db: AsyncSession = Depends(get_async_db)):
     try:
         data = security.decode_token(payload.refresh_token)
         if data.get("typ") != "refresh":
             raise ValueError("Invalid token type")
 
-        rt = db.query(models.RefreshToken).filter(
-            models.RefreshToken.token == payload.refresh_token,
-            models.RefreshToken.revoked == False
-        ).first()
+        rt = await tokens.find_refresh_token(db, payload.refresh_token)
         if not rt:
             raise ValueError("Refresh token revoked or not found")
 
-        user = db.query(models.User).get(int(data["sub"]))
+        user = await db.get(models.User, int(data["sub"]))
         if not user:
             raise ValueError("User not found")
 
-        rt.revoked = True
-        new_refresh = security.make_refresh_token(user.id)
-        db.add(models.RefreshToken(user_id=user.id, token=new_refresh))
-        db.commit()
+        # Rotate: the used token is deleted, not kept around as "revoked"
+        new_refresh = await tokens.rotate_refresh_token(db, rt)
+        await db.commit()
 
         new_access = security.make_access_token(user.id, user.role)
         print(f"♻️ Tokens refreshed for user: {user.email}")
@@ -130,15 +144,15 @@ def refresh_token(payload: schemas.RefreshTokenIn, db: Session = Depends(get_db)
 # ✅ FORGOT PASSWORD
 # ----------------------------------------------------------
 @router.post("/forgot-password")
-def forgot_password(payload: schemas.ForgotPasswordIn, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == payload.email).first()
+async def forgot_password(payload: schemas.ForgotPasswordIn, db: AsyncSession = Depends(get_async_db)):
+    user = (await db.execute(
+        select(models.User).where(models.User.email == payload.email)
+    )).scalars().first()
     if not user:
         return {"msg": "If this email exists, a reset link has been sent."}
 
-    token = str(uuid.uuid4())
-    reset = models.PasswordResetToken(user_id=user.id, token=token)
-    db.add(reset)
-    db.commit()
+    token = await tokens.issue_reset_token(db, user.id)
+    await db.commit()
 
     print(f"🔗 Password reset token generated for {user.email}: {token}")
     return {"msg": "Reset token generated", "token": token}
@@ -147,23 +161,22 @@ def forgot_password(payload: schemas.ForgotPasswordIn, db: Session = Depends(get
 # ----------------------------------------------------------
 # ✅ RESET PASSWORD
 # ----------------------------------------------------------
-@router.post("/reset-password")
-def reset_password(payload: schemas.ResetPasswordIn, db: Session = Depends(get_db)):
-    reset = db.query(models.PasswordResetToken).filter(
-        models.PasswordResetToken.token == payload.token,
-        models.PasswordResetToken.used == False
-    ).first()
+@router.post("/reset-password", dependencies=[Depends(ratelimit.auth_admission(None))])
+async def reset_password(payload: schemas.ResetPasswordIn, db: AsyncSession = Depends(get_async_db)):
+    reset = await tokens.find_reset_token(db, payload.token)
 
     if not reset:
         raise HTTPException(status_code=400, detail="Invalid or expired token")
 
-    user = db.query(models.User).filter(models.User.id == reset.user_id).first()
+    user = await db.get(models.User, reset.user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.password_hash = security.hash_pw(payload.new_password)
-    reset.used = True
-    db.commit()
+    user.password_hash = await security.hash_pw_async(payload.new_password)
+    await db.delete(reset)  # single use
+    await tokens.revoke_user_tokens(db, user.id)  # sign out other sessions
+    await db.commit()
+    invalidate_principal(user.id)
 
     print(f"🔐 Password reset successful for {user.email}")
     return {"msg": "Password reset successful"}
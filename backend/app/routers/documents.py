@@ -0,0 +1,153 @@
+"""Document downloads.
+
+GET /documents/{id} serves an uploaded file to its owner (the farmer the
+document or its application belongs to) or an admin. The body is never read
+into Python: FileResponse streams it from disk (or hands the path to the server
+when it supports the ASGI pathsend extension), answers Range requests with 206,
+and honours If-Range. Conditional GETs are answered here with 304:
+
+    ETag           "<sha256>" (the same bytes always have the same tag)
+    Last-Modified  the document's upload time
+
+GET /documents/{id}/preview?size=thumb|page returns a JPEG rendition of an
+image or a PDF's first page (app.previews), rendered on first request if the
+upload job has not made it yet.
+
+With KK_DOWNLOAD_ACCEL_PREFIX set (e.g. /_protected/) the response is an empty
+X-Accel-Redirect to that prefix + the stored path instead, so a fronting nginx
+serves the file with sendfile after this route has done the authorization.
+"""
+from calendar import timegm
+from email.utils import formatdate, parsedate_to_datetime
+from mimetypes import guess_type
+from typing import Literal, Optional
+from urllib.parse import quote
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response
+from sqlalchemy import select
+
+from ..database import ReadAsyncSessionLocal
+from ..deps import current_user
+from ..storage import UPLOAD_DIR, store
+from .. import models, previews
+
+router = APIRouter(prefix="/documents", tags=["Documents"])
+
+CHUNK_SIZE = int(os.getenv("KK_DOWNLOAD_CHUNK_KB", "256")) * 1024
+ACCEL_PREFIX = os.getenv("KK_DOWNLOAD_ACCEL_PREFIX", "")
+CACHE_CONTROL = "private, no-cache"  # browsers may keep a copy but revalidate (cheap 304)
+# A preview's name carries its blob's digest and size, so it never changes
+PREVIEW_CACHE_CONTROL = "private, max-age=86400"
+
+# Shown in the browser; anything else (HTML, SVG, ...) is sent as an attachment
+# so an uploaded file can never run script on the API's origin
+INLINE_TYPES = {"application/pdf", "image/jpeg", "image/png", "image/gif", "image/webp", "text/plain"}
+
+
+class DocumentFile(FileResponse):
+    # Starlette's default is 64 KiB; each chunk is a thread hop plus a send()
+    chunk_size = CHUNK_SIZE
+
+
+def _media_type(doc) -> str:
+    return (doc.content_type or guess_type(doc.original_name or doc.file_path)[0]
+            or "application/octet-stream")
+
+
+def _content_disposition(disposition: str, filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
+
+
+def _local_path(doc) -> Optional[str]:
+    # Only content-addressed blobs are served: a raw file_path may have come from
+    # a client-supplied users.doc_path. Rows from the old flat layout are served
+    # once `python -m app.storage migrate` has moved them into the store.
+    return store.local_path(doc.sha256) if doc.sha256 else None
+
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[float]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Takes precedence over If-Modified-Since; weak comparison
+        tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        return "*" in tags or etag.removeprefix("W/") in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            return timegm(parsedate_to_datetime(if_modified_since).utctimetuple()) >= int(last_modified)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+async def _load(doc_id: int, user) -> models.Document:
+    # Own short session: the connection is back in the pool before the body is sent
+    async with ReadAsyncSessionLocal() as db:
+        row = (await db.execute(
+            select(models.Document, models.Application.user_id.label("app_user_id"))
+            .outerjoin(models.Application, models.Application.id == models.Document.application_id)
+            .where(models.Document.id == doc_id)
+        )).first()
+    if row is None or (user.role != "admin" and user.id not in (row.Document.user_id, row.app_user_id)):
+        raise HTTPException(status_code=404, detail="Document not found")
+    return row.Document
+
+
+@router.api_route("/{doc_id}", methods=["GET", "HEAD"])
+async def download_document(doc_id: int, request: Request, download: bool = False, user=Depends(current_user)):
+    doc = await _load(doc_id, user)
+
+    path = _local_path(doc)
+    try:
+        st = await run_in_threadpool(os.stat, path) if path else None
+    except OSError:
+        st = None
+    if st is None:
+        raise HTTPException(status_code=410, detail="Document file is no longer available")
+
+    media_type = _media_type(doc)
+    disposition = "inline" if media_type in INLINE_TYPES and not download else "attachment"
+    last_modified = timegm(doc.uploaded_at.utctimetuple()) if doc.uploaded_at else st.st_mtime
+    headers = {
+        "Cache-Control": CACHE_CONTROL,
+        "Content-Disposition": _content_disposition(disposition, doc.original_name or os.path.basename(doc.file_path)),
+        "Last-Modified": formatdate(last_modified, usegmt=True),
+        "X-Content-Type-Options": "nosniff",
+    }
+    headers["ETag"] = f'"{doc.sha256}"'
+
+    if ACCEL_PREFIX:
+        headers["X-Accel-Redirect"] = ACCEL_PREFIX + os.path.relpath(path, UPLOAD_DIR)
+        return Response(media_type=media_type, headers=headers)
+
+    response = DocumentFile(path, headers=headers, media_type=media_type, stat_result=st)
+    if _not_modified(request, response.headers["etag"], last_modified):
+        return Response(status_code=304, headers={
+            k: response.headers[k] for k in ("etag", "last-modified", "cache-control")})
+    return response
+
+
+@router.get("/{doc_id}/preview")
+async def document_preview(doc_id: int, request: Request, size: Literal["thumb", "page"] = "thumb",
+                           user=Depends(current_user)):
+    doc = await _load(doc_id, user)
+    if not doc.sha256:
+        raise HTTPException(status_code=404, detail="No preview for this document")
+    try:
+        path = await previews.ensure(doc.sha256, size)
+    except previews.PreviewBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    if path is None:
+        raise HTTPException(status_code=404, detail="No preview for this document")
+
+    etag = f'"{doc.sha256}-{size}{previews.SIZES[size]}"'
+    headers = {"Cache-Control": PREVIEW_CACHE_CONTROL, "ETag": etag}
+    if _not_modified(request, etag, None):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type="image/jpeg", headers=headers)
@@ -0,0 +1,69 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime
+from ..database import get_async_db, get_read_db
+from .. import models, schemas
+from ..deps import current_user
+
+router = APIRouter(prefix="/notifications", tags=["Notifications"])
+
+PAGE_SIZE_DEFAULT = 20
+PAGE_SIZE_MAX = 100
+
+
+# Newest first, keyset-paged on id (the next page's cursor is returned in
+# X-Next-Cursor, as for /applications)
+@router.get("", response_model=List[schemas.NotificationOut])
+async def my_notifications(
+    response: Response,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: Optional[int] = None,
+    unread: bool = False,
+    db: AsyncSession = Depends(get_read_db),
+    user=Depends(current_user)
+):
+    stmt = select(models.Notification).where(models.Notification.user_id == user.id)
+    if cursor is not None:
+        stmt = stmt.where(models.Notification.id < cursor)
+    if unread:
+        stmt = stmt.where(models.Notification.read_at == None)
+    rows = (await db.execute(
+        stmt.order_by(models.Notification.id.desc()).limit(limit + 1)
+    )).scalars().all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = str(rows[-1].id)
+    return rows
+
+
+@router.post("/{notification_id}/read", response_model=schemas.NotificationOut)
+async def mark_read(
+    notification_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(current_user)
+):
+    n = await db.get(models.Notification, notification_id)
+    if n is None or n.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Notification not found")
+    if n.read_at is None:
+        n.read_at = datetime.utcnow()
+        await db.commit()
+        await db.refresh(n)
+    return n
+
+
+@router.post("/read-all")
+async def mark_all_read(
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(current_user)
+):
+    result = await db.execute(
+        update(models.Notification)
+        .where(models.Notification.user_id == user.id, models.Notification.read_at == None)
+        .values(read_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return {"updated": result.rowcount}
@@ -1,40 +1,50 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from ..database import get_db
-from .. import models, schemas
+from ..database import ReadAsyncSessionLocal, get_async_db
+from .. import models, schemas, serialization
 from ..deps import current_user
+from ..eligibility import get_index
+from ..response_cache import programs_cache
 
 router = APIRouter(prefix="/programs", tags=["Programs"])
 
+_rows = serialization.programs
+
+# Catalogue reads are served from programs_cache as pre-serialised JSON with an
+# ETag; the DB is only touched (on the read engine) when an entry is rebuilt.
+
 @router.get("", response_model=List[schemas.ProgramOut])
-def list_programs(crop_id: Optional[int] = None, season: Optional[str] = None, db: Session = Depends(get_db)):
-    q = db.query(models.Program).filter(models.Program.is_active == True)
-    if crop_id:
-        q = q.join(models.ProgramCrop, models.Program.id == models.ProgramCrop.program_id).filter(models.ProgramCrop.crop_id == crop_id)
-    if season and season != "Any":
-        q = q.filter(models.Program.season == season)
-    return q.order_by(models.Program.title.asc()).all()
+async def list_programs(request: Request, crop_id: Optional[int] = None, season: Optional[str] = None):
+    # Normalise so equivalent queries share one entry
+    crop_id = crop_id or None
+    season = season if season and season != "Any" else None
+
+    async def build():
+        q = _rows.select().where(models.Program.is_active == True)
+        if crop_id:
+            q = q.join(models.ProgramCrop, models.Program.id == models.ProgramCrop.program_id).where(models.ProgramCrop.crop_id == crop_id)
+        if season:
+            q = q.where(models.Program.season == season)
+        async with ReadAsyncSessionLocal() as db:
+            rows = (await db.execute(q.order_by(models.Program.title.asc()))).all()
+        return 200, _rows.dump_rows(rows)
+
+    return await programs_cache.respond(request, ("list", crop_id, season), build)
 
 @router.get("/{pid}", response_model=schemas.ProgramOut)
-def get_program(pid: int, db: Session = Depends(get_db)):
-    return db.query(models.Program).get(pid)
+async def get_program(pid: int, request: Request):
+    async def build():
+        async with ReadAsyncSessionLocal() as db:
+            row = (await db.execute(_rows.select().where(models.Program.id == pid))).first()
+        if row is None:
+            return 404, b'{"detail":"Program not found"}'
+        return 200, _rows.dump_row(row)
+
+    return await programs_cache.respond(request, ("detail", pid), build)
 
 @router.get("/match/me", response_model=List[schemas.ProgramOut])
-def match_for_me(db: Session = Depends(get_db), user = Depends(current_user), crop_id: Optional[int] = None, land_size: Optional[float] = None, season: Optional[str] = None):
+async def match_for_me(db: AsyncSession = Depends(get_async_db), user = Depends(current_user), crop_id: Optional[int] = None, land_size: Optional[float] = None, season: Optional[str] = None):
     # simple eligibility: crop in program_crops, land between min/max, season matches
-    q = db.query(models.Program).filter(models.Program.is_active == True)
-    if crop_id:
-        q = q.join(models.ProgramCrop, models.Program.id == models.ProgramCrop.program_id).filter(models.ProgramCrop.crop_id == crop_id)
-    progs = q.all()
-    res = []
-    for p in progs:
-        ok = True
-        if season and p.season and p.season != "Any" and p.season != season:
-            ok = False
-        if land_size is not None:
-            if p.min_land_size is not None and land_size < p.min_land_size: ok = False
-            if p.max_land_size is not None and land_size > p.max_land_size: ok = False
-        if ok:
-            res.append(p)
-    return res
+    # answered from the in-memory eligibility index (rebuilt when the catalogue changes)
+    return (await get_index(db)).match(crop_id=crop_id, land_size=land_size, season=season)
@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+from ..database import get_read_db
+from .. import models, schemas, search
+from ..deps import require_admin
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+PAGE_SIZE_DEFAULT = 20
+PAGE_SIZE_MAX = 100
+OFFSET_MAX = 1000  # ranked results: refine the query rather than paging this deep
+
+
+@router.get("", response_model=List[schemas.SearchHitOut])
+async def search_admin(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: Optional[List[Literal["user", "application"]]] = Query(None),
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    offset: int = Query(0, ge=0, le=OFFSET_MAX),
+    db: AsyncSession = Depends(get_read_db),
+    admin=Depends(require_admin)
+):
+    """
+    Find farmers by name / email / phone / district / state and applications by
+    a phrase from their remarks. Every word must match (the last one as a
+    prefix); results are ranked by relevance. When more results exist the next
+    page's offset is returned in X-Next-Offset.
+    """
+    if not search.supported(db.bind.dialect.name):
+        raise HTTPException(status_code=501, detail="Search is only available on SQLite")
+    match = search.match_query(q)
+    if match is None:
+        return []
+
+    kinds = [k for k in search.KINDS if not kind or k in kind]
+    hits = await search.search(db, match, kinds, limit + 1, offset)
+    if len(hits) > limit:
+        hits = hits[:limit]
+        response.headers["X-Next-Offset"] = str(offset + limit)
+
+    # Hydrate: one query for the applications, one for every user involved
+    app_ids = [h.id for h in hits if h.kind == "application"]
+    apps = {}
+    if app_ids:
+        apps = {a.id: a for a in (await db.execute(
+            select(models.Application).where(models.Application.id.in_(app_ids))
+        )).scalars()}
+    user_ids = {h.id for h in hits if h.kind == "user"} | {a.user_id for a in apps.values()}
+    users = {}
+    if user_ids:
+        users = {u.id: u for u in (await db.execute(
+            select(models.User).where(models.User.id.in_(user_ids))
+        )).scalars()}
+
+    out = []
+    for h in hits:
+        app = apps.get(h.id) if h.kind == "application" else None
+        user = users.get(app.user_id if app else h.id)
+        if user is None:  # row deleted since the index was read
+            continue
+        out.append({"kind": h.kind, "id": h.id, "rank": h.rank, "snippet": h.snippet,
+                    "user": user, "application": app})
+    return out
@@ -1,22 +1,17 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
-import os
-from datetime import datetime
 
-router = APIRouter(prefix="/upload", tags=["Upload"])
+from ..storage import save_upload
 
-UPLOAD_DIR = "uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+router = APIRouter(prefix="/upload", tags=["Upload"])
 
+# Registration ID scans: the returned path is stored as users.doc_path
 @router.post("")
 async def upload_file(file: UploadFile = File(...)):
     try:
-        filename = f"{datetime.utcnow().timestamp()}_{file.filename}"
-        filepath = os.path.join(UPLOAD_DIR, filename)
+        stored = await save_upload(file)
 
-        with open(filepath, "wb") as buffer:
-            buffer.write(await file.read())
-
-        return {"msg": "File uploaded", "path": filepath}
+        return {"msg": "File uploaded", "path": stored.path, "size": stored.size, "sha256": stored.sha256}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
-
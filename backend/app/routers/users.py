@@ -1,17 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from ..database import get_db
-from .. import models, schemas
+from .. import aggregates, jobs, models, schemas, serialization, storage
+from ..deps import invalidate_principal
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 # ✅ Get a user's details by ID (optional but useful)
 @router.get("/{user_id}", response_model=schemas.UserOut)
 def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user:
+    row = db.execute(serialization.users.select().where(models.User.id == user_id)).first()
+    if not row:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return serialization.json_response(serialization.users.dump_row(row))
 
 
 # ✅ Update user details (used by ReviewDetails page)
@@ -26,9 +27,30 @@ def update_user(user_id: int, payload: schemas.UserUpdate, db: Session = Depends
     if not update_data:
         raise HTTPException(status_code=400, detail="No data provided to update")
 
+    # Dashboard aggregates are grouped by the farmer's state/district: move this
+    # user's applications to their new group in the same transaction
+    moves_group = any(
+        f in update_data and update_data[f] != getattr(user, f) for f in ("state", "district")
+    )
+    if "doc_path" in update_data:
+        storage.scan_sha256(update_data["doc_path"])
+    aadhar_changed = "aadhar" in update_data and update_data["aadhar"] != user.aadhar
+    # A replaced ID scan may have been its blob's last reference
+    old_scan = storage.store.sha256_of(user.doc_path) if update_data.get("doc_path", user.doc_path) != user.doc_path else None
+    if moves_group:
+        aggregates.remove_sync(db.connection(), aggregates.for_user(user.id))
+
     for field, value in update_data.items():
         setattr(user, field, value)
 
+    if moves_group:
+        db.flush()
+        aggregates.add_sync(db.connection(), aggregates.for_user(user.id))
+    if aadhar_changed:
+        jobs.enqueue_sync(db, "applications.rescore", user_id=user.id)  # Aadhaar is a score input
     db.commit()
+    if old_scan:
+        storage.release(db.connection(), [old_scan])
     db.refresh(user)
+    invalidate_principal(user.id)
     return user
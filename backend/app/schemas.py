@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field, constr
 from typing import Optional, Literal, List
-from datetime import date
+from datetime import date, datetime
 
 class RegisterIn(BaseModel):
     name: str
@@ -93,11 +93,62 @@ class StatusUpdateIn(BaseModel):
     status: Literal["pending","under_review","approved","rejected"]
     remarks: Optional[str] = None  # ✅ shown to farmers via ApplicationOut.remarks
 
+class BulkStatusFilter(BaseModel):
+    status: Optional[Literal["pending","under_review","approved","rejected"]] = None
+    program_id: Optional[int] = None
+    season: Optional[str] = None
+
+class BulkStatusUpdateIn(BaseModel):
+    # Either explicit ids or a filter selecting the applications to move
+    ids: Optional[List[int]] = None
+    filter: Optional[BulkStatusFilter] = None
+    status: Literal["pending","under_review","approved","rejected"]
+    remarks: Optional[str] = None
+
+class BulkStatusOutcome(BaseModel):
+    id: int
+    ok: bool
+    status: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkStatusResultOut(BaseModel):
+    updated: int
+    failed: int
+    results: List[BulkStatusOutcome]
+
+class SummaryRowOut(BaseModel):
+    # Only the grouped-by dimensions are filled in
+    status: Optional[str] = None
+    program_id: Optional[int] = None
+    season: Optional[str] = None
+    state: Optional[str] = None
+    district: Optional[str] = None
+    count: int
+    acreage: float
+
+class SummaryOut(BaseModel):
+    total_count: int
+    total_acreage: float
+    rows: List[SummaryRowOut]
+
+class SearchHitOut(BaseModel):
+    kind: Literal["user", "application"]
+    id: int
+    rank: float
+    snippet: str  # matched terms wrapped in [ ]
+    user: UserOut
+    application: Optional[ApplicationOut] = None
+
 class NotificationOut(BaseModel):
     id: int
     type: str
     title: str
     body: str
+    application_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    read_at: Optional[datetime] = None
+    class Config:
+        from_attributes = True
 
 class UserUpdate(BaseModel):
     name: Optional[str] = None
@@ -119,13 +170,22 @@ class DocumentOut(BaseModel):
     id: int
     kind: str
     file_path: str
+    size_bytes: Optional[int] = None
+    sha256: Optional[str] = None
+    original_name: Optional[str] = None
+    content_type: Optional[str] = None
     class Config:
         from_attributes = True
 
+class AdminDocumentOut(DocumentOut):
+    # GET /documents/{id}/preview?size=thumb|page; None for files with no preview
+    thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
+
 class AdminApplicationDetailOut(BaseModel):
     # A single payload that returns everything the admin needs to see
     application: ApplicationOut
     user: UserOut
     program: ProgramOut
     crop: CropOut
-    documents: List[DocumentOut]
\ No newline at end of file
+    documents: List[AdminDocumentOut]
\ No newline at end of file
@@ -0,0 +1,246 @@
+"""Review-priority scores for applications in the queue (pending / under_review).
+
+Each application gets 0-100 points, higher = review first:
+
+    acreage within the program's min/max land size   30
+    season matches the program (or program is Any)   15
+    farmer has an Aadhaar number on file             20
+    supporting documents (full marks at DOC_TARGET)  20
+    days waiting (full marks at WAIT_FULL_DAYS)      15
+
+Inputs are loaded as columns (one query for the applications, one for their
+document counts; programs and the farmers with an Aadhaar number as sorted
+arrays, looked up with searchsorted instead of joined), scored in one
+vectorised NumPy pass and only rows whose score changed are written back with
+an executemany UPDATE. The waiting term moves in whole days, so a full pass
+rewrites little more than the rows that changed since the last one.
+
+Writers rescore just the applications they touched (via the job queue or
+inline for bulk imports); the API also runs a full pass every
+KK_RESCORE_INTERVAL seconds to age the waiting term. By hand:
+
+    python -m app.scoring [--unscored]
+"""
+from typing import Dict, Iterable, Optional
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+
+import numpy as np
+from sqlalchemy import bindparam, func, select, true
+from sqlalchemy.engine import Connection, Engine
+
+from . import models
+
+RESCORE_INTERVAL_SECONDS = float(os.getenv("KK_RESCORE_INTERVAL", "3600"))  # 0 disables
+CHUNK_SIZE = int(os.getenv("KK_RESCORE_CHUNK", "200000"))
+
+QUEUE_STATUSES = ("pending", "under_review")
+
+W_ACREAGE, W_SEASON, W_AADHAR, W_DOCS, W_WAIT = 30.0, 15.0, 20.0, 20.0, 15.0
+DOC_TARGET = 2
+WAIT_FULL_DAYS = 30
+
+log = logging.getLogger("kissan.scoring")
+
+A = models.Application
+_update = (
+    A.__table__.update()
+    .where(A.__table__.c.id == bindparam("_id"))
+    .values(score=bindparam("_score"))
+)
+
+
+def _julian_days(col, dialect_name: str):
+    # Timestamps as float days in SQL: converting a million datetimes in Python
+    # would cost more than the whole scoring pass
+    if dialect_name == "postgresql":
+        return func.extract("epoch", col) / 86400.0
+    return func.julianday(col)
+
+
+def _now_days(dialect_name: str) -> float:
+    days = time.time() / 86400.0  # stored timestamps are naive UTC
+    if dialect_name == "postgresql":
+        return days
+    return days + 2440587.5  # Unix epoch as a Julian day
+
+
+def _fetch(conn: Connection, stmt) -> list:
+    # Plain DBAPI tuples: building a SQLAlchemy Row per application costs about
+    # as much as the query itself. Only used for columns without result
+    # processors (numbers, strings, julianday floats)
+    result = conn.execute(stmt)
+    try:
+        return result.cursor.fetchall()
+    finally:
+        result.close()
+
+
+def _programs(conn: Connection) -> Dict[str, np.ndarray]:
+    P = models.Program
+    rows = conn.execute(select(P.id, P.min_land_size, P.max_land_size, P.season).order_by(P.id)).all()
+    ids, lo, hi, season = zip(*(rows or [(-1, None, None, None)]))  # sentinel keeps indexing valid
+    return {
+        "id": np.array(ids, dtype=np.int64),
+        "min": np.array(lo, dtype=np.float64),  # None -> nan
+        "max": np.array(hi, dtype=np.float64),
+        "season": np.array(season, dtype=object),
+    }
+
+
+def _aadhar_users(conn: Connection, user_ids=None) -> np.ndarray:
+    """Sorted ids of farmers with an Aadhaar number (restricted to `user_ids`,
+    a subquery, for incremental passes)."""
+    U = models.User
+    q = select(U.id).where(func.coalesce(U.aadhar, "") != "").order_by(U.id)
+    if user_ids is not None:
+        q = q.where(U.id.in_(user_ids))
+    return np.array([r[0] for r in _fetch(conn, q)], dtype=np.int64)
+
+
+def _lookup(sorted_ids: np.ndarray, values: np.ndarray):
+    """Positions of `values` in `sorted_ids` (clamped) and whether each was found."""
+    if not len(sorted_ids):
+        return np.zeros(len(values), dtype=np.int64), np.zeros(len(values), dtype=bool)
+    idx = np.minimum(np.searchsorted(sorted_ids, values), len(sorted_ids) - 1)
+    return idx, sorted_ids[idx] == values
+
+
+def compute(acreage, season, program_idx, program_found, has_aadhar, doc_count, days_waiting, programs):
+    """Vectorised score for arrays of applications (program_idx indexes `programs`)."""
+    lo = programs["min"][program_idx]
+    hi = programs["max"][program_idx]
+    in_bounds = (np.isnan(lo) | (acreage >= lo)) & (np.isnan(hi) | (acreage <= hi)) & (acreage > 0)
+
+    p_season = programs["season"][program_idx]
+    season_ok = (p_season == None) | (p_season == "Any") | (p_season == season)  # noqa: E711 (elementwise)
+
+    docs = np.minimum(doc_count, DOC_TARGET) / DOC_TARGET
+    wait = np.minimum(np.floor(np.maximum(days_waiting, 0)), WAIT_FULL_DAYS) / WAIT_FULL_DAYS
+
+    score = (
+        W_ACREAGE * (in_bounds & program_found)
+        + W_SEASON * (season_ok.astype(bool) & program_found)
+        + W_AADHAR * has_aadhar
+        + W_DOCS * docs
+        + W_WAIT * wait
+    )
+    return np.round(score, 1)
+
+
+def rescore(conn: Connection, where=None, programs: Optional[dict] = None,
+            aadhar_users: Optional[np.ndarray] = None) -> dict:
+    """Score the queued applications matching `where` (default: all) and write
+    back the changed scores. Caller's transaction. Full passes pass in the
+    program and Aadhaar arrays once for all their chunks."""
+    dialect = conn.dialect.name
+    programs = programs if programs is not None else _programs(conn)
+    D = models.Document
+    cond = A.status.in_(QUEUE_STATUSES)
+    if where is not None:
+        cond = cond & where
+
+    rows = _fetch(conn, select(
+        A.id, A.program_id, A.acreage, A.season, _julian_days(A.submitted_at, dialect), A.score, A.user_id,
+    ).where(cond).order_by(A.id))
+    if not rows:
+        return {"scored": 0, "updated": 0}
+
+    ids, program_id, acreage, season, submitted, old, user_id = zip(*rows)
+    ids = np.array(ids, dtype=np.int64)
+    if aadhar_users is None:
+        aadhar_users = _aadhar_users(conn, select(A.user_id).where(cond))
+    _, has_aadhar = _lookup(aadhar_users, np.array(user_id, dtype=np.int64))
+
+    # Document counts, aligned with ids (both sorted by id)
+    doc_rows = _fetch(conn, (
+        select(D.application_id, func.count())
+        .where(D.application_id.in_(select(A.id).where(cond)))
+        .group_by(D.application_id)
+    ))
+    doc_count = np.zeros(len(ids))
+    if doc_rows:
+        doc_ids, counts = (np.array(c) for c in zip(*doc_rows))
+        pos = np.searchsorted(ids, doc_ids)
+        doc_count[pos] = counts
+
+    idx, found = _lookup(programs["id"], np.array(program_id, dtype=np.int64))
+
+    new = compute(
+        acreage=np.array(acreage, dtype=np.float64),
+        season=np.array(season, dtype=object),
+        program_idx=idx,
+        program_found=found,
+        has_aadhar=has_aadhar,
+        doc_count=doc_count,
+        days_waiting=_now_days(dialect) - np.array(submitted, dtype=np.float64),
+        programs=programs,
+    )
+
+    old = np.array(old, dtype=np.float64)  # None -> nan
+    changed = np.flatnonzero(np.isnan(old) | (old != new))
+    if len(changed):
+        conn.execute(_update, [{"_id": int(i), "_score": float(s)} for i, s in zip(ids[changed], new[changed])])
+    return {"scored": len(ids), "updated": len(changed)}
+
+
+def for_ids(app_ids: Iterable[int]):
+    return A.id.in_(list(app_ids))
+
+
+def for_user(user_id: int):
+    return A.user_id == user_id
+
+
+def rescore_all(engine: Engine, unscored_only: bool = False, chunk_size: int = CHUNK_SIZE) -> dict:
+    """Full pass over the queue in id ranges, one transaction per chunk."""
+    total = {"scored": 0, "updated": 0}
+    base = A.score == None if unscored_only else true()  # noqa: E711
+    with engine.connect() as conn:
+        programs = _programs(conn)
+        aadhar_users = _aadhar_users(conn)
+        bounds = conn.execute(select(func.min(A.id), func.max(A.id))).one()
+    if bounds[0] is None:
+        return total
+    for start in range(bounds[0], bounds[1] + 1, chunk_size):
+        with engine.begin() as conn:
+            res = rescore(conn, base & (A.id >= start) & (A.id < start + chunk_size), programs, aadhar_users)
+        for k in total:
+            total[k] += res[k]
+    return total
+
+
+async def rescore_loop(engine: Engine, interval: float = RESCORE_INTERVAL_SECONDS):
+    """Periodic full pass (keeps the waiting term current), jittered like the
+    token compaction loop."""
+    from fastapi.concurrency import run_in_threadpool
+
+    while True:
+        await asyncio.sleep(interval * random.uniform(0.9, 1.1))
+        try:
+            t0 = time.perf_counter()
+            res = await run_in_threadpool(rescore_all, engine)
+            log.info("rescore: %s in %.2fs", res, time.perf_counter() - t0)
+        except Exception:
+            log.exception("rescore failed")
+
+
+def main():
+    from .database import engine
+
+    ap = argparse.ArgumentParser(description="Recompute review-priority scores")
+    ap.add_argument("--unscored", action="store_true", help="only applications without a score yet")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    res = rescore_all(engine, unscored_only=args.unscored)
+    print(json.dumps({**res, "seconds": round(time.perf_counter() - t0, 3)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Admin full-text search over farmers and application remarks (SQLite FTS5).
+
+Two external-content FTS5 tables index the rows in place (no copy of the text
+is stored):
+
+    users_fts         name, email, phone, district, state   -> users.id
+    applications_fts  remarks                               -> applications.id
+
+Triggers on users / applications keep them in sync with every writer,
+including Core bulk inserts and updates. install() is called from
+migrations.upgrade(); an existing database is indexed the first time it runs.
+The index can be rebuilt and compacted by hand:
+
+    python -m app.search [--rebuild]
+"""
+from typing import List, Optional, Sequence
+import argparse
+import json
+import re
+import time
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+KINDS = ("user", "application")
+
+# Column weights for bm25(): a name hit outranks an email/phone hit, which
+# outranks matching on location alone
+_USER_RANK = "bm25(10.0, 4.0, 4.0, 2.0, 1.0)"
+
+_DDL = (
+    # prefix indexes make "typing ahead" queries (ram*, 98765*) index lookups
+    """CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+        name, email, phone, district, state,
+        content='users', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')""",
+    """CREATE TRIGGER IF NOT EXISTS users_fts_ai AFTER INSERT ON users BEGIN
+        INSERT INTO users_fts(rowid, name, email, phone, district, state)
+        VALUES (new.id, new.name, new.email, new.phone, new.district, new.state);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS users_fts_ad AFTER DELETE ON users BEGIN
+        INSERT INTO users_fts(users_fts, rowid, name, email, phone, district, state)
+        VALUES ('delete', old.id, old.name, old.email, old.phone, old.district, old.state);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS users_fts_au
+    AFTER UPDATE OF name, email, phone, district, state ON users BEGIN
+        INSERT INTO users_fts(users_fts, rowid, name, email, phone, district, state)
+        VALUES ('delete', old.id, old.name, old.email, old.phone, old.district, old.state);
+        INSERT INTO users_fts(rowid, name, email, phone, district, state)
+        VALUES (new.id, new.name, new.email, new.phone, new.district, new.state);
+    END""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS applications_fts USING fts5(
+        remarks,
+        content='applications', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')""",
+    """CREATE TRIGGER IF NOT EXISTS applications_fts_ai AFTER INSERT ON applications BEGIN
+        INSERT INTO applications_fts(rowid, remarks) VALUES (new.id, new.remarks);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS applications_fts_ad AFTER DELETE ON applications BEGIN
+        INSERT INTO applications_fts(applications_fts, rowid, remarks) VALUES ('delete', old.id, old.remarks);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS applications_fts_au AFTER UPDATE OF remarks ON applications BEGIN
+        INSERT INTO applications_fts(applications_fts, rowid, remarks) VALUES ('delete', old.id, old.remarks);
+        INSERT INTO applications_fts(rowid, remarks) VALUES (new.id, new.remarks);
+    END""",
+)
+
+_TABLES = ("users_fts", "applications_fts")
+
+
+def supported(dialect_name: str) -> bool:
+    return dialect_name == "sqlite"
+
+
+def install(engine: Engine):
+    """Create the FTS tables and triggers if missing; index existing rows when
+    the tables are new. No-op on databases other than SQLite."""
+    if not supported(engine.dialect.name):
+        return
+    with engine.begin() as conn:
+        existing = set(conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('users_fts', 'applications_fts')"
+        )).scalars())
+        for stmt in _DDL:
+            conn.execute(text(stmt))
+        conn.execute(text(f"INSERT INTO users_fts(users_fts, rank) VALUES ('rank', '{_USER_RANK}')"))
+        for table in _TABLES:
+            if table not in existing:
+                conn.execute(text(f"INSERT INTO {table}({table}) VALUES ('rebuild')"))
+
+
+def rebuild(conn: Connection):
+    """Re-index from the content tables and merge the index b-trees."""
+    for table in _TABLES:
+        conn.execute(text(f"INSERT INTO {table}({table}) VALUES ('rebuild')"))
+        conn.execute(text(f"INSERT INTO {table}({table}) VALUES ('optimize')"))
+
+
+_WORD = re.compile(r"\w", re.UNICODE)
+
+
+def match_query(q: str) -> Optional[str]:
+    """Turn free text into an FTS5 query: every word must match, the last one as
+    a prefix (so partially typed names / phone numbers find something). Words are
+    quoted, so FTS5 operators and punctuation in the input are taken literally."""
+    words = [w for w in q.split() if _WORD.search(w)]
+    if not words:
+        return None
+    phrases = ['"' + w.replace('"', '""') + '"' for w in words]
+    phrases[-1] += "*"
+    return " ".join(phrases)
+
+
+# Every match is ranked, so pages are in true bm25 order at any offset; FTS5
+# computes rank inside the MATCH scan and each table keeps only its top n.
+_BRANCH = """SELECT '{kind}' AS kind, rowid AS id, rank, snippet({table}, {col}, '[', ']', '…', {tokens}) AS snippet
+    FROM {table} WHERE {table} MATCH :q ORDER BY rank LIMIT :n"""
+
+_BRANCHES = {
+    "user": _BRANCH.format(kind="user", table="users_fts", col=-1, tokens=8),
+    "application": _BRANCH.format(kind="application", table="applications_fts", col=0, tokens=12),
+}
+
+
+async def search(db: AsyncSession, match: str, kinds: Sequence[str], limit: int, offset: int) -> List[tuple]:
+    """(kind, id, rank, snippet) rows, best first (lower bm25 rank is better).
+
+    Each table returns its own top limit + offset, then the lists are merged and
+    the requested page cut out."""
+    branches = " UNION ALL ".join(f"SELECT * FROM ({_BRANCHES[k]})" for k in kinds)
+    stmt = text(f"SELECT kind, id, rank, snippet FROM ({branches}) ORDER BY rank LIMIT :limit OFFSET :offset")
+    rows = await db.execute(stmt, {"q": match, "n": limit + offset, "limit": limit, "offset": offset})
+    return rows.all()
+
+
+def main():
+    from .database import engine
+    from .migrations import upgrade
+
+    ap = argparse.ArgumentParser(description="Build / rebuild the admin search index")
+    ap.add_argument("--rebuild", action="store_true", help="re-index everything and compact")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    upgrade(engine)  # creates and fills the index if missing
+    if args.rebuild and supported(engine.dialect.name):
+        with engine.begin() as conn:
+            rebuild(conn)
+    print(json.dumps({"seconds": round(time.perf_counter() - t0, 3)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,43 @@
 from datetime import datetime, timedelta
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import secrets
+import threading
+import time
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 
+from . import metrics
+
 # 🔐 Must match what's in deps.py
 SECRET_KEY = "supersecret"          # ⚠️ Change this to a long, random string in production!
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 REFRESH_TOKEN_EXPIRE_DAYS = 7
+RESET_TOKEN_EXPIRE_MINUTES = int(os.getenv("KK_RESET_TOKEN_MINUTES", "30"))
+# Live refresh tokens kept per user (one per device/session); logging in again
+# beyond this drops the oldest.
+MAX_REFRESH_TOKENS_PER_USER = int(os.getenv("KK_MAX_REFRESH_TOKENS", "10"))
+
+# bcrypt work factor. Raising it makes existing hashes "need update"; they are
+# rehashed transparently on the user's next successful login.
+BCRYPT_ROUNDS = int(os.getenv("KK_BCRYPT_ROUNDS", "12"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing runs in a dedicated process pool so bcrypt never holds the
+# API worker's GIL. KK_HASH_WORKERS=0 falls back to threads (dev/tests).
+HASH_WORKERS = int(os.getenv("KK_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_MAX_PENDING = int(os.getenv("KK_HASH_MAX_PENDING", "64"))
+HASH_TIMEOUT_SECONDS = float(os.getenv("KK_HASH_TIMEOUT", "5"))
+# Hashing workers run at this much lower CPU priority, so on a busy host the
+# API processes get the CPU first and hashing takes what is left
+HASH_NICE = int(os.getenv("KK_HASH_NICE", "10"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 # -----------------------
 # ✅ Password Hashing
@@ -19,27 +48,143 @@ def hash_pw(password: str) -> str:
 def verify_pw(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_pw(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    # -> (ok, new_hash); new_hash is set when the stored hash uses an outdated cost
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+# -----------------------
+# ✅ Password Hashing (process pool)
+# -----------------------
+class HasherBusy(Exception):
+    """Raised when the hashing queue is full or a hash did not finish in time."""
+
+
+hash_queue_depth = metrics.Gauge(
+    "kk_password_hash_queue_depth", "Password hash/verify jobs submitted and not yet finished"
+)
+hash_latency = metrics.Histogram(
+    "kk_password_hash_seconds", "Password hash/verify latency including queueing", labels=("op",),
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0),
+)
+hash_rejected = metrics.Counter(
+    "kk_password_hash_rejected_total", "Password hash/verify jobs rejected or timed out", labels=("reason",)
+)
+
+_pool: Optional[Executor] = None
+_pending = 0
+_pending_lock = threading.Lock()  # freed from the pool's callback thread
+
+
+def _get_pool() -> Executor:
+    global _pool
+    if _pool is None:
+        if HASH_WORKERS > 0:
+            # spawn: workers import only app.security, never the forked app state
+            _pool = ProcessPoolExecutor(
+                max_workers=HASH_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_lower_priority, initargs=(HASH_NICE,),
+            )
+        else:
+            _pool = ThreadPoolExecutor(thread_name_prefix="hash")
+    return _pool
+
+
+def _lower_priority(increment: int):
+    if increment and hasattr(os, "nice"):
+        os.nice(increment)
+
+
+def shutdown_hasher():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _submit(fn, *args) -> Future:
+    """Queue a job under the HASH_MAX_PENDING bound. The slot is held until the
+    job ends, not until the caller stops waiting, so a timed-out bcrypt still
+    counts against the bound while it runs."""
+    global _pending
+    with _pending_lock:
+        if _pending >= HASH_MAX_PENDING:
+            hash_rejected.inc(reason="queue_full")
+            raise HasherBusy("Password hashing queue is full")
+        _pending += 1
+        hash_queue_depth.set(_pending)
+    try:
+        future = _get_pool().submit(fn, *args)
+    except BaseException:
+        _free_slot()
+        raise
+    future.add_done_callback(_free_slot)
+    return future
+
+
+def _free_slot(_future=None):
+    global _pending
+    with _pending_lock:
+        _pending -= 1
+        hash_queue_depth.set(_pending)
+
+
+async def _run_hash_job(op: str, fn, *args):
+    started = time.perf_counter()
+    future = _submit(fn, *args)
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), HASH_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        future.cancel()  # only stops it if a worker has not picked it up yet
+        hash_rejected.inc(reason="timeout")
+        raise HasherBusy("Password hashing timed out")
+    except BrokenProcessPool:
+        # A worker died; drop the pool so the next call starts a fresh one
+        hash_rejected.inc(reason="pool_broken")
+        shutdown_hasher()
+        raise HasherBusy("Password hashing workers restarted")
+    finally:
+        hash_latency.observe(time.perf_counter() - started, op=op)
+
+
+async def hash_pw_async(password: str) -> str:
+    return await _run_hash_job("hash", hash_pw, password)
+
+
+async def verify_and_update_pw_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return await _run_hash_job("verify", verify_and_update_pw, plain_password, hashed_password)
+
 # -----------------------
 # ✅ Token Creation
 # -----------------------
 def make_access_token(user_id: int, role: str) -> str:
-    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    now = datetime.utcnow()
+    expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     payload = {
         "sub": str(user_id),       # 👈 required by deps.py
         "role": role,
+        "iat": now,                # 👈 keys the principal cache in deps.py
         "exp": expire,
         "typ": "access"
     }
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
-def make_refresh_token(user_id: int) -> str:
+def make_refresh_token(user_id: int) -> Tuple[str, datetime]:
     expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
     payload = {
         "sub": str(user_id),       # 👈 required
         "exp": expire,
+        "jti": secrets.token_hex(8),  # 👈 two logins in the same second still differ
         "typ": "refresh"
     }
-    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM), expire
+
+def make_reset_token() -> Tuple[str, datetime]:
+    return secrets.token_urlsafe(32), datetime.utcnow() + timedelta(minutes=RESET_TOKEN_EXPIRE_MINUTES)
+
+def hash_token(token: str) -> str:
+    # Tokens are high-entropy, so a plain (unsalted, fast) SHA-256 is enough
+    return hashlib.sha256(token.encode()).hexdigest()
 
 # -----------------------
 # ✅ Token Decoding
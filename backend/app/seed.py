@@ -1,90 +1,100 @@
-from .database import Base, engine, SessionLocal
-from . import models
-from passlib.hash import bcrypt
+from sqlalchemy import insert, select
+from sqlalchemy.engine import Engine
 
+from .database import engine
+from . import models, security
+from .migrations import upgrade
+
+# ----------------------------------------------------------------------
+# Demo / reference data
+# ----------------------------------------------------------------------
+CROPS = ["Rice", "Wheat", "Maize", "Cotton", "Sugarcane", "Pulses"]
+
+# (title, description, authority, season, min_land_size, max_land_size)
+PROGRAMS = [
+    (
+        "Kharif Input Subsidy",
+        "Support for input costs during Kharif season for smallholders.",
+        "State Agriculture Dept.",
+        "Kharif",
+        0.5,
+        5.0,
+    ),
+    (
+        "Smallholder Equipment Grant",
+        "Grant for small-scale farm equipment purchase.",
+        "Central Agri Scheme",
+        "Any",
+        0.0,
+        10.0,
+    ),
+    (
+        "Soil Health Card",
+        "Soil testing and advisory services subsidy.",
+        "State Agriculture Dept.",
+        "Any",
+        None,
+        None,
+    ),
+]
+# Simple: all demo programs support Rice + Wheat
+PROGRAM_CROPS = ["Rice", "Wheat"]
+
+ADMIN_EMAIL = "admin@kissan.com"
+ADMIN_PASSWORD = "Admin@12345"
 
-def seed():
-    # Create all tables if they don't exist
-    Base.metadata.create_all(bind=engine)
-    db = SessionLocal()
 
-    # ----------------------------------------------------------------------
-    # Crops
-    # ----------------------------------------------------------------------
-    crops = ["Rice", "Wheat", "Maize", "Cotton", "Sugarcane", "Pulses"]
-    for c in crops:
-        if not db.query(models.Crop).filter_by(name=c).first():
-            db.add(models.Crop(name=c))
-    db.commit()
+def _insert_ignore(engine: Engine, table):
+    """INSERT ... ON CONFLICT DO NOTHING for the engine's dialect."""
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif engine.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert(table).prefix_with("IGNORE")  # MySQL
+    return dialect_insert(table).on_conflict_do_nothing()
 
-    # ----------------------------------------------------------------------
-    # Programs
-    # ----------------------------------------------------------------------
-    if not db.query(models.Program).first():
-        progs = [
-            (
-                "Kharif Input Subsidy",
-                "Support for input costs during Kharif season for smallholders.",
-                "State Agriculture Dept.",
-                "Kharif",
-                0.5,
-                5.0,
-            ),
-            (
-                "Smallholder Equipment Grant",
-                "Grant for small-scale farm equipment purchase.",
-                "Central Agri Scheme",
-                "Any",
-                0.0,
-                10.0,
-            ),
-            (
-                "Soil Health Card",
-                "Soil testing and advisory services subsidy.",
-                "State Agriculture Dept.",
-                "Any",
-                None,
-                None,
-            ),
-        ]
-        for t, d, a, s, minl, maxl in progs:
-            p = models.Program(
-                title=t,
-                description=d,
-                authority=a,
-                season=s,
-                min_land_size=minl,
-                max_land_size=maxl,
-                is_active=True,
-            )
-            db.add(p)
-        db.commit()
 
-        # Link crops (simple: all programs support Rice + Wheat)
-        rice = db.query(models.Crop).filter_by(name="Rice").first()
-        wheat = db.query(models.Crop).filter_by(name="Wheat").first()
-        for prog in db.query(models.Program).all():
-            db.add(models.ProgramCrop(program_id=prog.id, crop_id=rice.id))
-            db.add(models.ProgramCrop(program_id=prog.id, crop_id=wheat.id))
-        db.commit()
+def seed_data(engine: Engine = engine):
+    """Idempotent bulk upserts of reference data; one transaction, a handful of statements."""
+    with engine.begin() as conn:
+        # Crops (unique on name)
+        conn.execute(_insert_ignore(engine, models.Crop.__table__), [{"name": c} for c in CROPS])
 
-    # ----------------------------------------------------------------------
-    # Admin User
-    # ----------------------------------------------------------------------
-    if not db.query(models.User).filter_by(email="admin@kissan.com").first():
-        db.add(
-            models.User(
-            name="Admin",
-            email="admin@kissan.com",
-            password_hash=bcrypt.hash("Admin@12345"),
-            role="admin",
-            state="Andhra Pradesh",
-            district="HQ"     
-            )
-        )
-    db.commit()
+        # Programs: only when the catalogue is empty, so admin edits/deletions of
+        # the demo programs are never undone by a later bootstrap.
+        if conn.execute(select(models.Program.id).limit(1)).first() is None:
+            program_ids = conn.execute(
+                insert(models.Program.__table__).returning(models.Program.id),
+                [
+                    {"title": t, "description": d, "authority": a, "season": s,
+                     "min_land_size": minl, "max_land_size": maxl, "is_active": True}
+                    for t, d, a, s, minl, maxl in PROGRAMS
+                ],
+            ).scalars().all()
+            crop_ids = conn.execute(
+                select(models.Crop.id).where(models.Crop.name.in_(PROGRAM_CROPS))
+            ).scalars().all()
+            conn.execute(_insert_ignore(engine, models.ProgramCrop.__table__), [
+                {"program_id": pid, "crop_id": cid} for pid in program_ids for cid in crop_ids
+            ])
 
-    db.close()
+        # Admin user (unique on email). Only hash when actually inserting.
+        if conn.execute(select(models.User.id).where(models.User.email == ADMIN_EMAIL)).first() is None:
+            conn.execute(_insert_ignore(engine, models.User.__table__), [{
+                "name": "Admin",
+                "email": ADMIN_EMAIL,
+                "password_hash": security.hash_pw(ADMIN_PASSWORD),
+                "role": "admin",
+                "state": "Andhra Pradesh",
+                "district": "HQ",
+            }])
+
+
+def seed():
+    # Create missing tables / columns / indexes, then reference data
+    upgrade(engine)
+    seed_data(engine)
 
 
 if __name__ == "__main__":
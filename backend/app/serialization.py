@@ -0,0 +1,66 @@
+"""Fast JSON path for large list responses.
+
+Returning ORM objects with response_model=List[X] costs, per row: building the
+ORM object, Pydantic validation from its attributes, dumping to Python dicts,
+then stdlib json.dumps. For a 10k-row page that is most of the request's CPU.
+
+A RowSerializer instead selects exactly the schema's fields as plain row tuples
+and writes them straight to JSON bytes with orjson (the columns *are* the
+schema, so there is nothing left to validate). Endpoints opt in by returning
+json_response(serializer.dump_rows(rows), response) -- a plain Response around
+the bytes, since FastAPI's own ORJSONResponse would still validate and dump
+every row first; response_model stays on the route for the OpenAPI docs. KK_FAST_JSON=0 switches the opted-in endpoints
+back to FastAPI's default path.
+
+    python -m bench.serialization_bench
+"""
+from typing import Iterable, Optional, Sequence
+import os
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+from sqlalchemy import select
+
+from . import models, schemas
+
+FAST_JSON = os.getenv("KK_FAST_JSON", "1") == "1"
+
+
+class RowSerializer:
+    def __init__(self, schema: type[BaseModel], model):
+        self.schema = schema
+        self.fields = tuple(schema.model_fields)
+        # Fails at import time if the model lacks a schema field
+        self.columns = [getattr(model, f) for f in self.fields]
+
+    def select(self, *extra):
+        """SELECT the schema's columns (plus `extra` columns after them, e.g. a
+        sort key for a cursor; they are ignored when dumping)."""
+        return select(*self.columns, *extra)
+
+    def row_dict(self, row: Sequence) -> dict:
+        return dict(zip(self.fields, row))
+
+    def dump_rows(self, rows: Iterable[Sequence]) -> bytes:
+        fields = self.fields
+        return orjson.dumps([dict(zip(fields, row)) for row in rows])
+
+    def dump_row(self, row: Sequence) -> bytes:
+        return orjson.dumps(self.row_dict(row))
+
+
+def json_response(body: bytes, response: Optional[Response] = None, status_code: int = 200) -> Response:
+    """Wrap pre-serialised JSON, keeping headers set on the endpoint's injected
+    Response (e.g. X-Next-Cursor); FastAPI drops those when a Response is returned."""
+    out = Response(content=body, status_code=status_code, media_type="application/json")
+    if response is not None:
+        for key, value in response.headers.items():
+            if key.lower() not in ("content-length", "content-type"):
+                out.headers[key] = value
+    return out
+
+
+applications = RowSerializer(schemas.ApplicationOut, models.Application)
+programs = RowSerializer(schemas.ProgramOut, models.Program)
+users = RowSerializer(schemas.UserOut, models.User)
@@ -0,0 +1,431 @@
+"""Content-addressed document storage.
+
+Every uploaded file is stored once, under the SHA-256 of its bytes, sharded by
+the first two byte pairs of the digest so no directory grows past 65536
+entries:
+
+    uploads/ab/cd/abcdef0123...
+
+Uploads are copied in fixed-size chunks into a staging file inside the store,
+hashed while they are written, then renamed to their content address (or
+dropped if that content is already stored: a farmer re-uploading the same
+Aadhaar copy costs no extra space). Memory per upload is one chunk regardless
+of file size, and a failed / oversized upload never leaves a partial blob.
+
+Blobs are shared, so a blob's references are the Document rows with its
+sha256 (plus users.doc_path for ID scans uploaded at registration). release()
+deletes blobs whose last reference is gone; `gc` sweeps any that were missed.
+Neither touches blobs younger than GC_GRACE_SECONDS, which covers an upload
+that is stored but whose Document is not committed yet. Files derived from a
+blob (previews, app.previews) sit next to it as <sha256>.<suffix> and are
+deleted with it.
+
+Where blobs live is a BlobStore; "local" (KK_STORAGE_BACKEND) is the only one
+so far. Files from the old flat layout are moved in with
+
+    python -m app.storage migrate [--workers 8] [--dry-run]
+    python -m app.storage gc [--dry-run]
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import secrets
+import tempfile
+import time
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select, update
+from sqlalchemy.engine import Connection, Engine
+
+from . import models
+
+UPLOAD_DIR = os.getenv("KK_UPLOAD_DIR", "uploads")
+BACKEND = os.getenv("KK_STORAGE_BACKEND", "local")
+MAX_UPLOAD_BYTES = int(float(os.getenv("KK_MAX_UPLOAD_MB", "25")) * 1024 * 1024)
+GC_GRACE_SECONDS = float(os.getenv("KK_STORAGE_GC_GRACE", "3600"))
+CHUNK_SIZE = 1024 * 1024
+
+_SHA256 = re.compile(r"[0-9a-f]{64}")
+
+
+def _file_mode() -> int:
+    # mkstemp creates 0600 files; blobs get what a plain open() would have
+    mask = os.umask(0)
+    os.umask(mask)
+    return 0o666 & ~mask
+
+
+FILE_MODE = _file_mode()
+
+
+class StoredFile(NamedTuple):
+    path: str
+    size: int
+    sha256: str
+    created: bool  # False when identical content was already stored
+
+
+def safe_filename(name: str) -> str:
+    # Drop any client-supplied directories and spaces
+    return os.path.basename(name or "upload").replace(" ", "_")
+
+
+def _too_large():
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large (max {MAX_UPLOAD_BYTES // (1024 * 1024)} MB)",
+    )
+
+
+# ---------------------------------------------------------
+# Blob stores
+# ---------------------------------------------------------
+class LocalBlobStore:
+    """Blobs as files under `root`, at root/ab/cd/<sha256>."""
+
+    def __init__(self, root: str = UPLOAD_DIR):
+        self.root = root
+        self.staging = os.path.join(root, ".staging")
+
+    def location(self, sha256: str) -> str:
+        # What Document.file_path records
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def local_path(self, sha256: str) -> Optional[str]:
+        return self.location(sha256)
+
+    def sha256_of(self, location: Optional[str]) -> Optional[str]:
+        """The digest a location() points at, or None for other paths."""
+        if not location:
+            return None
+        sha = os.path.basename(location)
+        return sha if _SHA256.fullmatch(sha) and location == self.location(sha) else None
+
+    def sidecar(self, sha256: str, suffix: str) -> str:
+        return f"{self.location(sha256)}.{suffix}"
+
+    def exists(self, sha256: str) -> bool:
+        return os.path.exists(self.location(sha256))
+
+    def staging_file(self) -> Tuple[int, str]:
+        os.makedirs(self.staging, exist_ok=True)
+        return tempfile.mkstemp(dir=self.staging, prefix="upload-", suffix=".part")
+
+    def put(self, staged: str, sha256: str) -> bool:
+        """Move a staged file to its address; False (and the staged file is
+        dropped) if the content was already there."""
+        dest = self.location(sha256)
+        try:
+            os.utime(dest)  # fresh again for gc's grace period
+        except FileNotFoundError:
+            pass  # new content, or gc moved it aside just now: store this copy
+        else:
+            os.unlink(staged)
+            return False
+        os.chmod(staged, FILE_MODE)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        os.replace(staged, dest)  # a concurrent identical upload just replaces equal bytes
+        return True
+
+    def import_file(self, path: str, sha256: str) -> bool:
+        """Add an existing file (migration): hard link when possible, copy otherwise."""
+        dest = self.location(sha256)
+        if os.path.exists(dest):
+            return False
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        os.makedirs(self.staging, exist_ok=True)
+        tmp = os.path.join(self.staging, f"import-{secrets.token_hex(8)}.part")
+        try:
+            os.link(path, tmp)
+        except OSError:
+            with open(path, "rb") as src:
+                _copy(src, tmp)
+        os.replace(tmp, dest)
+        return True
+
+    def delete(self, sha256: str):
+        location = self.location(sha256)
+        for path in [location, *glob.glob(glob.escape(location) + ".*")]:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def delete_if_stale(self, sha256: str, before: float) -> bool:
+        """Delete a blob unless put() touched it at or after `before`.
+
+        The blob is moved aside before its mtime is checked: a put() whose
+        utime came first is seen here and the blob goes back, and one that
+        comes later finds no file and stores its own copy."""
+        os.makedirs(self.staging, exist_ok=True)
+        aside = os.path.join(self.staging, f"delete-{sha256}-{secrets.token_hex(4)}")
+        try:
+            os.rename(self.location(sha256), aside)
+        except FileNotFoundError:
+            return False
+        if os.path.getmtime(aside) >= before:
+            os.replace(aside, self.location(sha256))
+            return False
+        os.unlink(aside)
+        self.delete(sha256)  # sidecars
+        return True
+
+    def stale_staging(self, before: float) -> int:
+        """Delete staging files left by uploads that died mid-copy."""
+        removed = 0
+        for name in _listdir(self.staging):
+            path = os.path.join(self.staging, name)
+            if os.path.getmtime(path) < before:
+                os.unlink(path)
+                removed += 1
+        return removed
+
+    def blobs(self) -> Iterator[Tuple[str, float]]:
+        """(sha256, mtime) of every stored blob."""
+        for shard in _listdir(self.root):
+            if len(shard) != 2:
+                continue
+            for sub in _listdir(os.path.join(self.root, shard)):
+                for entry in os.scandir(os.path.join(self.root, shard, sub)):
+                    if _SHA256.fullmatch(entry.name):
+                        yield entry.name, entry.stat().st_mtime
+
+
+BACKENDS = {"local": LocalBlobStore}
+
+
+def _store():
+    if BACKEND not in BACKENDS:
+        raise RuntimeError(f"Unknown KK_STORAGE_BACKEND: {BACKEND}")
+    return BACKENDS[BACKEND]()
+
+
+store = _store()
+
+
+def _listdir(path: str) -> List[str]:
+    try:
+        return sorted(os.listdir(path))
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+
+
+# ---------------------------------------------------------
+# Uploads
+# ---------------------------------------------------------
+def _copy(src, dest: str, limit: Optional[int] = None) -> Tuple[int, str]:
+    digest = hashlib.sha256()
+    size = 0
+    with open(dest, "wb") as out:
+        while True:
+            chunk = src.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if limit is not None and size > limit:
+                raise _too_large()
+            digest.update(chunk)
+            out.write(chunk)
+        out.flush()
+        os.fsync(out.fileno())
+    return size, digest.hexdigest()
+
+
+def _store_stream(src) -> StoredFile:
+    fd, staged = store.staging_file()
+    os.close(fd)
+    try:
+        size, sha256 = _copy(src, staged, MAX_UPLOAD_BYTES)
+        created = store.put(staged, sha256)
+    except BaseException:
+        try:
+            os.unlink(staged)
+        except FileNotFoundError:
+            pass
+        raise
+    return StoredFile(path=store.location(sha256), size=size, sha256=sha256, created=created)
+
+
+def scan_sha256(location: Optional[str]) -> Optional[str]:
+    """Check a client-supplied users.doc_path: it must be a stored blob (a path
+    POST /upload returned), never an arbitrary file. Its digest, or None when
+    no scan is given; 400 otherwise."""
+    if not location:
+        return None
+    sha256 = store.sha256_of(location)
+    if sha256 is None or not store.exists(sha256):
+        raise HTTPException(status_code=400, detail="doc_path must be a path returned by /upload")
+    return sha256
+
+
+async def save_upload(upload: UploadFile) -> StoredFile:
+    if upload.size is not None and upload.size > MAX_UPLOAD_BYTES:
+        raise _too_large()
+    # One threadpool hop for the whole copy instead of one per chunk
+    return await run_in_threadpool(_store_stream, upload.file)
+
+
+# ---------------------------------------------------------
+# References
+# ---------------------------------------------------------
+def referenced(conn: Connection, digests: Iterable[str]) -> set:
+    """The subset of `digests` still referenced by a document or a user's ID scan."""
+    digests = list(digests)
+    if not digests:
+        return set()
+    D, U = models.Document, models.User
+    found = set(conn.execute(select(D.sha256).where(D.sha256.in_(digests)).distinct()).scalars())
+    locations = {store.location(d): d for d in digests if d not in found}
+    if locations:
+        found.update(locations[p] for p in conn.execute(
+            select(U.doc_path).where(U.doc_path.in_(list(locations)))).scalars())
+    return found
+
+
+def release(conn: Connection, digests: Iterable[str]) -> int:
+    """Call once a change that dropped references (a replaced users.doc_path)
+    has committed: deletes the blobs nothing references any more. Returns how
+    many."""
+    cutoff = time.time() - GC_GRACE_SECONDS
+    digests = set(d for d in digests if d)
+    return sum(store.delete_if_stale(sha256, cutoff) for sha256 in digests - referenced(conn, digests))
+
+
+def gc(engine: Engine, dry_run: bool = False, batch: int = 1000) -> dict:
+    """Delete unreferenced blobs older than the grace period."""
+    cutoff = time.time() - GC_GRACE_SECONDS
+    seen = unreferenced = deleted = 0
+    pending: List[str] = []
+
+    def flush(conn):
+        nonlocal unreferenced, deleted
+        for sha256 in set(pending) - referenced(conn, pending):
+            unreferenced += 1
+            if not dry_run:
+                deleted += store.delete_if_stale(sha256, cutoff)
+        pending.clear()
+
+    with engine.connect() as conn:
+        for sha256, mtime in store.blobs():
+            seen += 1
+            if mtime < cutoff:
+                pending.append(sha256)
+            if len(pending) >= batch:
+                flush(conn)
+        flush(conn)
+    staging = 0 if dry_run else store.stale_staging(cutoff)
+    return {"blobs": seen, "unreferenced": unreferenced, "deleted": deleted,
+            "staging_removed": staging}
+
+
+# ---------------------------------------------------------
+# Migration from the flat uploads/ layout
+# ---------------------------------------------------------
+# app<id>_<kind>_<name>: kinds may contain "_" themselves (ID_PROOF, LAND_DOC).
+# migrate() strips the row's own kind; this is the fallback for the usual ones
+_LEGACY_PREFIX = re.compile(r"^(app\d+_({})_|\d+(\.\d+)?_)".format(
+    "|".join(sorted(("ID_PROOF", "LAND_DOC", "BANK", "OTHER", "LAND", "ID"), key=len, reverse=True))))
+
+
+def legacy_name(path: str, kind: Optional[str] = None) -> str:
+    """Client filename from an old-layout path ('app12_LAND_DOC_deed.pdf',
+    '1712345.6_scan.pdf'); `kind` is the document's, which was in the name."""
+    name = os.path.basename(path)
+    if kind:
+        match = re.match(r"app\d+_{}_".format(re.escape(safe_filename(kind))), name)
+        if match:
+            return name[match.end():]
+    return _LEGACY_PREFIX.sub("", name)
+
+
+def _hash_file(path: str) -> Tuple[int, str]:
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            digest.update(chunk)  # releases the GIL, so threads hash in parallel
+    return size, digest.hexdigest()
+
+
+def _import_legacy(path: str):
+    try:
+        size, sha256 = _hash_file(path)
+    except FileNotFoundError:
+        return path, None
+    return path, (size, sha256, store.import_file(path, sha256))
+
+
+def migrate(engine: Engine, workers: int = 8, batch: int = 500, dry_run: bool = False) -> dict:
+    """Move every file referenced in the old layout into the store, in batches:
+    import the files (in parallel), repoint their rows in one transaction, then
+    delete the old files. Safe to interrupt and re-run."""
+    D, U = models.Document, models.User
+    with engine.connect() as conn:
+        doc_paths = conn.execute(select(D.file_path).distinct()).scalars().all()
+        user_paths = conn.execute(select(U.doc_path).where(U.doc_path != None).distinct()).scalars().all()  # noqa: E711
+    legacy = sorted({p for p in (*doc_paths, *user_paths) if p and store.sha256_of(p) is None})
+
+    totals = {"files": len(legacy), "migrated": 0, "deduplicated": 0, "missing": 0, "rows": 0}
+    if dry_run:
+        totals["missing"] = sum(not os.path.exists(p) for p in legacy)
+        return totals
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for start in range(0, len(legacy), batch):
+            results = list(pool.map(_import_legacy, legacy[start:start + batch]))
+            moved: Dict[str, Tuple[int, str, bool]] = {p: r for p, r in results if r is not None}
+            totals["missing"] += len(results) - len(moved)
+            with engine.begin() as conn:
+                kinds = dict(conn.execute(select(D.file_path, D.kind).where(D.file_path.in_(list(moved)))).all())
+                for path, (size, sha256, _) in moved.items():
+                    location = store.location(sha256)
+                    totals["rows"] += conn.execute(
+                        update(D).where(D.file_path == path).values(
+                            file_path=location, sha256=sha256, size_bytes=size,
+                            original_name=func.coalesce(D.original_name, legacy_name(path, kinds.get(path))))
+                    ).rowcount
+                    totals["rows"] += conn.execute(
+                        update(U).where(U.doc_path == path).values(doc_path=location)).rowcount
+            # Old files go only once nothing points at them any more
+            for path, (_, sha256, created) in moved.items():
+                totals["migrated" if created else "deduplicated"] += 1
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+    return totals
+
+
+def main():
+    from .database import engine
+
+    ap = argparse.ArgumentParser(description="Document store maintenance")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    m = sub.add_parser("migrate", help="move files from the flat uploads/ layout into the store")
+    m.add_argument("--workers", type=int, default=8)
+    m.add_argument("--batch", type=int, default=500)
+    m.add_argument("--dry-run", action="store_true")
+    g = sub.add_parser("gc", help="delete blobs no document or user references")
+    g.add_argument("--dry-run", action="store_true")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    if args.cmd == "migrate":
+        res = migrate(engine, args.workers, args.batch, args.dry_run)
+    else:
+        res = gc(engine, args.dry_run)
+    print(json.dumps({**res, "seconds": round(time.perf_counter() - t0, 3)}))
+
+
+if __name__ == "__main__":
+    main()
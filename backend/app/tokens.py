@@ -0,0 +1,153 @@
+"""Refresh / password-reset token storage and compaction.
+
+Tokens are stored as SHA-256 hashes with an expires_at. Rotation, revocation
+and use delete the row immediately; each login trims the user's refresh tokens
+to MAX_REFRESH_TOKENS_PER_USER. What is left to clean up is plain expiry, which
+compact_expired_tokens sweeps in small batches (short write transactions, so it
+never stalls logins). The API runs it periodically in the background; it can
+also be run by hand / from cron:
+
+    python -m app.tokens [--batch-size 5000]
+"""
+from datetime import datetime
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+
+from sqlalchemy import delete, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models, security
+
+COMPACT_INTERVAL_SECONDS = float(os.getenv("KK_TOKEN_COMPACT_INTERVAL", "3600"))  # 0 disables
+COMPACT_BATCH_SIZE = int(os.getenv("KK_TOKEN_COMPACT_BATCH", "5000"))
+
+log = logging.getLogger("kissan.tokens")
+
+_TOKEN_MODELS = (models.RefreshToken, models.PasswordResetToken)
+
+# Bulk deletes by key: nothing in the session needs to be matched up afterwards
+_NO_SYNC = {"synchronize_session": False}
+
+
+# ---------------------------------------------------------
+# Refresh tokens
+# ---------------------------------------------------------
+async def issue_refresh_token(db: AsyncSession, user_id: int) -> str:
+    """Create and store a refresh token, dropping the user's expired and oldest
+    tokens beyond the cap. Caller commits."""
+    RT = models.RefreshToken
+    keep = (
+        select(RT.id).where(RT.user_id == user_id)
+        .order_by(RT.id.desc()).limit(max(security.MAX_REFRESH_TOKENS_PER_USER - 1, 0))
+    )
+    await db.execute(delete(RT).where(
+        RT.user_id == user_id,
+        (RT.expires_at <= datetime.utcnow()) | RT.id.not_in(keep.scalar_subquery()),
+    ), execution_options=_NO_SYNC)
+    token, expires_at = security.make_refresh_token(user_id)
+    db.add(RT(user_id=user_id, token_hash=security.hash_token(token), expires_at=expires_at))
+    return token
+
+
+async def find_refresh_token(db: AsyncSession, token: str):
+    return (await db.execute(select(models.RefreshToken).where(
+        models.RefreshToken.token_hash == security.hash_token(token),
+        models.RefreshToken.expires_at > datetime.utcnow(),
+    ))).scalars().first()
+
+
+async def rotate_refresh_token(db: AsyncSession, rt: models.RefreshToken) -> str:
+    """Delete a used refresh token and issue its replacement. Caller commits."""
+    user_id = rt.user_id
+    await db.execute(delete(models.RefreshToken).where(models.RefreshToken.id == rt.id),
+                     execution_options=_NO_SYNC)
+    # SQLite may hand the same rowid to the replacement row
+    db.expunge(rt)
+    return await issue_refresh_token(db, user_id)
+
+
+async def revoke_user_tokens(db: AsyncSession, user_id: int):
+    """Log the user out everywhere (e.g. after a password reset). Caller commits."""
+    await db.execute(delete(models.RefreshToken).where(models.RefreshToken.user_id == user_id),
+                     execution_options=_NO_SYNC)
+
+
+# ---------------------------------------------------------
+# Password reset tokens
+# ---------------------------------------------------------
+async def issue_reset_token(db: AsyncSession, user_id: int) -> str:
+    """Only the newest reset token per user stays valid. Caller commits."""
+    await db.execute(delete(models.PasswordResetToken).where(models.PasswordResetToken.user_id == user_id),
+                     execution_options=_NO_SYNC)
+    token, expires_at = security.make_reset_token()
+    db.add(models.PasswordResetToken(
+        user_id=user_id, token_hash=security.hash_token(token), expires_at=expires_at
+    ))
+    return token
+
+
+async def find_reset_token(db: AsyncSession, token: str):
+    return (await db.execute(select(models.PasswordResetToken).where(
+        models.PasswordResetToken.token_hash == security.hash_token(token),
+        models.PasswordResetToken.expires_at > datetime.utcnow(),
+    ))).scalars().first()
+
+
+# ---------------------------------------------------------
+# Compaction
+# ---------------------------------------------------------
+def compact_expired_tokens(engine: Engine, batch_size: int = COMPACT_BATCH_SIZE) -> dict:
+    """Delete expired token rows, batch_size per transaction. Returns counts per table."""
+    now = datetime.utcnow()
+    deleted = {}
+    for model in _TOKEN_MODELS:
+        total = 0
+        while True:
+            expired = (
+                select(model.id).where(model.expires_at <= now)
+                .limit(batch_size).scalar_subquery()
+            )
+            with engine.begin() as conn:
+                n = conn.execute(delete(model).where(model.id.in_(expired))).rowcount
+            total += n
+            if n < batch_size:
+                break
+        deleted[model.__tablename__] = total
+    return deleted
+
+
+async def compaction_loop(engine: Engine, interval: float = COMPACT_INTERVAL_SECONDS):
+    """Run compaction every `interval` seconds (first run after one interval, with
+    jitter so several workers don't sweep in lockstep)."""
+    from fastapi.concurrency import run_in_threadpool
+
+    while True:
+        await asyncio.sleep(interval * random.uniform(0.9, 1.1))
+        try:
+            t0 = time.perf_counter()
+            deleted = await run_in_threadpool(compact_expired_tokens, engine)
+            log.info("token compaction: %s in %.2fs", deleted, time.perf_counter() - t0)
+        except Exception:
+            log.exception("token compaction failed")
+
+
+def main():
+    from .database import engine
+
+    ap = argparse.ArgumentParser(description="Delete expired refresh / reset tokens")
+    ap.add_argument("--batch-size", type=int, default=COMPACT_BATCH_SIZE)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    deleted = compact_expired_tokens(engine, args.batch_size)
+    print(json.dumps({"deleted": deleted, "seconds": round(time.perf_counter() - t0, 3)}))
+
+
+if __name__ == "__main__":
+    main()
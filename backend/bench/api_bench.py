@@ -0,0 +1,254 @@
+"""In-process API benchmark suite.
+
+Builds (or reuses) a synthetic database, then drives every router through
+httpx's ASGI transport, one endpoint at a time, at a fixed concurrency. For each
+endpoint it reports p50/p95/p99 latency, throughput and the peak RSS seen while
+that endpoint ran, as JSON, so runs can be diffed across commits.
+
+Run from backend/:
+    python -m bench.api_bench --users 100000 --applications 1000000 --out bench.json
+    python -m bench.api_bench --db ./bench.db --requests 500 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from bench.load_test import percentile
+
+
+# ---------------------------------------------------------
+# Peak RSS sampling
+# ---------------------------------------------------------
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # ru_maxrss is the process-lifetime peak (KiB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class PeakRSS:
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self.peak = _rss_bytes()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _rss_bytes())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes())
+
+
+# ---------------------------------------------------------
+# Scenarios: (name, weight multiplier, fn(client, ctx) -> awaitable response)
+# ---------------------------------------------------------
+def scenarios(ctx):
+    def farmer():
+        return {"Authorization": f"Bearer {random.choice(ctx['farmer_tokens'])}"}
+
+    admin = {"Authorization": f"Bearer {ctx['admin_token']}"}
+    rnd_app = lambda: random.randint(ctx["min_app_id"], ctx["max_app_id"])
+    rnd_user = lambda: random.randint(ctx["min_user_id"], ctx["max_user_id"])
+    counter = iter(range(10**9))
+
+    return [
+        # auth (bcrypt-bound, so fewer requests)
+        ("POST /auth/login", 0.1, lambda c: c.post("/auth/login", json={
+            "email": f"farmer{random.randrange(ctx['users'])}@bench.test", "password": ctx["password"]})),
+        ("POST /auth/register", 0.1, lambda c: c.post("/auth/register", json={
+            "name": "Bench", "email": f"new{next(counter)}-{os.getpid()}@bench.test", "password": "pw",
+            "phone": "9876543210", "state": "Telangana", "district": "Bench"})),
+        # programs
+        ("GET /programs", 1, lambda c: c.get("/programs", params={"season": random.choice(["Kharif", "Rabi"])})),
+        ("GET /programs/{pid}", 1, lambda c: c.get(f"/programs/{random.choice(ctx['program_ids'])}")),
+        ("GET /programs/match/me", 1, lambda c: c.get("/programs/match/me", headers=farmer(), params={
+            "crop_id": random.choice(ctx["crop_ids"]), "land_size": round(random.uniform(0, 10), 1)})),
+        # applications
+        ("GET /applications", 1, lambda c: c.get("/applications", headers=farmer())),
+        ("GET /applications/admin/list", 1, lambda c: c.get(
+            "/applications/admin/list", headers=admin, params={"status": "pending"})),
+        ("GET /applications/admin/review-queue", 0.5, lambda c: c.get(
+            "/applications/admin/review-queue", headers=admin)),
+        ("GET /search", 1, lambda c: c.get("/search", headers=admin, params={"q": random.choice(
+            [f"Farmer {random.randrange(ctx['users'])}", f"District {random.randrange(200)}", "passbook", "9876"])})),
+        ("GET /applications/admin/{id}/details", 1, lambda c: c.get(
+            f"/applications/admin/{rnd_app()}/details", headers=admin)),
+        ("POST /applications", 0.5, lambda c: c.post("/applications", headers=farmer(), json={
+            "program_id": random.choice(ctx["program_ids"]), "crop_id": random.choice(ctx["crop_ids"]),
+            "acreage": 2.0, "season": "Kharif"})),
+        ("POST /applications/admin/{id}/status", 0.5, lambda c: c.post(
+            f"/applications/admin/{rnd_app()}/status", headers=admin, json={"status": "under_review"})),
+        # users
+        ("GET /users/{id}", 1, lambda c: c.get(f"/users/{rnd_user()}")),
+        ("PUT /users/{id}", 0.5, lambda c: c.put(f"/users/{rnd_user()}", json={"district": "Updated"})),
+        # upload
+        ("POST /upload", 0.5, lambda c: c.post("/upload", files={"file": ("scan.pdf", ctx["upload_blob"])})),
+    ]
+
+
+async def run_endpoint(client, fn, requests, concurrency):
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            t0 = time.perf_counter()
+            try:
+                r = await fn(client)
+                ok = r.status_code < 500
+            except Exception:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - t0)
+            else:
+                errors += 1
+
+    with PeakRSS() as rss:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - t0
+
+    latencies.sort()
+    ms = lambda v: round(v * 1000, 3) if v is not None else None
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "peak_rss_mb": round(rss.peak / 2**20, 1),
+    }
+
+
+def build_context(users):
+    from sqlalchemy import func, select
+    from app.database import SessionLocal
+    from app import models, security
+    from bench.dataset import BENCH_PASSWORD
+
+    db = SessionLocal()
+    farmer_ids = db.execute(
+        select(models.User.id).where(models.User.email.like("farmer%@bench.test")).limit(1000)
+    ).scalars().all()
+    admin = db.query(models.User).filter(models.User.role == "admin").first()
+    ctx = {
+        "users": users,
+        "password": BENCH_PASSWORD,
+        "farmer_tokens": [security.make_access_token(uid, "farmer") for uid in farmer_ids],
+        "admin_token": security.make_access_token(admin.id, admin.role),
+        "program_ids": db.execute(select(models.Program.id)).scalars().all(),
+        "crop_ids": db.execute(select(models.Crop.id)).scalars().all(),
+        "min_app_id": db.execute(select(func.min(models.Application.id))).scalar(),
+        "max_app_id": db.execute(select(func.max(models.Application.id))).scalar(),
+        "min_user_id": db.execute(select(func.min(models.User.id))).scalar(),
+        "max_user_id": db.execute(select(func.max(models.User.id))).scalar(),
+        "upload_blob": os.urandom(256 * 1024),
+    }
+    db.close()
+    return ctx
+
+
+def _git_rev():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+async def main_async(args):
+    import httpx
+
+    rev = _git_rev()
+    workdir = tempfile.mkdtemp(prefix="kk-bench-")
+    db_path = os.path.abspath(args.db) if args.db else os.path.join(workdir, "bench.db")
+    fresh = not os.path.exists(db_path)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("KK_RATE_LIMIT", "0")  # time the auth handlers, not the 429 path
+    os.chdir(workdir)  # uploads land in the scratch dir
+
+    from app.database import engine, dispose_async_engines
+    from app.seed import seed
+    from app import security
+    from bench.dataset import BENCH_PASSWORD, generate
+
+    dataset = None
+    if fresh:
+        seed()
+        dataset = generate(engine, args.users, args.applications, args.programs,
+                           password_hash=security.hash_pw(BENCH_PASSWORD))
+
+    from app.main import app
+    ctx = build_context(args.users)
+
+    only = set(args.only.split(",")) if args.only else None
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                     limits=httpx.Limits(max_connections=None)) as client:
+            for name, weight, fn in scenarios(ctx):
+                if only and name not in only:
+                    continue
+                n = max(args.concurrency, int(args.requests * weight))
+                results[name] = await run_endpoint(client, fn, n, args.concurrency)
+                print(f"{name}: {results[name]}", file=sys.stderr)
+    finally:
+        await dispose_async_engines()
+        security.shutdown_hasher()
+
+    return {
+        "git_rev": rev,
+        "database": db_path,
+        "dataset": dataset,
+        "concurrency": args.concurrency,
+        "endpoints": results,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", help="reuse an existing SQLite file (created with the dataset if missing)")
+    ap.add_argument("--users", type=int, default=100_000)
+    ap.add_argument("--applications", type=int, default=1_000_000)
+    ap.add_argument("--programs", type=int, default=50)
+    ap.add_argument("--requests", type=int, default=1000, help="requests per endpoint (scaled per scenario)")
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--only", help="comma-separated scenario names")
+    ap.add_argument("--out", help="write JSON here instead of stdout")
+    args = ap.parse_args()
+
+    report = asyncio.run(main_async(args))
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Non-auth latency during an auth storm, with and without admission control.
+
+Runs the load_test traffic mix (programs, applications, admin list; no auth
+calls) at a fixed concurrency and reports its p50/p95/p99 in three phases,
+each in a fresh process and database:
+
+  baseline    the traffic mix alone
+  storm       plus --storm clients hammering /auth/login and /auth/register
+              from --storm-ips addresses, KK_RATE_LIMIT=0
+  limited     the same storm with the limits in app/ratelimit.py on
+
+Storm responses are counted by status code (429 = shed by the limiter).
+
+Run from backend/:
+    python -m bench.auth_storm --clients 50 --storm 100 --duration 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from bench.load_test import build_requests, prepare_local_db, run
+
+PHASES = {
+    "baseline": {"storm": False, "KK_RATE_LIMIT": "1"},
+    "storm": {"storm": True, "KK_RATE_LIMIT": "0"},
+    "limited": {"storm": True, "KK_RATE_LIMIT": "1"},
+}
+
+
+async def storm(app, clients, ips, users, deadline, pause, codes):
+    import httpx
+
+    async def worker(i):
+        transport = httpx.ASGITransport(app=app, client=(f"10.1.0.{i % ips + 1}", 40000 + i))
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            n = 0
+            while time.perf_counter() < deadline:
+                n += 1
+                try:
+                    if n % 2:
+                        r = await client.post("/auth/login", json={
+                            "email": f"farmer{random.randrange(users)}@load.test", "password": "Farmer@123"})
+                    else:
+                        r = await client.post("/auth/register", json={
+                            "name": "Storm", "email": f"storm{i}-{n}@load.test", "password": "pw",
+                            "phone": "9876543210", "state": "Telangana", "district": "Storm"})
+                    status = r.status_code
+                except Exception:
+                    status = "error"
+                codes[status] += 1
+                if status != 200 and status != 201:
+                    await asyncio.sleep(pause)  # retries without honouring Retry-After
+
+    await asyncio.gather(*(worker(i) for i in range(clients)))
+
+
+async def phase_async(args):
+    import httpx
+
+    tokens, admin_token, program_ids, crop_ids = prepare_local_db(args.farmers, 1)
+    from app.main import app
+    from app.database import dispose_async_engines
+
+    requests = build_requests(tokens, admin_token, program_ids, crop_ids)
+    transport = httpx.ASGITransport(app=app, client=("10.0.0.1", 50000))
+    codes = Counter()
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                     limits=httpx.Limits(max_connections=None)) as client:
+            jobs = [run(client, requests, args.clients, args.duration)]
+            if PHASES[args.phase]["storm"]:
+                deadline = time.perf_counter() + args.duration
+                jobs.append(storm(app, args.storm, args.storm_ips, args.farmers, deadline, args.storm_pause, codes))
+            result = (await asyncio.gather(*jobs))[0]
+    finally:
+        await dispose_async_engines()
+    return {"non_auth": result["overall"], "throughput_rps": result["throughput_rps"],
+            "storm_responses": dict(sorted(codes.items(), key=str))}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clients", type=int, default=50)
+    ap.add_argument("--storm", type=int, default=100, help="concurrent auth clients")
+    ap.add_argument("--storm-ips", type=int, default=4)
+    ap.add_argument("--storm-pause", type=float, default=0.1, help="seconds before retrying a failed call")
+    ap.add_argument("--duration", type=float, default=20)
+    ap.add_argument("--farmers", type=int, default=2000)
+    ap.add_argument("--phase", choices=PHASES, help="run one phase in this process")
+    args = ap.parse_args()
+
+    if args.phase:
+        print(json.dumps(asyncio.run(phase_async(args))))
+        return
+
+    results = {}
+    for name, phase in PHASES.items():
+        cmd = [sys.executable, "-m", "bench.auth_storm", "--phase", name,
+               *(f"--{k}={v}" for k, v in (("clients", args.clients), ("storm", args.storm),
+                                           ("storm-ips", args.storm_ips),
+                                           ("storm-pause", args.storm_pause), ("duration", args.duration),
+                                           ("farmers", args.farmers)))]
+        env = {**os.environ, "KK_RATE_LIMIT": phase["KK_RATE_LIMIT"]}
+        out = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True).stdout
+        results[name] = json.loads(out.strip().splitlines()[-1])
+        print(name, results[name], file=sys.stderr)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
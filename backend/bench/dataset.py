@@ -0,0 +1,150 @@
+"""Synthetic dataset generator for benchmarks.
+
+Fills users, programs/crop links, applications, status history and documents
+with Core executemany batches (no ORM objects), so a 100k-user / 1M-application
+database takes a minute or two on SQLite.
+
+Run from backend/ to build a reusable database file:
+    DATABASE_URL=sqlite:///./bench.db python -m bench.dataset --users 100000 --applications 1000000
+"""
+from datetime import datetime, timedelta
+import argparse
+import json
+import random
+import time
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.engine import Engine
+
+from app import aggregates, models, scoring
+
+BATCH = 50_000
+STATUSES = ("pending", "under_review", "approved", "rejected")
+STATUS_WEIGHTS = (45, 20, 25, 10)
+SEASONS = ("Kharif", "Rabi", "Zaid")
+STATES = ("Andhra Pradesh", "Telangana", "Karnataka", "Tamil Nadu", "Maharashtra")
+BENCH_PASSWORD = "Bench@12345"
+REMARKS = (
+    "Land records verified with the village revenue officer",
+    "Bank passbook copy unclear, resubmission requested",
+    "Acreage differs from pattadar passbook",
+    "Approved after field inspection",
+    "Duplicate application for the same survey number",
+    "Aadhaar seeding pending with bank",
+)
+
+
+def _batched_insert(conn, table, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            conn.execute(insert(table), batch)
+            batch = []
+    if batch:
+        conn.execute(insert(table), batch)
+
+
+def generate(engine: Engine, users: int, applications: int, programs: int = 50,
+             password_hash: str = "x", seed: int = 42) -> dict:
+    """Append synthetic rows (expects the schema and seed data to exist)."""
+    rng = random.Random(seed)
+    t0 = time.perf_counter()
+    now = datetime.utcnow()
+
+    with engine.begin() as conn:
+        crop_ids = list(conn.execute(select(models.Crop.id)).scalars())
+        base_user = conn.execute(select(func.coalesce(func.max(models.User.id), 0))).scalar()
+        base_program = conn.execute(select(func.coalesce(func.max(models.Program.id), 0))).scalar()
+        base_app = conn.execute(select(func.coalesce(func.max(models.Application.id), 0))).scalar()
+
+        # Programs + crop links (explicit ids so children can reference them)
+        program_rows = []
+        for i in range(programs):
+            lo = rng.choice([None, round(rng.uniform(0, 3), 1)])
+            program_rows.append({
+                "id": base_program + 1 + i, "title": f"Bench Program {i}", "description": "synthetic",
+                "authority": "Bench Dept.", "season": rng.choice(SEASONS + ("Any",)),
+                "min_land_size": lo, "max_land_size": rng.choice([None, round((lo or 0) + rng.uniform(2, 20), 1)]),
+                "is_active": True, "created_at": now,
+            })
+        _batched_insert(conn, models.Program.__table__, program_rows)
+        _batched_insert(conn, models.ProgramCrop.__table__, (
+            {"program_id": p["id"], "crop_id": c}
+            for p in program_rows for c in rng.sample(crop_ids, min(3, len(crop_ids)))
+        ))
+        program_ids = list(conn.execute(select(models.Program.id)).scalars())
+
+        _batched_insert(conn, models.User.__table__, (
+            {
+                "id": base_user + 1 + i, "name": f"Farmer {i}", "email": f"farmer{i}@bench.test",
+                "phone": f"9{rng.randrange(10**9):09d}", "password_hash": password_hash,
+                "state": rng.choice(STATES), "district": f"District {rng.randrange(200)}",
+                "aadhar": f"{base_user + i:012d}" if rng.random() < 0.9 else None,
+                "role": "farmer", "created_at": now,
+            }
+            for i in range(users)
+        ))
+
+        def app_rows():
+            for i in range(applications):
+                yield {
+                    "id": base_app + 1 + i, "user_id": base_user + 1 + rng.randrange(users),
+                    "program_id": rng.choice(program_ids), "crop_id": rng.choice(crop_ids),
+                    "acreage": round(rng.uniform(0.2, 12), 1), "season": rng.choice(SEASONS),
+                    "submitted_at": now - timedelta(seconds=rng.randrange(180 * 86400)),
+                    "status": rng.choices(STATUSES, STATUS_WEIGHTS)[0],
+                    "remarks": f"{rng.choice(REMARKS)} (ref {rng.randrange(10**6)})" if rng.random() < 0.4 else None,
+                }
+        # Applications and their history/documents are generated together so the
+        # statuses line up; streamed in BATCH-sized slices to bound memory.
+        apps, history, docs = [], [], []
+
+        def flush():
+            conn.execute(insert(models.Application.__table__), apps)
+            conn.execute(insert(models.ApplicationStatusHistory.__table__), history)
+            if docs:
+                conn.execute(insert(models.Document.__table__), docs)
+            apps.clear(); history.clear(); docs.clear()
+
+        for row in app_rows():
+            apps.append(row)
+            history.append({"application_id": row["id"], "status": "pending", "at": row["submitted_at"], "note": "Submitted"})
+            if row["status"] != "pending":
+                history.append({"application_id": row["id"], "status": row["status"],
+                                "at": row["submitted_at"] + timedelta(days=1), "note": "Bench"})
+            if rng.random() < 0.5:
+                docs.append({"kind": "LAND_DOC", "file_path": f"uploads/bench_{row['id']}.pdf",
+                             "uploaded_at": row["submitted_at"], "user_id": row["user_id"],
+                             "application_id": row["id"]})
+            if len(apps) >= BATCH:
+                flush()
+        if apps:
+            flush()
+
+    # Core inserts bypass the incremental aggregate / score upkeep
+    aggregates.rebuild(engine)
+    scoring.rescore_all(engine, unscored_only=True)
+
+    return {"users": users, "applications": applications, "programs": programs,
+            "seconds": round(time.perf_counter() - t0, 1)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=100_000)
+    ap.add_argument("--applications", type=int, default=1_000_000)
+    ap.add_argument("--programs", type=int, default=50)
+    args = ap.parse_args()
+
+    from app.database import engine
+    from app.seed import seed
+    from app import security
+
+    seed()
+    print(json.dumps(generate(engine, args.users, args.applications, args.programs,
+                              password_hash=security.hash_pw(BENCH_PASSWORD))))
+
+
+if __name__ == "__main__":
+    main()
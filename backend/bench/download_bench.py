@@ -0,0 +1,201 @@
+"""GET /documents/{id} throughput and memory under concurrent downloads.
+
+The app is called directly as an ASGI callable with a send() that counts and
+drops body chunks, so nothing on the client side holds a response; the peak RSS
+reported is the server's. Each mode runs --concurrency downloads of
+--size MB files for --duration seconds:
+
+  read_all      the route, but the file read into memory and sent as one body
+                (what serving documents through a plain Response would cost)
+  stream_<n>k   FileResponse streaming in n KiB chunks (KK_DOWNLOAD_CHUNK_KB)
+  pathsend      the server advertises http.response.pathsend and gets the path
+                (granian, or nginx via KK_DOWNLOAD_ACCEL_PREFIX, then sendfiles)
+  range_1m      1 MiB Range requests at random offsets (PDF viewer paging)
+  revalidate    If-None-Match with the current ETag (304, no body)
+
+There is no socket, so read_all never waits for a slow client here; behind a
+real server every in-flight read_all download holds its whole file.
+
+Run from backend/:
+    python -m bench.download_bench --files 20 --size 5 --concurrency 100 --duration 10
+"""
+import argparse
+import asyncio
+import gc
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from bench.api_bench import PeakRSS
+from bench.load_test import percentile
+
+
+def prepare(files, size_mb):
+    tmp = tempfile.mkdtemp(prefix="kk-download-")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tmp}/download.db")
+    os.environ.setdefault("KK_HASH_WORKERS", "0")
+    os.environ.setdefault("KK_RATE_LIMIT", "0")
+    os.environ.setdefault("KK_JOB_INPROCESS", "0")
+    os.chdir(tmp)
+
+    from sqlalchemy import insert, select
+    from app.seed import seed
+    from app.database import engine
+    from app import models, security, storage
+
+    seed()
+    with engine.begin() as conn:
+        admin_id = conn.execute(select(models.User.id).where(models.User.role == "admin")).scalar()
+        rows = []
+        for i in range(files):
+            data = os.urandom(size_mb * 2**20)
+            sha = hashlib.sha256(data).hexdigest()
+            fd, staged = storage.store.staging_file()
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            storage.store.put(staged, sha)
+            rows.append({"kind": "LAND_DOC", "file_path": storage.store.location(sha), "sha256": sha,
+                         "size_bytes": len(data), "original_name": f"deed{i}.pdf",
+                         "content_type": "application/pdf", "user_id": admin_id})
+        ids = list(conn.execute(insert(models.Document).returning(models.Document.id), rows).scalars())
+    etags = {doc_id: f'"{row["sha256"]}"'.encode() for doc_id, row in zip(ids, rows)}
+    return ids, etags, security.make_access_token(admin_id, "admin")
+
+
+def scope_for(path, token, extra_headers=(), pathsend=False):
+    headers = [(b"host", b"bench"), (b"authorization", f"Bearer {token}".encode()), *extra_headers]
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": headers, "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+        "extensions": {"http.response.pathsend": {}} if pathsend else {},
+    }
+
+
+async def call(app, scope):
+    """One request; returns (status, body bytes seen)."""
+    status, seen = 0, 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status, seen
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            seen += len(message.get("body", b""))
+        elif message["type"] == "http.response.pathsend":
+            seen += os.path.getsize(message["path"])  # the server would sendfile() this
+
+    await app(scope, receive, send)
+    return status, seen
+
+
+async def run_mode(app, make_scope, concurrency, duration):
+    lat, errors, total = [], 0, 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors, total
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            status, seen = await call(app, make_scope())
+            if status in (200, 206, 304):
+                lat.append(time.perf_counter() - t0)
+                total += seen
+            else:
+                errors += 1
+
+    gc.collect()
+    with PeakRSS() as rss:
+        base = rss.peak
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - t0
+    lat.sort()
+    return {
+        "requests": len(lat), "errors": errors,
+        "rps": round(len(lat) / elapsed, 1),
+        "mb_per_s": round(total / elapsed / 2**20, 1),
+        "p50_ms": round(percentile(lat, 50) * 1000, 2) if lat else None,
+        "p99_ms": round(percentile(lat, 99) * 1000, 2) if lat else None,
+        "peak_rss_growth_mb": round((rss.peak - base) / 2**20, 1),
+    }
+
+
+async def main_async(args):
+    ids, etags, token = prepare(args.files, args.size)
+
+    from fastapi import Depends, Request
+    from fastapi.concurrency import run_in_threadpool
+    from fastapi.responses import FileResponse, Response
+    from app.database import dispose_async_engines
+    from app.deps import current_user
+    from app.main import app
+    from app.routers import documents
+
+    async def read_all(doc_id: int, request: Request, user=Depends(current_user)):
+        r = await documents.download_document(doc_id, request, False, user)
+        if not isinstance(r, FileResponse):
+            return r
+        with open(r.path, "rb") as f:
+            data = await run_in_threadpool(f.read)
+        return Response(data, media_type=r.media_type,
+                        headers={k: v for k, v in r.headers.items() if k not in ("content-length", "content-type")})
+
+    app.add_api_route("/bench/read_all/{doc_id}", read_all)
+    size = args.size * 2**20
+
+    def doc():
+        return random.choice(ids)
+
+    modes = {"read_all": lambda: scope_for(f"/bench/read_all/{doc()}", token)}
+    for kb in args.chunks:
+        modes[f"stream_{kb}k"] = (kb, lambda: scope_for(f"/documents/{doc()}", token))
+    modes["pathsend"] = lambda: scope_for(f"/documents/{doc()}", token, pathsend=True)
+
+    def ranged():
+        start = random.randrange(0, size - 2**20 + 1)
+        return scope_for(f"/documents/{doc()}", token, [(b"range", f"bytes={start}-{start + 2**20 - 1}".encode())])
+    modes["range_1m"] = ranged
+
+    def revalidate():
+        d = doc()
+        return scope_for(f"/documents/{d}", token, [(b"if-none-match", etags[d])])
+    modes["revalidate"] = revalidate
+
+    results = {}
+    try:
+        for name, mode in modes.items():
+            if args.only and name not in args.only:
+                continue
+            documents.DocumentFile.chunk_size = documents.CHUNK_SIZE
+            if isinstance(mode, tuple):
+                kb, mode = mode
+                documents.DocumentFile.chunk_size = kb * 1024
+            results[name] = await run_mode(app, mode, args.concurrency, args.duration)
+            print(name, results[name], file=sys.stderr)
+    finally:
+        await dispose_async_engines()
+    print(json.dumps({"files": args.files, "size_mb": args.size, "concurrency": args.concurrency,
+                      "results": results}, indent=2))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--files", type=int, default=20)
+    ap.add_argument("--size", type=int, default=5, help="MB per file")
+    ap.add_argument("--concurrency", type=int, default=100)
+    ap.add_argument("--duration", type=float, default=10)
+    ap.add_argument("--chunks", type=int, nargs="+", default=[64, 256, 1024], help="KiB")
+    ap.add_argument("--only", nargs="+", help="run just these modes")
+    asyncio.run(main_async(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark: /programs/match/me eligibility index vs. the original query + loop.
+
+Run from backend/:
+    python -m bench.eligibility_bench --programs 5000 --crops 40 --queries 2000
+"""
+import argparse
+import json
+import random
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app import models
+from app.eligibility import build_index
+
+SEASONS = ["Kharif", "Rabi", "Zaid", "Any", None]
+
+
+def legacy_match(db, crop_id=None, land_size=None, season=None):
+    # Verbatim copy of the pre-index match_for_me body
+    q = db.query(models.Program).filter(models.Program.is_active == True)
+    if crop_id:
+        q = q.join(models.ProgramCrop, models.Program.id == models.ProgramCrop.program_id).filter(models.ProgramCrop.crop_id == crop_id)
+    progs = q.all()
+    res = []
+    for p in progs:
+        ok = True
+        if season and p.season and p.season != "Any" and p.season != season:
+            ok = False
+        if land_size is not None:
+            if p.min_land_size is not None and land_size < p.min_land_size: ok = False
+            if p.max_land_size is not None and land_size > p.max_land_size: ok = False
+        if ok:
+            res.append(p)
+    return res
+
+
+def populate(db, n_programs, n_crops, rng):
+    db.add_all([models.Crop(id=i, name=f"Crop {i}") for i in range(1, n_crops + 1)])
+    programs = []
+    for i in range(1, n_programs + 1):
+        lo = rng.choice([None, round(rng.uniform(0, 5), 1)])
+        hi = rng.choice([None, round((lo or 0) + rng.uniform(0.5, 20), 1)])
+        programs.append(models.Program(
+            id=i, title=f"Program {i}", description="synthetic", season=rng.choice(SEASONS),
+            min_land_size=lo, max_land_size=hi, is_active=rng.random() > 0.1,
+        ))
+    db.add_all(programs)
+    db.add_all([
+        models.ProgramCrop(program_id=i, crop_id=c)
+        for i in range(1, n_programs + 1)
+        for c in rng.sample(range(1, n_crops + 1), rng.randint(1, 4))
+    ])
+    db.commit()
+
+
+def timed(fn, queries):
+    t0 = time.perf_counter()
+    for q in queries:
+        fn(**q)
+    return (time.perf_counter() - t0) / len(queries) * 1e6  # µs per match
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--programs", type=int, default=5000)
+    ap.add_argument("--crops", type=int, default=40)
+    ap.add_argument("--queries", type=int, default=2000)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    populate(db, args.programs, args.crops, rng)
+
+    queries = [
+        dict(
+            crop_id=rng.choice([None, rng.randint(1, args.crops)]),
+            land_size=rng.choice([None, round(rng.uniform(0, 25), 1)]),
+            season=rng.choice(["Kharif", "Rabi", "Zaid", "Any", None]),
+        )
+        for _ in range(args.queries)
+    ]
+
+    t0 = time.perf_counter()
+    index = build_index(db)
+    build_ms = (time.perf_counter() - t0) * 1000
+
+    # Same answers, same order
+    for q in queries[:200]:
+        expected = sorted(p.id for p in legacy_match(db, **q))
+        assert [p.id for p in index.match(**q)] == expected, q
+
+    legacy_us = timed(lambda **q: legacy_match(db, **q), queries[: max(1, args.queries // 10)])
+    index_us = timed(index.match, queries)
+
+    print(json.dumps({
+        "programs": args.programs,
+        "active_programs": len(index),
+        "index_build_ms": round(build_ms, 2),
+        "legacy_us_per_match": round(legacy_us, 2),
+        "index_us_per_match": round(index_us, 2),
+        "speedup": round(legacy_us / index_us, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Benchmark: bulk application import (app.bulk_import) on a synthetic CSV.
+
+Run from backend/:
+    python -m bench.import_bench --rows 100000 --farmers 50000
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import tempfile
+import time
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--farmers", type=int, default=50_000)
+    ap.add_argument("--chunk-size", type=int, default=5000)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="kk-import-")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tmp}/import.db")
+
+    from sqlalchemy import insert
+    from app.database import engine
+    from app.seed import seed
+    from app import models
+    from app.bulk_import import import_applications
+
+    seed()
+    with engine.begin() as conn:
+        conn.execute(insert(models.User.__table__), [
+            {"name": f"Farmer {i}", "email": f"farmer{i}@import.test", "password_hash": "x",
+             "role": "farmer", "aadhar": f"{i:012d}", "doc_path": "uploads/id.pdf" if i % 2 else None}
+            for i in range(args.farmers)
+        ])
+
+    rng = random.Random(1)
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(["email", "program_id", "crop_id", "acreage", "season"])
+    for i in range(args.rows):
+        w.writerow([f"farmer{rng.randrange(args.farmers)}@import.test", rng.randint(1, 3),
+                    rng.randint(1, 6), round(rng.uniform(0.5, 9), 1), "Kharif"])
+    buf.seek(0)
+
+    t0 = time.perf_counter()
+    report = import_applications(engine, buf, "csv", args.chunk_size)
+    elapsed = time.perf_counter() - t0
+    print(json.dumps({
+        "rows": report["total"], "imported": report["imported"], "failed": report["failed"],
+        "seconds": round(elapsed, 2), "rows_per_second": round(report["total"] / elapsed),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
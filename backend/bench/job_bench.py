@@ -0,0 +1,64 @@
+"""Job queue throughput.
+
+Enqueues N "application.status_changed" jobs (each creates a notification and
+a follow-up "notification.deliver" job, so 2N jobs run in total), then times
+`python -m app.jobs --drain` with 1, 2, 4 ... worker processes.
+
+Run from backend/:
+    python -m bench.job_bench --jobs 5000 --workers 1 2 4
+"""
+from datetime import datetime
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--jobs", type=int, default=5000)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="kk-jobs-")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tmp}/jobs.db")
+    os.environ.setdefault("KK_HASH_WORKERS", "0")
+
+    from sqlalchemy import func, insert, select
+    from app.database import engine
+    from app.seed import seed
+    from app import models
+    from bench.dataset import generate
+
+    seed()
+    generate(engine, 1000, 1000, programs=5)
+    with engine.connect() as conn:
+        app_ids = list(conn.execute(select(models.Application.id)).scalars())
+
+    results = []
+    for workers in args.workers:
+        with engine.begin() as conn:
+            conn.execute(insert(models.Job), [
+                {"kind": "application.status_changed", "run_after": datetime.utcnow(),
+                 "payload": json.dumps({"application_id": app_ids[i % len(app_ids)], "status": "approved"})}
+                for i in range(args.jobs)
+            ])
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "app.jobs", "--workers", str(workers), "--drain"],
+                       env={**os.environ, "KK_JOB_POLL_SECONDS": "0.05"},
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        seconds = time.perf_counter() - t0
+        with engine.connect() as conn:
+            left = conn.execute(select(func.count()).select_from(models.Job)).scalar()
+        row = {"workers": workers, "jobs_run": 2 * args.jobs, "seconds": round(seconds, 2),
+               "jobs_per_second": round(2 * args.jobs / seconds), "jobs_left": left}
+        results.append(row)
+        print(row, file=sys.stderr)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Concurrent-client load test against the API.
+
+The app is driven in-process through httpx's ASGI transport against a throwaway
+SQLite database, so sync handlers still go through Starlette's threadpool exactly
+as they would under uvicorn.
+
+Run from backend/:
+    python -m bench.load_test --clients 200 --duration 15
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+
+def percentile(sorted_vals, pct):
+    if not sorted_vals:
+        return None
+    k = min(len(sorted_vals) - 1, int(round(pct / 100 * (len(sorted_vals) - 1))))
+    return sorted_vals[k]
+
+
+def prepare_local_db(n_farmers, apps_per_farmer):
+    # Must run before anything imports app.database
+    tmp = tempfile.mkdtemp(prefix="kk-load-")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tmp}/load.db")
+    os.chdir(tmp)
+
+    from app.seed import seed
+    from app.database import SessionLocal
+    from app import models, security
+
+    seed()
+    db = SessionLocal()
+    pw = security.hash_pw("Farmer@123")
+    users = [
+        models.User(name=f"Farmer {i}", email=f"farmer{i}@load.test", phone="9876543210",
+                    password_hash=pw, state="Andhra Pradesh", district=f"D{i % 13}",
+                    aadhar=f"{i:012d}")
+        for i in range(n_farmers)
+    ]
+    db.add_all(users)
+    db.commit()
+    program_ids = [p.id for p in db.query(models.Program).all()]
+    crop_ids = [c.id for c in db.query(models.Crop).all()]
+    db.add_all([
+        models.Application(user_id=u.id, program_id=random.choice(program_ids),
+                           crop_id=random.choice(crop_ids), acreage=round(random.uniform(0.5, 8), 1),
+                           season="Kharif", status="approved")
+        for u in users for _ in range(apps_per_farmer)
+    ])
+    db.commit()
+    tokens = [security.make_access_token(u.id, u.role) for u in users]
+    admin = db.query(models.User).filter(models.User.role == "admin").first()
+    admin_token = security.make_access_token(admin.id, admin.role)
+    db.close()
+    return tokens, admin_token, program_ids, crop_ids
+
+
+def build_requests(tokens, admin_token, program_ids, crop_ids):
+    def farmer():
+        return {"Authorization": f"Bearer {random.choice(tokens)}"}
+
+    return [
+        # (weight, name, fn(client) -> awaitable)
+        (4, "GET /programs", lambda c: c.get("/programs", params={"season": "Kharif"})),
+        (2, "GET /programs/{id}", lambda c: c.get(f"/programs/{random.choice(program_ids)}")),
+        (3, "GET /programs/match/me", lambda c: c.get(
+            "/programs/match/me", headers=farmer(),
+            params={"crop_id": random.choice(crop_ids), "land_size": round(random.uniform(0, 10), 1)})),
+        (4, "GET /applications", lambda c: c.get("/applications", headers=farmer())),
+        (1, "GET /applications/admin/list", lambda c: c.get(
+            "/applications/admin/list", headers={"Authorization": f"Bearer {admin_token}"})),
+        (1, "POST /applications", lambda c: c.post(
+            "/applications", headers=farmer(),
+            json={"program_id": random.choice(program_ids), "crop_id": random.choice(crop_ids),
+                  "acreage": 2.0, "season": "Kharif"})),
+    ]
+
+
+async def run(client, requests, clients, duration):
+    weights = [w for w, _, _ in requests]
+    samples = {name: [] for _, name, _ in requests}
+    errors = {name: 0 for _, name, _ in requests}
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            _, name, fn = random.choices(requests, weights=weights)[0]
+            t0 = time.perf_counter()
+            try:
+                r = await fn(client)
+                ok = r.status_code < 500
+            except Exception:
+                ok = False
+            if ok:
+                samples[name].append(time.perf_counter() - t0)
+            else:
+                errors[name] += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    elapsed = time.perf_counter() - t0
+
+    def summary(lat):
+        lat = sorted(lat)
+        return {
+            "count": len(lat),
+            "p50_ms": round(percentile(lat, 50) * 1000, 2) if lat else None,
+            "p95_ms": round(percentile(lat, 95) * 1000, 2) if lat else None,
+            "p99_ms": round(percentile(lat, 99) * 1000, 2) if lat else None,
+            "mean_ms": round(statistics.fmean(lat) * 1000, 2) if lat else None,
+        }
+
+    all_lat = [x for v in samples.values() for x in v]
+    return {
+        "clients": clients,
+        "duration_s": round(elapsed, 2),
+        "requests": len(all_lat),
+        "errors": sum(errors.values()),
+        "throughput_rps": round(len(all_lat) / elapsed, 1),
+        "overall": summary(all_lat),
+        "endpoints": {name: {**summary(v), "errors": errors[name]} for name, v in samples.items()},
+    }
+
+
+async def main_async(args):
+    import httpx
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    tokens, admin_token, program_ids, crop_ids = prepare_local_db(args.farmers, args.apps_per_farmer)
+    from app.main import app
+    from app.database import dispose_async_engines
+
+    transport = httpx.ASGITransport(app=app)
+    limits = httpx.Limits(max_connections=None)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits) as client:
+            return await run(client, build_requests(tokens, admin_token, program_ids, crop_ids),
+                             args.clients, args.duration)
+    finally:
+        # ASGITransport does not run the lifespan, so release pooled connections here
+        await dispose_async_engines()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clients", type=int, default=200)
+    ap.add_argument("--duration", type=float, default=15)
+    ap.add_argument("--farmers", type=int, default=2000)
+    ap.add_argument("--apps-per-farmer", type=int, default=3)
+    args = ap.parse_args()
+    print(json.dumps(asyncio.run(main_async(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Check: hot queries never fall back to a full table scan.
+
+Builds a synthetic database (bench.dataset), then runs EXPLAIN QUERY PLAN on
+the statements behind the busiest endpoints, once before and once after
+ANALYZE, and exits non-zero if any plan contains a bare "SCAN <table>" (an
+index-ordered "SCAN ... USING INDEX" with a LIMIT is fine). Temp B-trees for
+sorting are reported but not fatal.
+
+Run from backend/:
+    python -m bench.query_plans --users 20000 --applications 200000
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime
+
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+IN_PROGRESS = ["pending", "under_review"]
+
+
+def hot_queries():
+    from sqlalchemy import func, select, tuple_, union
+    from app import models
+
+    A, D, U, P = models.Application, models.Document, models.User, models.Program
+    newest = (A.submitted_at.desc(), A.id.desc())
+    by_score = (A.score.desc(), A.id.desc())
+    cursor = tuple_(A.submitted_at, A.id) < tuple_(datetime(2030, 1, 1), 10**9)
+    ids = list(range(1, 201))
+
+    doc_counts = (
+        select(D.application_id, func.count().label("doc_count"))
+        .where(D.application_id.in_(ids))
+        .group_by(D.application_id)
+        .subquery()
+    )
+    return {
+        "login: user by email": select(U).where(U.email == "farmer1@bench.test"),
+        "create_application: duplicate check": select(A.id).where(
+            A.user_id == 1, A.program_id == 1, A.status.in_(IN_PROGRESS)).limit(1),
+        "create_application: doc already linked": select(D.id).where(
+            D.user_id == 1, D.application_id == 1).limit(1),
+        "my_applications: first page": select(A).where(A.user_id == 1).order_by(*newest).limit(51),
+        "my_applications: next page": select(A).where(A.user_id == 1, cursor).order_by(*newest).limit(51),
+        "admin/list: unfiltered": select(A).order_by(*newest).limit(51),
+        "admin/list: status": select(A).where(A.status == "pending").order_by(*newest).limit(51),
+        "admin/list: status next page": select(A).where(A.status == "pending", cursor).order_by(*newest).limit(51),
+        "admin/list: program": select(A).where(A.program_id == 1).order_by(*newest).limit(51),
+        "admin/list: status + program": select(A).where(
+            A.status == "pending", A.program_id == 1).order_by(*newest).limit(51),
+        "review-queue: page": select(A).where(A.status.in_(IN_PROGRESS)).order_by(*newest).limit(21),
+        "review-queue: by score": select(A).where(
+            A.status.in_(IN_PROGRESS), A.score.is_not(None)).order_by(*by_score).limit(21),
+        "admin/list: status by score": select(A).where(
+            A.status == "pending", A.score.is_not(None)).order_by(*by_score).limit(51),
+        "details: documents by app or user": select(D).where(
+            (D.application_id == 1) | (D.user_id == 1)),
+        "review-queue: documents for page": select(D).where(D.id.in_(union(
+            select(D.id).where(D.application_id.in_(ids)),
+            select(D.id).where(D.user_id.in_(ids)),
+        ))).order_by(D.id),
+        "bulk-status: guardrail rows": select(
+            A.id, A.acreage, A.season, P, U.aadhar, func.coalesce(doc_counts.c.doc_count, 0))
+            .outerjoin(P, P.id == A.program_id)
+            .outerjoin(U, U.id == A.user_id)
+            .outerjoin(doc_counts, doc_counts.c.application_id == A.id)
+            .where(A.id.in_(ids)),
+        "bulk-status: filter ids": select(A.id).where(A.status == "pending").order_by(A.id),
+        "bulk import: in-progress check": select(A.user_id, A.program_id).where(
+            A.user_id.in_(ids), A.status.in_(IN_PROGRESS)),
+    }
+
+
+def explain(conn, stmt):
+    compiled = stmt.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    params = compiled.construct_params()
+    args = tuple(
+        str(v) if isinstance(v, datetime) else v
+        for v in (params[k] for k in compiled.positiontup)
+    )
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled), args).all()
+    return [r[-1] for r in rows]
+
+
+def check(conn, label):
+    failures = 0
+    print(f"== {label}")
+    for name, stmt in hot_queries().items():
+        plan = explain(conn, stmt)
+        scans = [line for line in plan if FULL_SCAN.match(line)]
+        status = "FAIL" if scans else ("sort" if any("TEMP B-TREE" in l for l in plan) else "ok")
+        failures += bool(scans)
+        print(f"  [{status:4}] {name}")
+        for line in plan:
+            print(f"           {line}")
+    return failures
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=20_000)
+    ap.add_argument("--applications", type=int, default=200_000)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="kk-plans-")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tmp}/plans.db")
+    os.environ.setdefault("KK_HASH_WORKERS", "0")
+
+    from sqlalchemy import text
+    from app.database import engine
+    from app.seed import seed
+    from bench.dataset import generate
+
+    seed()
+    generate(engine, args.users, args.applications)
+    with engine.begin() as conn:
+        # Start without statistics (seed()'s PRAGMA optimize may have written some)
+        conn.execute(text("DROP TABLE IF EXISTS sqlite_stat1"))
+
+    with engine.connect() as conn:
+        failures = check(conn, "without statistics")
+        conn.execute(text("ANALYZE"))
+        failures += check(conn, "after ANALYZE")
+
+    if failures:
+        print(f"FAIL: {failures} plan(s) fall back to a full table scan")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Check: /applications/admin/review-queue issues a constant number of SQL
+statements regardless of page size (no N+1). Exits non-zero on regression.
+
+Run from backend/:
+    python -m bench.review_queue_queries
+"""
+import os
+import random
+import sys
+import tempfile
+
+PAGE_SIZES = (1, 10, 50, 200)
+
+
+def main():
+    tmp = tempfile.mkdtemp(prefix="kk-rq-")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tmp}/rq.db")
+    os.environ.setdefault("KK_HASH_WORKERS", "0")
+    os.chdir(tmp)
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from app.seed import seed
+    seed()
+    from app.main import app
+    from app.database import SessionLocal, read_async_engine
+    from app import models, security
+
+    db = SessionLocal()
+    rng = random.Random(3)
+    users = [models.User(name=f"F{i}", email=f"f{i}@rq.test", password_hash="x", aadhar=f"{i:012d}")
+             for i in range(300)]
+    db.add_all(users)
+    db.commit()
+    apps = [models.Application(user_id=rng.choice(users).id, program_id=rng.randint(1, 3),
+                               crop_id=rng.randint(1, 6), acreage=2, season="Kharif")
+            for _ in range(600)]
+    db.add_all(apps)
+    db.commit()
+    db.add_all([models.Document(kind="LAND_DOC", file_path="x", application_id=a.id) for a in apps[::2]])
+    db.add_all([models.Document(kind="Govt ID", file_path="y", user_id=u.id) for u in users[::3]])
+    db.commit()
+    admin = db.query(models.User).filter(models.User.role == "admin").first()
+    headers = {"Authorization": f"Bearer {security.make_access_token(admin.id, admin.role)}"}
+
+    statements = []
+    event.listen(read_async_engine.sync_engine, "before_cursor_execute",
+                 lambda conn, cur, stmt, *a: statements.append(stmt))
+
+    counts = {}
+    with TestClient(app) as client:
+        # Resolves the admin into the principal cache first, so its user lookup
+        # is not counted against the first page size
+        client.get("/applications/admin/review-queue", params={"limit": 1}, headers=headers)
+        for size in PAGE_SIZES:
+            statements.clear()
+            r = client.get("/applications/admin/review-queue", params={"limit": size}, headers=headers)
+            assert r.status_code == 200 and len(r.json()) == size, r.text
+            counts[size] = len(statements)
+
+    print("statements per page size:", counts)
+    if len(set(counts.values())) != 1:
+        print("FAIL: statement count grows with page size")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
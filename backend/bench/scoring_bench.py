@@ -0,0 +1,108 @@
+"""Review-score pass timings (app/scoring.py).
+
+On a generated dataset it times:
+  full_first      every queued application scored from NULL (all rows written)
+  full_nochange   the same pass again (nothing to write back)
+  incremental     rescore of a handful of ids, as the job queue does
+  python_loop     the same scoring as a per-row Python loop over a sample,
+                  extrapolated to the whole queue, for comparison
+
+Run from backend/:
+    python -m bench.scoring_bench --users 200000 --applications 1000000
+"""
+from datetime import timezone
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=200_000)
+    ap.add_argument("--applications", type=int, default=1_000_000)
+    ap.add_argument("--incremental", type=int, default=10, help="ids per incremental rescore")
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="kk-score-")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tmp}/score.db")
+    os.environ.setdefault("KK_HASH_WORKERS", "0")
+
+    import numpy as np
+    from sqlalchemy import func, select, update
+    from app.database import engine
+    from app.seed import seed
+    from app import models, scoring
+    from bench.dataset import generate
+
+    seed()
+    print(generate(engine, args.users, args.applications), file=sys.stderr)
+    A = models.Application
+    with engine.begin() as conn:
+        conn.execute(update(A).values(score=None))
+
+    results = {}
+    t0 = time.perf_counter()
+    res = scoring.rescore_all(engine)
+    results["full_first"] = {**res, "seconds": round(time.perf_counter() - t0, 2)}
+    t0 = time.perf_counter()
+    res = scoring.rescore_all(engine)
+    results["full_nochange"] = {**res, "seconds": round(time.perf_counter() - t0, 2)}
+
+    with engine.connect() as conn:
+        queued = list(conn.execute(select(A.id).where(A.status.in_(scoring.QUEUE_STATUSES))).scalars())
+    rng = random.Random(1)
+    times = []
+    for _ in range(args.repeat):
+        ids = rng.sample(queued, args.incremental)
+        t0 = time.perf_counter()
+        with engine.begin() as conn:
+            scoring.rescore(conn, scoring.for_ids(ids))
+        times.append(time.perf_counter() - t0)
+    results["incremental"] = {"ids": args.incremental, "median_ms": round(sorted(times)[len(times) // 2] * 1000, 2)}
+
+    # Row-at-a-time equivalent of scoring.compute over a sample of the queue
+    sample = queued[:: max(1, len(queued) // 20_000)]
+    with engine.connect() as conn:
+        programs = {p.id: p for p in conn.execute(select(models.Program)).all()}
+        docs = dict(conn.execute(select(models.Document.application_id, func.count())
+                                 .group_by(models.Document.application_id)).all())
+        rows = conn.execute(
+            select(A.id, A.program_id, A.acreage, A.season, A.submitted_at, models.User.aadhar)
+            .join(models.User, models.User.id == A.user_id).where(A.id.in_(sample))
+        ).all()
+    now = scoring._now_days("sqlite")
+    t0 = time.perf_counter()
+    check = {}
+    for r in rows:
+        p = programs.get(r.program_id)
+        score = 0.0
+        if p is not None:
+            if r.acreage and r.acreage > 0 and (p.min_land_size is None or r.acreage >= p.min_land_size) \
+                    and (p.max_land_size is None or r.acreage <= p.max_land_size):
+                score += scoring.W_ACREAGE
+            if p.season in (None, "Any", r.season):
+                score += scoring.W_SEASON
+        if r.aadhar:
+            score += scoring.W_AADHAR
+        score += scoring.W_DOCS * min(docs.get(r.id, 0), scoring.DOC_TARGET) / scoring.DOC_TARGET
+        submitted = r.submitted_at.replace(tzinfo=timezone.utc).timestamp() / 86400.0 + 2440587.5
+        waited = now - submitted
+        score += scoring.W_WAIT * min(int(max(waited, 0)), scoring.WAIT_FULL_DAYS) / scoring.WAIT_FULL_DAYS
+        check[r.id] = round(score, 1)
+    loop = time.perf_counter() - t0
+    results["python_loop"] = {"sample": len(rows),
+                              "compute_seconds_extrapolated": round(loop * len(queued) / max(1, len(rows)), 2)}
+
+    with engine.connect() as conn:
+        stored = dict(conn.execute(select(A.id, A.score).where(A.id.in_(list(check)))).all())
+    results["python_loop"]["mismatches"] = int(np.sum([abs(stored[i] - s) > 0.05 for i, s in check.items()]))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
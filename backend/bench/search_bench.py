@@ -0,0 +1,85 @@
+"""Admin search latency on a large database.
+
+Builds (or reuses) a synthetic database, then times GET /search for queries of
+very different selectivity -- an exact farmer name, a district shared by
+thousands, a phrase from the remarks, a short phone prefix -- and reports
+p50/p95 per query (in-process, through httpx's ASGI transport).
+
+Run from backend/:
+    python -m bench.search_bench --users 200000 --applications 1000000
+    python -m bench.search_bench --db ./bench.db
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from bench.load_test import percentile
+
+QUERIES = {
+    "name (unique)": "Farmer 123",
+    "name prefix": "Farm",
+    "district (thousands)": "District 42",
+    "state (most rows)": "Telangana",
+    "remarks phrase": "field inspection",
+    "remarks (rare ref)": "ref 424242",
+    "phone prefix": "98",
+    "no match": "zzzzqqq",
+}
+
+
+async def run(args):
+    import httpx
+    from app.main import app
+    from app.database import dispose_async_engines
+    from app.seed import ADMIN_EMAIL, ADMIN_PASSWORD
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            login = await client.post("/auth/login", json={"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD})
+            admin = {"Authorization": f"Bearer {login.json()['access_token']}"}
+            for name, q in QUERIES.items():
+                timings, hits = [], 0
+                for i in range(args.requests):
+                    t0 = time.perf_counter()
+                    r = await client.get("/search", params={"q": q, "limit": 20}, headers=admin)
+                    timings.append(time.perf_counter() - t0)
+                    r.raise_for_status()
+                    hits = len(r.json())
+                timings.sort()
+                results[name] = {"q": q, "hits": hits,
+                                 "p50_ms": round(percentile(timings, 50) * 1000, 2),
+                                 "p95_ms": round(percentile(timings, 95) * 1000, 2)}
+    finally:
+        await dispose_async_engines()
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", help="existing SQLite file (default: build a temporary one)")
+    ap.add_argument("--users", type=int, default=200_000)
+    ap.add_argument("--applications", type=int, default=1_000_000)
+    ap.add_argument("--requests", type=int, default=50)
+    args = ap.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix="kk-search-"), "search.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("KK_HASH_WORKERS", "0")
+
+    from app.database import engine
+    from app.seed import seed
+    from bench.dataset import generate
+
+    seed()
+    if not args.db:
+        print(json.dumps(generate(engine, args.users, args.applications)))
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
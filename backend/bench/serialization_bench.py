@@ -0,0 +1,93 @@
+"""Serialisation cost per 10k rows: FastAPI's default response path vs the
+RowSerializer fast path (app/serialization.py).
+
+For ApplicationOut, ProgramOut and UserOut it times, best of N:
+  default   ORM fetch, then FastAPI's serialize_response (validate every object
+            into the response_model, dump to dicts) + JSONResponse (json.dumps)
+  validated ORM fetch, then one TypeAdapter validation + pydantic-core dump_json
+  fast      column-tuple fetch, then orjson straight from the tuples
+reporting fetch and serialise time separately.
+
+Run from backend/:
+    python -m bench.serialization_bench --rows 10000
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import List
+
+
+def best_ms(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return round(best * 1000, 2)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=10_000)
+    ap.add_argument("--repeat", type=int, default=7)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="kk-ser-")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tmp}/ser.db")
+    os.environ.setdefault("KK_HASH_WORKERS", "0")
+
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_model_field
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+    from app.database import SessionLocal, engine
+    from app.seed import seed
+    from app import models, schemas, serialization
+    from bench.dataset import generate
+
+    seed()
+    generate(engine, args.rows, args.rows, programs=args.rows)
+
+    cases = (
+        ("ApplicationOut", schemas.ApplicationOut, models.Application, serialization.applications),
+        ("ProgramOut", schemas.ProgramOut, models.Program, serialization.programs),
+        ("UserOut", schemas.UserOut, models.User, serialization.users),
+    )
+    results = {}
+    with SessionLocal() as db:
+        for name, schema, model, rows_ser in cases:
+            field = create_model_field(name="response", type_=List[schema], mode="serialization")
+            adapter = TypeAdapter(List[schema])
+            fetch_objects = lambda: db.execute(select(model).limit(args.rows)).scalars().all()
+            fetch_rows = lambda: db.execute(rows_ser.select().limit(args.rows)).all()
+
+            def default(objs):
+                content = asyncio.run(serialize_response(field=field, response_content=objs, is_coroutine=True))
+                return JSONResponse(content).body
+
+            objs = fetch_objects()
+            db.expunge_all()
+            rows = fetch_rows()
+            assert json.loads(default(objs)) == json.loads(rows_ser.dump_rows(rows))
+
+            res = {
+                "rows": len(rows),
+                "fetch_orm_ms": best_ms(lambda: (fetch_objects(), db.expunge_all()), args.repeat),
+                "fetch_columns_ms": best_ms(fetch_rows, args.repeat),
+                "serialize_default_ms": best_ms(lambda: default(objs), args.repeat),
+                "serialize_validated_ms": best_ms(lambda: adapter.dump_json(adapter.validate_python(objs, from_attributes=True)), args.repeat),
+                "serialize_fast_ms": best_ms(lambda: rows_ser.dump_rows(rows), args.repeat),
+            }
+            res["end_to_end_speedup"] = round(
+                (res["fetch_orm_ms"] + res["serialize_default_ms"])
+                / (res["fetch_columns_ms"] + res["serialize_fast_ms"]), 1)
+            results[name] = res
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
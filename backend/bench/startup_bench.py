@@ -0,0 +1,68 @@
+"""Cold-start benchmark: import time and time to first request.
+
+Each run is a fresh interpreter (like a new worker) against an already
+bootstrapped database. Reports, per run and as medians:
+  - import_s:        `import app.main`
+  - lifespan_s:      lifespan startup
+  - first_request_s: first GET /programs after startup
+  - total_s:         process spawn -> first response
+
+Run from backend/:
+    python -m bench.startup_bench --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import app.main
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app.main.app) as client:   # runs the lifespan
+    t2 = time.perf_counter()
+    r = client.get("/programs")
+    r.raise_for_status()
+    t3 = time.perf_counter()
+print(json.dumps({"import_s": t1 - t0, "lifespan_s": t2 - t1, "first_request_s": t3 - t2}))
+"""
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=10)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="kk-startup-")
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{tmp}/startup.db")
+    env["PYTHONPATH"] = os.getcwd() + os.pathsep + env.get("PYTHONPATH", "")
+
+    subprocess.run([sys.executable, "-m", "app.bootstrap"], env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+
+    runs = []
+    for _ in range(args.runs):
+        t0 = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", CHILD], env=env, cwd=tmp, check=True,
+                             capture_output=True, text=True).stdout
+        total = time.perf_counter() - t0
+        sample = json.loads(out.strip().splitlines()[-1])
+        sample["total_s"] = total
+        runs.append({k: round(v, 4) for k, v in sample.items()})
+
+    print(json.dumps({
+        "runs": args.runs,
+        "median": {k: round(statistics.median(r[k] for r in runs), 4) for k in runs[0]},
+        "samples": runs,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Refresh-token store latency as the table ages.
+
+Grows refresh_tokens in steps (a mix of live and expired rows spread over many
+users), and at each size times issue_refresh_token (cap trim + insert + commit)
+and find_refresh_token, then times one compaction pass. Latency should stay
+flat across sizes.
+
+Run from backend/:
+    python -m bench.token_bench --sizes 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def fill(engine, n, users, start):
+    from sqlalchemy import insert
+    from app import models
+
+    now = datetime.utcnow()
+    rows = []
+    with engine.begin() as conn:
+        for i in range(start, start + n):
+            # ~half already expired, as in a table nobody has swept for a while
+            expires = now + timedelta(days=random.uniform(-7, 7))
+            rows.append({"user_id": 1 + i % users, "token_hash": f"{i:064x}", "expires_at": expires,
+                         "created_at": expires - timedelta(days=7)})
+            if len(rows) == 50_000:
+                conn.execute(insert(models.RefreshToken.__table__), rows)
+                rows = []
+        if rows:
+            conn.execute(insert(models.RefreshToken.__table__), rows)
+
+
+async def time_ops(samples, users):
+    from app.database import AsyncSessionLocal
+    from app import tokens
+
+    issue, lookup = [], []
+    issued = []
+    for _ in range(samples):
+        uid = random.randint(1, users)
+        async with AsyncSessionLocal() as db:
+            t0 = time.perf_counter()
+            token = await tokens.issue_refresh_token(db, uid)
+            await db.commit()
+            issue.append(time.perf_counter() - t0)
+        issued.append(token)
+    for token in issued:
+        async with AsyncSessionLocal() as db:
+            t0 = time.perf_counter()
+            assert await tokens.find_refresh_token(db, token) is not None
+            lookup.append(time.perf_counter() - t0)
+    ms = lambda xs: round(statistics.median(xs) * 1000, 3)
+    p95 = lambda xs: round(sorted(xs)[int(len(xs) * 0.95)] * 1000, 3)
+    return {"issue_p50_ms": ms(issue), "issue_p95_ms": p95(issue),
+            "lookup_p50_ms": ms(lookup), "lookup_p95_ms": p95(lookup)}
+
+
+async def main_async(args):
+    from sqlalchemy import func, select
+    from app.database import engine, dispose_async_engines
+    from app.seed import seed
+    from app import models, tokens
+    from bench.dataset import generate
+
+    seed()
+    generate(engine, args.users, 0, programs=0)
+
+    results, total = [], 0
+    try:
+        for size in args.sizes:
+            fill(engine, size - total, args.users, total)
+            total = size
+            row = {"rows": size, **await time_ops(args.samples, args.users)}
+            results.append(row)
+            print(row)
+        t0 = time.perf_counter()
+        deleted = tokens.compact_expired_tokens(engine)
+        with engine.connect() as conn:
+            left = conn.execute(select(func.count()).select_from(models.RefreshToken)).scalar()
+        compaction = {"deleted": deleted, "rows_left": left, "seconds": round(time.perf_counter() - t0, 2)}
+    finally:
+        await dispose_async_engines()
+    return {"samples": args.samples, "results": results, "compaction": compaction}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--users", type=int, default=20_000)
+    ap.add_argument("--samples", type=int, default=300)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="kk-tokens-")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tmp}/tokens.db")
+    os.environ.setdefault("KK_HASH_WORKERS", "0")
+    print(json.dumps(asyncio.run(main_async(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
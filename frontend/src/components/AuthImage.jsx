@@ -0,0 +1,25 @@
+import React, { useEffect, useState } from 'react'
+import api from '../api/client'
+
+// <img> for API images that need the bearer token (document previews)
+export default function AuthImage({ src, alt, ...props }){
+  const [url,setUrl] = useState(null)
+
+  useEffect(()=>{
+    let objectUrl = null
+    let cancelled = false
+    api.get(src, { responseType: 'blob' })
+      .then(res => {
+        if (cancelled) return
+        objectUrl = URL.createObjectURL(res.data)
+        setUrl(objectUrl)
+      })
+      .catch(() => { /* no preview: render nothing */ })
+    return () => {
+      cancelled = true
+      if (objectUrl) URL.revokeObjectURL(objectUrl)
+    }
+  },[src])
+
+  return url ? <img src={url} alt={alt} {...props} /> : null
+}
@@ -1,23 +1,34 @@
 import React, { useEffect, useState } from 'react'
 import Header from '../components/Header'
+import AuthImage from '../components/AuthImage'
 import api from '../api/client'
 
 export default function AdminConsole(){
   const [filter,setFilter] = useState('')
+  const [order,setOrder] = useState('newest')
   const [items,setItems] = useState([])
+  const [nextCursor,setNextCursor] = useState(null)
+  const [summary,setSummary] = useState(null)
 
   // Review panel state
   const [openReview, setOpenReview] = useState(false)
   const [details, setDetails] = useState(null)
   const [remarks, setRemarks] = useState('')
 
-  async function load(){
+  async function load(cursor){
     const qs = new URLSearchParams()
     if(filter) qs.set('status', filter)
-    const {data} = await api.get(`/applications/admin/list?${qs.toString()}`)
-    setItems(data)
+    if(order !== 'newest') qs.set('order', order)
+    if(cursor) qs.set('cursor', cursor)
+    const res = await api.get(`/applications/admin/list?${qs.toString()}`)
+    setItems(prev => cursor ? [...prev, ...res.data] : res.data)
+    setNextCursor(res.headers['x-next-cursor'] || null)
+    if(!cursor){
+      const {data} = await api.get('/applications/admin/summary?group_by=status')
+      setSummary(data)
+    }
   }
-  useEffect(()=>{ load() },[filter])
+  useEffect(()=>{ load() },[filter, order])
 
   async function setStatus(id, status, remarkText){
     await api.post(`/applications/admin/${id}/status`, { status, remarks: remarkText ?? null })
@@ -37,6 +48,14 @@ export default function AdminConsole(){
     setOpenReview(true)
   }
 
+  async function openDocument(path){
+    // Authorised download, so fetch it with the token and open the blob
+    const res = await api.get(path, { responseType: 'blob' })
+    const url = URL.createObjectURL(res.data)
+    window.open(url, '_blank', 'noopener')
+    setTimeout(() => URL.revokeObjectURL(url), 60000)  // the new tab has loaded it by then
+  }
+
   function closeReview(){
     setOpenReview(false)
     setDetails(null)
@@ -77,6 +96,12 @@ export default function AdminConsole(){
     <div className="container">
       <div className="card">
         <h2>Admin Console</h2>
+        {summary && (
+          <div style={{display:'flex',gap:16,marginBottom:8}}>
+            <span>Total: <b>{summary.total_count}</b> ({summary.total_acreage.toFixed(1)} acres)</span>
+            {summary.rows.map(r => <span key={r.status}>{r.status}: <b>{r.count}</b></span>)}
+          </div>
+        )}
         <div style={{display:'flex',gap:8,alignItems:'center'}}>
           <label>Status filter:
             <select className="input" value={filter} onChange={e=>setFilter(e.target.value)}>
@@ -84,12 +109,18 @@ export default function AdminConsole(){
               <option>pending</option><option>under_review</option><option>approved</option><option>rejected</option>
             </select>
           </label>
+          <label>Order:
+            <select className="input" value={order} onChange={e=>setOrder(e.target.value)}>
+              <option value="newest">Newest</option>
+              <option value="score">Score</option>
+            </select>
+          </label>
         </div>
       </div>
 
       <div className="card">
         <table className="table">
-          <thead><tr><th>ID</th><th>User</th><th>Program</th><th>Acreage</th><th>Season</th><th>Status</th><th>Actions</th></tr></thead>
+          <thead><tr><th>ID</th><th>User</th><th>Program</th><th>Acreage</th><th>Season</th><th>Status</th><th>Score</th><th>Actions</th></tr></thead>
           <tbody>
             {items.map(x=>(
               <tr key={x.id}>
@@ -99,6 +130,7 @@ export default function AdminConsole(){
                 <td>{x.acreage}</td>
                 <td>{x.season}</td>
                 <td>{x.status}</td>
+                <td>{x.score ?? '-'}</td>
                 <td style={{display:'flex',gap:6}}>
                   <button className="btn secondary" onClick={()=>openReviewFor(x.id)}>Review</button>
                   <button className="btn" onClick={()=>setStatus(x.id,'approved','Approved from list view')}>Approve</button>
@@ -111,6 +143,9 @@ export default function AdminConsole(){
             ))}
           </tbody>
         </table>
+        {nextCursor && (
+          <button className="btn secondary" style={{marginTop:12}} onClick={()=>load(nextCursor)}>Load more</button>
+        )}
       </div>
 
       {/* Review Panel / Modal */}
@@ -159,7 +194,13 @@ export default function AdminConsole(){
                   <ul>
                     {details.documents.map(d=>(
                       <li key={d.id}>
-                        <b>{d.kind}:</b> <span style={{wordBreak:'break-all'}}>{d.file_path}</span>
+                        {d.thumbnail_url && (
+                          <AuthImage src={d.thumbnail_url} alt={d.kind} title="Open preview"
+                            style={{maxWidth:128, maxHeight:128, display:'block', cursor:'pointer', margin:'6px 0'}}
+                            onClick={()=>openDocument(d.preview_url)} />
+                        )}
+                        <b>{d.kind}:</b> <span style={{wordBreak:'break-all'}}>{d.original_name || d.file_path}</span>{' '}
+                        <button className="btn secondary" onClick={()=>openDocument(`/documents/${d.id}`)}>Open</button>
                       </li>
                     ))}
                   </ul>
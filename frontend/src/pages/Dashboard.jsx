@@ -1,10 +1,17 @@
-import React from 'react'
+import React, { useEffect, useState } from 'react'
 import Header from '../components/Header'
 import { useAuth } from '../auth/AuthContext'
 import { Link } from 'react-router-dom'
+import api from '../api/client'
 
 export default function Dashboard(){
   const { user } = useAuth()
+  const [notifications, setNotifications] = useState([])
+
+  useEffect(()=>{
+    if(!user) return
+    api.get('/notifications?limit=5').then(res => setNotifications(res.data)).catch(()=>{})
+  },[user])
   return (
     <>
       <Header/>
@@ -34,6 +41,19 @@ export default function Dashboard(){
             <p className="badge">Tip: Use crop filters to quickly find relevant subsidies.</p>
           </div>
 
+          <div className="card">
+            <h3>Notifications</h3>
+            {notifications.length === 0 ? <p>No notifications yet.</p> : (
+              <ul>
+                {notifications.map(n => (
+                  <li key={n.id} style={{fontWeight: n.read_at ? 'normal' : 'bold'}}>
+                    {n.title} — <span style={{fontWeight:'normal'}}>{n.body}</span>
+                  </li>
+                ))}
+              </ul>
+            )}
+          </div>
+
           <div className="card">
             <h3>Announcements</h3>
             <ul>